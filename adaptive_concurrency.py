@@ -0,0 +1,167 @@
+"""
+Adaptive Concurrency Limit
+AIMD control of how many requests may be in flight to one host. The limit
+grows by about one slot per round of healthy responses (p95 latency near the
+best recently seen, few errors) and is halved on 429, 503 or a timeout.
+A Retry-After header also pauses every request to the host until it expires.
+
+Threads use acquire() / release() directly; the async crawl engine calls
+try_acquire() / release() under its own asyncio.Condition.
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+
+INITIAL_LIMIT = 2
+MIN_LIMIT = 1
+DECREASE_FACTOR = 0.5
+
+# Statuses that mean "slow down"; other 5xx only count towards the error rate
+BACKOFF_STATUSES = (429, 503)
+
+# Health is judged over the last LATENCY_WINDOW responses. Every BASELINE_EVERY
+# responses the window's p95 is saved; latency is healthy while p95 stays within
+# LATENCY_TOLERANCE x the lowest of the last BASELINE_SNAPSHOTS saved, so an old
+# lucky minimum eventually ages out.
+LATENCY_WINDOW = 50
+BASELINE_EVERY = 10
+BASELINE_SNAPSHOTS = 50
+LATENCY_TOLERANCE = 2.0
+MAX_ERROR_RATE = 0.05
+
+# Never cut more than once per this many seconds (or per p95 if longer): the
+# responses already in flight when the first 429 arrived say nothing new
+DECREASE_COOLDOWN = 1.0
+
+
+def is_timeout(error):
+    """True for asyncio/aiohttp timeouts and requests' Timeout errors"""
+    return isinstance(error, (TimeoutError, asyncio.TimeoutError)) or type(error).__name__.endswith('Timeout')
+
+
+def retry_after_seconds(value):
+    """Seconds from a Retry-After header value (delta-seconds only), or None"""
+    try:
+        return max(0.0, float(value)) if value else None
+    except ValueError:
+        return None
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class AdaptiveLimit:
+    """In-flight request limit for one host, adjusted from each response"""
+
+    def __init__(self, max_limit, initial=INITIAL_LIMIT, min_limit=MIN_LIMIT):
+        self.max_limit = max(min_limit, max_limit)
+        self.min_limit = min_limit
+        self.limit = float(min(max(initial, min_limit), self.max_limit))
+        self.in_flight = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.errors = deque(maxlen=LATENCY_WINDOW)
+        self.baselines = deque(maxlen=BASELINE_SNAPSHOTS)
+        self.samples = 0
+        self.paused_until = 0.0
+        self.last_decrease = 0.0
+        self.increases = 0
+        self.decreases = 0
+        self.lock = threading.Lock()
+        self.slot_freed = threading.Condition(self.lock)
+
+    @property
+    def allowed(self):
+        """Whole number of requests currently allowed in flight"""
+        return max(self.min_limit, int(self.limit))
+
+    def try_acquire(self):
+        """Take a slot if one is free: 0 on success, else seconds to wait (None: until a slot frees)"""
+        with self.lock:
+            return self._try_acquire()
+
+    def _try_acquire(self):
+        pause = self.paused_until - time.monotonic()
+        if pause > 0:
+            return pause
+        if self.in_flight >= self.allowed:
+            return None
+        self.in_flight += 1
+        return 0
+
+    def acquire(self):
+        """Block the calling thread until a slot is free"""
+        with self.slot_freed:
+            while True:
+                wait = self._try_acquire()
+                if wait == 0:
+                    return
+                self.slot_freed.wait(wait)
+
+    def release(self):
+        with self.slot_freed:
+            self.in_flight -= 1
+            self.slot_freed.notify_all()
+
+    def on_response(self, status, latency=None, retry_after=None):
+        """Feed one response back: back off on 429/503, otherwise maybe grow. True if the limit was cut"""
+        with self.slot_freed:
+            self.errors.append(status >= 500)
+            if status in BACKOFF_STATUSES:
+                return self._decrease(retry_after_seconds(retry_after))
+            if latency is not None:
+                self._observe_latency(latency)
+            if self._healthy():
+                # +1/limit per response: about one extra slot per round trip
+                grown = min(self.max_limit, self.limit + 1 / self.limit)
+                if int(grown) > int(self.limit):
+                    self.increases += 1
+                    self.slot_freed.notify_all()
+                self.limit = grown
+            return False
+
+    def on_error(self, error):
+        """Feed back a request that raised: timeouts back off, anything else is an error. True if the limit was cut"""
+        with self.lock:
+            self.errors.append(True)
+            return is_timeout(error) and self._decrease()
+
+    def backoff(self, retry_after=None):
+        """Back off as if the host had answered 429. True if the limit was cut"""
+        with self.lock:
+            return self._decrease(retry_after_seconds(retry_after))
+
+    def _observe_latency(self, latency):
+        self.latencies.append(latency)
+        self.samples += 1
+        if self.samples % BASELINE_EVERY == 0:
+            self.baselines.append(percentile(self.latencies, 0.95))
+
+    def p95(self):
+        return percentile(self.latencies, 0.95) if self.latencies else None
+
+    def _healthy(self):
+        if self.errors and sum(self.errors) / len(self.errors) > MAX_ERROR_RATE:
+            return False
+        if not self.baselines:
+            return True
+        return self.p95() <= min(self.baselines) * LATENCY_TOLERANCE
+
+    def _decrease(self, pause=None):
+        now = time.monotonic()
+        if pause:
+            self.paused_until = max(self.paused_until, now + pause)
+        cooldown = max(DECREASE_COOLDOWN, self.p95() or 0.0)
+        if now - self.last_decrease >= cooldown:
+            self.limit = max(float(self.min_limit), self.limit * DECREASE_FACTOR)
+            self.last_decrease = now
+            self.decreases += 1
+            return True
+        return False
+
+    def __repr__(self):
+        return (f"AdaptiveLimit(limit={self.limit:.2f}, in_flight={self.in_flight}, "
+                f"max={self.max_limit}, +{self.increases}/-{self.decreases})")
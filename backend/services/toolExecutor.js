@@ -1,4 +1,4 @@
-import { readFileSync } from 'fs';
+import { existsSync, readFileSync } from 'fs';
 import { fileURLToPath } from 'url';
 import { dirname, join } from 'path';
 
@@ -9,6 +9,153 @@ const partsData = JSON.parse(
   readFileSync(join(__dirname, '../data/seedParts.json'), 'utf-8')
 );
 
+// Must match INDEX_VERSION in build_index.py
+const INDEX_VERSION = 2;
+
+const partsIndex = loadPartsIndex(join(__dirname, '../data/partsIndex.json'));
+const symptomIndex = loadSymptomIndex(join(__dirname, '../data/symptomIndex.json'));
+
+/**
+ * Load the precomputed index written by build_index.py, or null if it is
+ * missing, from another build_index.py version or built from a different
+ * seedParts.json
+ */
+function loadPartsIndex(indexPath) {
+  if (!existsSync(indexPath)) {
+    return null;
+  }
+  const index = JSON.parse(readFileSync(indexPath, 'utf-8'));
+  if (index.version !== INDEX_VERSION) {
+    console.warn('partsIndex.json is from another build_index.py version; falling back to linear scans');
+    return null;
+  }
+  // Lookups take user input as keys: without a prototype, "constructor" or
+  // "__proto__" is just a missing key
+  for (const table of ['parts', 'models', 'symptom_tokens']) {
+    index[table] = Object.assign(Object.create(null), index[table]);
+  }
+  const parts = partsData.parts;
+  const inSync = index.part_count === parts.length &&
+    parts.every((part, position) => index.parts[part.part_number.toLowerCase()] === position);
+  if (!inSync) {
+    console.warn('partsIndex.json is stale; falling back to linear scans');
+    return null;
+  }
+  return index;
+}
+
+/**
+ * Load the BM25 index written by symptom_search.py, or null if it is missing
+ * or was built from a different seedParts.json
+ */
+function loadSymptomIndex(indexPath) {
+  if (!existsSync(indexPath)) {
+    return null;
+  }
+  const index = JSON.parse(readFileSync(indexPath, 'utf-8'));
+  index.terms = Object.assign(Object.create(null), index.terms);
+  const parts = partsData.parts;
+  const inSync = index.parts.length === parts.length &&
+    parts.every((part, position) => index.parts[position] === part.part_number);
+  if (!inSync) {
+    console.warn('symptomIndex.json is stale; ranked symptom search disabled');
+    return null;
+  }
+  return index;
+}
+
+// Tokenizer - must match tokenize() in symptom_search.py
+const STOPWORDS = new Set(
+  ('a an and are as at be but by for from has have i in is it its my of on or ' +
+   'the this to was with not no doesn don t s').split(' ')
+);
+const SYNONYMS = new Map([['fridge', 'refrigerator'], ['fridges', 'refrigerator']]);
+const SUFFIXES = ['ings', 'ing', 'ers', 'er', 'ies', 'es', 'ed', 'ly', 's'];
+
+function stem(word) {
+  const suffix = SUFFIXES.find(s => word.endsWith(s) && word.length - s.length >= 3);
+  return suffix ? word.slice(0, -suffix.length) : word;
+}
+
+function searchTerms(text) {
+  const words = text.toLowerCase().match(/[a-z0-9]+/g) || [];
+  return [...new Set(words.filter(w => !STOPWORDS.has(w)).map(w => stem(SYNONYMS.get(w) || w)))];
+}
+
+/**
+ * Parts ranked by BM25 score over name, description and symptoms
+ */
+function rankedSymptomSearch(query, limit) {
+  if (!symptomIndex) {
+    return [];
+  }
+  const scores = new Map();
+  for (const term of searchTerms(query)) {
+    for (const [position, score] of symptomIndex.terms[term] || []) {
+      scores.set(position, (scores.get(position) || 0) + score);
+    }
+  }
+  return [...scores.entries()]
+    .sort((a, b) => b[1] - a[1] || a[0] - b[0])
+    .slice(0, limit)
+    .map(([position]) => partsData.parts[position]);
+}
+
+/**
+ * Find a part by number: O(1) with the index, linear scan otherwise
+ */
+function findPart(partNumber) {
+  const key = partNumber.toLowerCase();
+  if (partsIndex) {
+    const position = partsIndex.parts[key];
+    return position === undefined ? undefined : partsData.parts[position];
+  }
+  return partsData.parts.find(p => p.part_number.toLowerCase() === key);
+}
+
+/**
+ * Symptom tokens containing `word`. Their suffixes starting with `word` sit
+ * together in the sorted suffix table: binary search for the first, then
+ * walk while they still match.
+ */
+function tokensContaining(word) {
+  const suffixes = partsIndex.symptom_suffixes;
+  const suffixAt = i => suffixes[i][0].slice(suffixes[i][1]);
+  let low = 0;
+  let high = suffixes.length;
+  while (low < high) {
+    const mid = (low + high) >>> 1;
+    if (suffixAt(mid) < word) {
+      low = mid + 1;
+    } else {
+      high = mid;
+    }
+  }
+  const tokens = new Set();
+  for (let i = low; i < suffixes.length && suffixAt(i).startsWith(word); i++) {
+    tokens.add(suffixes[i][0]);
+  }
+  return tokens;
+}
+
+/**
+ * Parts that might have a symptom containing `query`. Every word in the query
+ * must occur inside some symptom word, so the postings of the longest query
+ * word's containing tokens are a superset of the real matches.
+ */
+function symptomCandidates(query) {
+  const words = query.match(/[a-z0-9]+/g);
+  if (!partsIndex || !words) {
+    return partsData.parts;
+  }
+  const longest = words.reduce((a, b) => (b.length > a.length ? b : a));
+  const positions = new Set();
+  for (const token of tokensContaining(longest)) {
+    partsIndex.symptom_tokens[token].forEach(position => positions.add(position));
+  }
+  return [...positions].sort((a, b) => a - b).map(position => partsData.parts[position]);
+}
+
 /**
  * Route to appropriate tool based on intent
  */
@@ -41,9 +188,7 @@ async function searchParts(parameters) {
   const { part_number, search_query } = parameters;
   
   if (part_number) {
-    const part = partsData.parts.find(p => 
-      p.part_number.toLowerCase() === part_number.toLowerCase()
-    );
+    const part = findPart(part_number);
     return part ? { parts: [part] } : { parts: [] };
   }
   
@@ -71,9 +216,7 @@ async function getInstallationSteps(parameters) {
     return { error: 'Part number not specified' };
   }
   
-  const part = partsData.parts.find(p => 
-    p.part_number.toLowerCase() === part_number.toLowerCase()
-  );
+  const part = findPart(part_number);
   
   if (!part) {
     return { error: 'Part not found', part_number };
@@ -95,17 +238,17 @@ async function checkCompatibility(parameters) {
     return { error: 'Both part number and model number are required' };
   }
   
-  const part = partsData.parts.find(p => 
-    p.part_number.toLowerCase() === part_number.toLowerCase()
-  );
+  const part = findPart(part_number);
   
   if (!part) {
     return { error: 'Part not found', part_number };
   }
   
-  const isCompatible = part.compatible_models.some(model => 
-    model.toLowerCase() === model_number.toLowerCase()
-  );
+  const isCompatible = partsIndex
+    ? (partsIndex.models[model_number.toLowerCase()] || []).includes(partsIndex.parts[part.part_number.toLowerCase()])
+    : part.compatible_models.some(model => 
+        model.toLowerCase() === model_number.toLowerCase()
+      );
   
   return {
     part,
@@ -126,12 +269,13 @@ async function troubleshootSymptom(parameters) {
     return { parts: [] };
   }
   
-  const matchingParts = partsData.parts.filter(part => 
+  const matchingParts = symptomCandidates(query).filter(part => 
     part.symptoms_fixed.some(s => s.toLowerCase().includes(query))
   );
   
   return {
     symptom: query,
-    parts: matchingParts.slice(0, 5) // Top 5 matches
+    // Top 5 exact phrase matches; otherwise rank by the words the query shares
+    parts: matchingParts.length ? matchingParts.slice(0, 5) : rankedSymptomSearch(query, 5)
   };
 }
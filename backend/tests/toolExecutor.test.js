@@ -0,0 +1,54 @@
+import { test } from 'node:test';
+import assert from 'node:assert/strict';
+import { readFileSync } from 'fs';
+
+import { executeTool } from '../services/toolExecutor.js';
+
+// Keys every plain object inherits; the index lookups must treat them as unknown
+const PROTOTYPE_KEYS = ['constructor', '__proto__', 'toString', 'hasOwnProperty'];
+
+test('compatibility check with a prototype key as the model is not compatible', async () => {
+  for (const model of PROTOTYPE_KEYS) {
+    const result = await executeTool('compatibility', '', { part_number: 'PS11752778', model_number: model });
+    assert.equal(result.is_compatible, false, model);
+  }
+});
+
+test('compatibility check with a listed model is compatible', async () => {
+  const result = await executeTool('compatibility', '', { part_number: 'PS11752778', model_number: 'wrs325sdhz' });
+  assert.equal(result.is_compatible, true);
+});
+
+test('part lookups with a prototype key find no part', async () => {
+  for (const partNumber of PROTOTYPE_KEYS) {
+    const result = await executeTool('installation', '', { part_number: partNumber });
+    assert.deepEqual(result, { error: 'Part not found', part_number: partNumber });
+  }
+});
+
+test('troubleshooting with prototype keys as symptom words ignores them', async () => {
+  for (const word of PROTOTYPE_KEYS) {
+    const alone = await executeTool('troubleshooting', '', { symptom: word });
+    assert.deepEqual(alone.parts, [], word);
+    const mixed = await executeTool('troubleshooting', '', { symptom: `ice maker ${word}` });
+    assert.ok(mixed.parts.length > 0, word);
+  }
+});
+
+test('troubleshooting ranks parts when no symptom matches the phrase', async () => {
+  const result = await executeTool('troubleshooting', '', { symptom: 'fridge not making ice' });
+  assert.ok(result.parts.length > 0);
+  assert.ok(result.parts.every(part => part && part.part_number));
+});
+
+test('troubleshooting through the suffix table matches a scan of every part', async () => {
+  const { parts } = JSON.parse(readFileSync(new URL('../data/seedParts.json', import.meta.url), 'utf-8'));
+  for (const query of ['leak', 'ker not', 'not dispensing', 'ice', 'door']) {
+    const expected = parts
+      .filter(part => part.symptoms_fixed.some(s => s.toLowerCase().includes(query)))
+      .slice(0, 5);
+    assert.ok(expected.length > 0, query);
+    const result = await executeTool('troubleshooting', '', { symptom: query });
+    assert.deepEqual(result.parts, expected, query);
+  }
+});
@@ -0,0 +1,97 @@
+"""
+Parsing Benchmark
+Compares the original html.parser full-tree path with the lxml + SoupStrainer
+backend on the saved fixture pages, and checks both produce identical part dicts
+
+Usage: python benchmarks/bench_parsing.py [iterations]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import scraper_comprehensive  # noqa: E402
+import scraper_specific  # noqa: E402
+from html_parsing import PARSER, make_soup, part_page_soup  # noqa: E402
+
+FIXTURE_DIR = os.path.join(ROOT, "fixtures", "pages")
+
+PARSE_FUNCTIONS = {
+    "comprehensive": scraper_comprehensive.parse_part_detail,
+    "specific": scraper_specific.parse_part,
+}
+
+BACKENDS = {
+    "html.parser (full)": lambda content: BeautifulSoup(content, 'html.parser'),
+    f"{PARSER} (full)": lambda content: make_soup(content),
+    f"{PARSER} (strained)": part_page_soup,
+}
+
+
+def load_fixtures():
+    """Load (entry, content) pairs from the fixture manifest"""
+    with open(os.path.join(FIXTURE_DIR, "manifest.json"), 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    fixtures = []
+    for entry in manifest:
+        if entry["scraper"] not in PARSE_FUNCTIONS:
+            continue
+        with open(os.path.join(FIXTURE_DIR, entry["file"]), 'rb') as f:
+            fixtures.append((entry, f.read()))
+    return fixtures
+
+
+def run_backend(fixtures, make_tree, iterations):
+    """Parse + extract every fixture `iterations` times; returns (seconds, results)"""
+    results = []
+    start = time.perf_counter()
+    for _ in range(iterations):
+        results = []
+        for entry, content in fixtures:
+            parse = PARSE_FUNCTIONS[entry["scraper"]]
+            results.append(parse(content, entry["part_info"], entry["url"], soup=make_tree(content)))
+    return time.perf_counter() - start, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the HTML parsing backends on the fixture pages")
+    parser.add_argument('iterations', nargs='?', type=int, default=50)
+    iterations = parser.parse_args().iterations
+    fixtures = load_fixtures()
+    total_bytes = sum(len(content) for _, content in fixtures)
+    pages = len(fixtures) * iterations
+
+    print("=" * 70)
+    print(f"PARSING BENCHMARK: {len(fixtures)} fixture pages x {iterations} iterations "
+          f"({total_bytes / 1024:.0f} KB per pass)")
+    print("=" * 70)
+
+    baseline_time = None
+    baseline_results = None
+    mismatches = 0
+
+    for label, make_tree in BACKENDS.items():
+        elapsed, results = run_backend(fixtures, make_tree, iterations)
+        if baseline_time is None:
+            baseline_time, baseline_results = elapsed, results
+        identical = results == baseline_results
+        if not identical:
+            mismatches += 1
+        print(f"{label:<22} {elapsed * 1000 / pages:8.2f} ms/page  {pages / elapsed:8.1f} pages/sec  "
+              f"{baseline_time / elapsed:5.2f}x  {'identical' if identical else 'MISMATCH'}")
+
+    if mismatches:
+        print("\n❌ Part dicts differ from the html.parser baseline")
+        sys.exit(1)
+    print("\n✅ All backends produce identical part dicts")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+"""
+Scraper Benchmark
+Runs all three scrapers against the fixture pages (recorded or synthetic, see
+benchmarks/replay.py) served by a local replay server - no network access needed:
+
+  - pages/sec for scrape_part_detail, scrape_part and scrape_product_listing
+    (fetch + parse + extract, end to end)
+  - per-field extraction time for the part detail extractors (and the
+    structured data scan ahead of them), and parse / extract time for the
+    other two scrapers
+  - the resulting part dicts, compared against snapshots in fixtures/snapshots/
+
+Exits 1 if a snapshot differs, if --baseline is given and a scraper got
+slower than the tolerance allows, or if the corpus holds fewer recorded
+pages than --require-recorded asks for.
+
+Usage:
+  python benchmarks/bench_scrapers.py [iterations]
+  python benchmarks/bench_scrapers.py --update-snapshots
+  python benchmarks/bench_scrapers.py --save-baseline /tmp/before.json
+  python benchmarks/bench_scrapers.py --baseline /tmp/before.json [--tolerance 0.2]
+  python benchmarks/bench_scrapers.py --require-recorded 3
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import fetch  # noqa: E402
+import part_extractor  # noqa: E402
+import scraper  # noqa: E402
+import scraper_comprehensive  # noqa: E402
+import scraper_specific  # noqa: E402
+import structured_data  # noqa: E402
+from crawl_metrics import Histogram  # noqa: E402
+from html_parsing import listing_soup, part_page_soup  # noqa: E402
+from replay import FIXTURE_DIR, SCRAPERS, ReplayServer, load_manifest  # noqa: E402
+
+SNAPSHOT_DIR = os.path.join(ROOT, "fixtures", "snapshots")
+LIVE_BASE_URL = "https://www.partselect.com"
+
+# Allowed pages/sec drop against a saved baseline before the run fails
+DEFAULT_TOLERANCE = 0.2
+
+SCRAPER_MODULES = {
+    "comprehensive": scraper_comprehensive,
+    "specific": scraper_specific,
+    "listing": scraper,
+}
+
+# Part detail fields, each timed on its own against an already-built PageScan
+FIELD_EXTRACTORS = {
+    "name": lambda scan, info: part_extractor.extract_name(scan, info["ps"], info["mfr"]),
+    "price": lambda scan, info: part_extractor.extract_price(scan),
+    "description": lambda scan, info: part_extractor.extract_description(scan),
+    "symptoms": lambda scan, info: part_extractor.extract_symptoms(scan),
+    "models": lambda scan, info: part_extractor.extract_models(scan),
+    "install_steps": lambda scan, info: part_extractor.extract_install_steps(scan),
+}
+
+
+def scrape(entry):
+    """Run the scraper an entry was recorded for, end to end through the fetch layer"""
+    if entry["scraper"] == "comprehensive":
+        return scraper_comprehensive.scrape_part_detail(entry["part_info"])
+    if entry["scraper"] == "specific":
+        return scraper_specific.scrape_part(entry["part_info"])
+    return scraper.scrape_product_listing(entry["part_info"]["category_url"], entry["part_info"]["type"])
+
+
+@contextlib.contextmanager
+def replaying(replay):
+    """Point every scraper at the replay server, with the response cache and rate limit off"""
+    saved = {name: module.BASE_URL for name, module in SCRAPER_MODULES.items()}
+    cache_enabled, rate = fetch.CACHE_ENABLED, fetch.RATE_PER_HOST
+    for module in SCRAPER_MODULES.values():
+        module.BASE_URL = replay.base_url
+    fetch.CACHE_ENABLED, fetch.RATE_PER_HOST = False, None
+    try:
+        yield
+    finally:
+        for name, module in SCRAPER_MODULES.items():
+            module.BASE_URL = saved[name]
+        fetch.CACHE_ENABLED, fetch.RATE_PER_HOST = cache_enabled, rate
+
+
+def normalized(value, base_url):
+    """Scraper output with the replay server's address swapped back for the live site"""
+    return json.loads(json.dumps(value).replace(base_url, LIVE_BASE_URL))
+
+
+def run_scrapers(manifest, replay, iterations):
+    """Scrape every fixture `iterations` times; returns ({scraper: seconds}, {scraper: pages}, results)"""
+    elapsed = dict.fromkeys(SCRAPERS, 0.0)
+    pages = dict.fromkeys(SCRAPERS, 0)
+    results = {}
+    with replaying(replay), contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(iterations):
+            for entry in manifest:
+                start = time.perf_counter()
+                result = scrape(entry)
+                elapsed[entry["scraper"]] += time.perf_counter() - start
+                pages[entry["scraper"]] += 1
+                results[entry["file"]] = normalized(result, replay.base_url)
+    return elapsed, pages, results
+
+
+def time_stages(manifest, iterations):
+    """{scraper: {stage: Histogram}} for parsing and for each extracted field"""
+    stages = {name: {} for name in SCRAPERS}
+
+    def observe(scraper_name, stage, seconds):
+        stages[scraper_name].setdefault(stage, Histogram()).observe(seconds)
+
+    for entry in manifest:
+        with open(os.path.join(FIXTURE_DIR, entry["file"]), 'rb') as f:
+            content = f.read()
+        info = entry["part_info"]
+        for _ in range(iterations):
+            start = time.perf_counter()
+            soup = listing_soup(content) if entry["scraper"] == "listing" else part_page_soup(content)
+            observe(entry["scraper"], "parse", time.perf_counter() - start)
+
+            if entry["scraper"] == "comprehensive":
+                start = time.perf_counter()
+                structured_data.structured_fields(content, info["ps"], info["mfr"])
+                observe("comprehensive", "structured", time.perf_counter() - start)
+
+                start = time.perf_counter()
+                scan = part_extractor.scan_page(soup)
+                observe("comprehensive", "scan", time.perf_counter() - start)
+                for field, extract in FIELD_EXTRACTORS.items():
+                    start = time.perf_counter()
+                    extract(scan, info)
+                    observe("comprehensive", field, time.perf_counter() - start)
+            elif entry["scraper"] == "specific":
+                start = time.perf_counter()
+                scraper_specific.parse_part(content, info, entry["url"], soup=soup)
+                observe("specific", "extract", time.perf_counter() - start)
+    return stages
+
+
+def snapshot_path(scraper_name):
+    return os.path.join(SNAPSHOT_DIR, f"{scraper_name}.json")
+
+
+def check_snapshots(manifest, results, update=False):
+    """Compare (or rewrite) the per-scraper snapshots; returns the fixture files that differ"""
+    mismatched = []
+    for scraper_name in SCRAPERS:
+        current = {entry["file"]: results[entry["file"]] for entry in manifest if entry["scraper"] == scraper_name}
+        if not current:
+            continue
+        path = snapshot_path(scraper_name)
+        if update:
+            os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(current, f, indent=2, ensure_ascii=False)
+                f.write('\n')
+            continue
+        saved = {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+        mismatched += [name for name, result in current.items() if saved.get(name) != result]
+    return mismatched
+
+
+def diff_fields(expected, actual):
+    """Top-level keys whose values differ between two part dicts (or lists of them)"""
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        return sorted(key for key in expected.keys() | actual.keys() if expected.get(key) != actual.get(key))
+    return ["<whole result>"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the scrapers against recorded fixture pages")
+    parser.add_argument('iterations', nargs='?', type=int, default=20)
+    parser.add_argument('--update-snapshots', action='store_true',
+                        help="rewrite fixtures/snapshots/ from this run instead of checking them")
+    parser.add_argument('--save-baseline', metavar='PATH', help="write this run's pages/sec to PATH")
+    parser.add_argument('--baseline', metavar='PATH', help="fail if pages/sec dropped against PATH")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed fractional slowdown against --baseline (default: %(default)s)")
+    parser.add_argument('--require-recorded', type=int, default=0, metavar='N',
+                        help="fail unless at least N pages were recorded from the live site")
+    args = parser.parse_args()
+
+    manifest = load_manifest()
+    print("=" * 70)
+    print(f"SCRAPER BENCHMARK: {len(manifest)} fixture pages x {args.iterations} iterations (replayed)")
+    print("=" * 70)
+    synthetic = sum(entry.get("source") == "synthetic" for entry in manifest)
+    recorded = sum(entry.get("source") == "recorded" for entry in manifest)
+    if synthetic:
+        print(f"⚠️  {synthetic} of {len(manifest)} pages are synthetic: hand-written, not recorded from the site")
+    if recorded < args.require_recorded:
+        print(f"❌ {recorded} recorded pages, {args.require_recorded} required: "
+              f"add some with benchmarks/replay.py record")
+        sys.exit(1)
+
+    with ReplayServer() as replay:
+        elapsed, pages, results = run_scrapers(manifest, replay, args.iterations)
+        misses = replay.misses
+
+    throughput = {}
+    print(f"\n{'scraper':<15} {'pages':>6} {'ms/page':>9} {'pages/sec':>10}")
+    for scraper_name in SCRAPERS:
+        if not pages[scraper_name]:
+            continue
+        throughput[scraper_name] = pages[scraper_name] / elapsed[scraper_name]
+        print(f"{scraper_name:<15} {pages[scraper_name]:>6} "
+              f"{elapsed[scraper_name] * 1000 / pages[scraper_name]:>9.2f} {throughput[scraper_name]:>10.1f}")
+
+    stages = time_stages(manifest, args.iterations)
+    print(f"\n{'scraper':<15} {'stage':<14} {'mean ms':>9} {'p90 ms':>9}")
+    for scraper_name in SCRAPERS:
+        for stage, histogram in stages[scraper_name].items():
+            stats = histogram.summary()
+            print(f"{scraper_name:<15} {stage:<14} {stats['mean'] * 1000:>9.3f} {stats['p90'] * 1000:>9.3f}")
+
+    failed = False
+    if misses:
+        # e.g. comprehensive trying its second URL pattern after a 404
+        print(f"\n⚠️  {misses} requests had no recorded page")
+
+    mismatched = check_snapshots(manifest, results, update=args.update_snapshots)
+    if args.update_snapshots:
+        print(f"\n📸 Updated snapshots in {SNAPSHOT_DIR}")
+    elif mismatched:
+        failed = True
+        print(f"\n❌ {len(mismatched)} results differ from their snapshots:")
+        for name in mismatched:
+            entry = next(entry for entry in manifest if entry["file"] == name)
+            with open(snapshot_path(entry["scraper"]), 'r', encoding='utf-8') as f:
+                expected = json.load(f).get(name)
+            print(f"   {name}: {', '.join(diff_fields(expected, results[name]))}")
+    else:
+        print("\n✅ All results match their snapshots")
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump({"pages_per_second": throughput}, f, indent=2)
+        print(f"💾 Saved baseline to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)["pages_per_second"]
+        for scraper_name, rate in throughput.items():
+            before = baseline.get(scraper_name)
+            if not before:
+                continue
+            change = rate / before - 1
+            slower = change < -args.tolerance
+            failed = failed or slower
+            print(f"{'❌' if slower else '✅'} {scraper_name}: {before:.1f} -> {rate:.1f} pages/sec ({change:+.0%})")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
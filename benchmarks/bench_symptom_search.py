@@ -0,0 +1,138 @@
+"""
+Symptom Search Benchmark
+Builds a synthetic catalog around seedParts.json, then compares the current
+linear substring scan (troubleshootSymptom in toolExecutor.js) with the BM25
+index: build time, per-query latency and how many parts each one finds.
+Also checks the early-stopping top-k against exhaustive BM25 scoring.
+
+Usage: python benchmarks/bench_symptom_search.py [part_count]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from symptom_search import SymptomSearch, build_search_index, tokenize  # noqa: E402
+
+SEED_FILE = os.path.join(ROOT, "backend", "data", "seedParts.json")
+
+QUERIES = [
+    "ice maker not working",
+    "fridge not making ice",
+    "dishwasher not draining",
+    "water leaking",
+    "door won't close",
+    "loud noise",
+    "refrigerator too warm",
+    "dishes not clean",
+]
+
+# Synthetic parts name a component and pair components with failures; component
+# popularity follows a Zipf curve so term frequencies look like a real catalog
+COMPONENTS = """
+ice maker|water inlet valve|door gasket|drain pump|evaporator fan motor|defrost heater|
+thermistor|control board|door shelf bin|crisper drawer|water filter|door switch|spray arm|
+dishrack roller|detergent dispenser|float switch|heating element|wash motor|circulation pump|
+door latch|silverware basket|compressor relay|condenser fan|defrost timer|temperature sensor|
+light bulb|hinge|door handle|ice bucket|auger motor|dispenser actuator|damper control|
+chopper assembly|filter housing|tub gasket|inlet hose|drain hose|check valve|overload protector|
+start capacitor|freezer shelf|glass shelf|kickplate|leveling leg|wire harness|user interface|
+rinse aid cap|lower wash arm|upper wash arm|spray manifold
+""".replace("\n", "").split("|")
+FAILURES = """
+not working|stopped working|leaking|making loud noise|won't turn on|won't close|broken|cracked|
+not draining|not cooling|too warm|frosting up|not dispensing|clicking|running constantly|
+not filling|overflowing|stuck|burning smell|tripping breaker
+""".replace("\n", "").split("|")
+QUALIFIERS = "replacement genuine oem assembly kit upper lower left right front rear white black".split()
+
+
+def synthetic_catalog(count, seed=7):
+    """`count` parts built from Zipf-weighted components, seeded with the real catalog"""
+    with open(SEED_FILE, 'r', encoding='utf-8') as f:
+        base = json.load(f)["parts"]
+    rng = random.Random(seed)
+    weights = [1 / rank for rank in range(1, len(COMPONENTS) + 1)]
+    parts = []
+    for i in range(count):
+        template = base[i % len(base)]
+        component = rng.choices(COMPONENTS, weights)[0]
+        symptoms = [f"{affected} {rng.choice(FAILURES)}"
+                    for affected in rng.choices(COMPONENTS, weights, k=rng.randint(1, 4))]
+        parts.append({
+            "part_number": f"PS{90000000 + i}",
+            "name": " ".join([component.title()] + rng.sample(QUALIFIERS, rng.randint(0, 3))),
+            "description": f"{component.capitalize()} for {template['type']} models. {template['description']}",
+            "symptoms_fixed": symptoms,
+        })
+    return parts
+
+
+def linear_scan(parts, query):
+    """The toolExecutor.js troubleshootSymptom filter"""
+    query = query.lower()
+    return [part for part in parts if any(query in symptom.lower() for symptom in part["symptoms_fixed"])]
+
+
+def exhaustive_top_k(searcher, query, k):
+    """Score every matching part, no early stopping"""
+    terms = [term for term in dict.fromkeys(tokenize(query)) if term in searcher.scores]
+    totals = {}
+    for term in terms:
+        for doc, score in searcher.scores[term].items():
+            totals[doc] = totals.get(doc, 0.0) + score
+    ranked = sorted(totals.items(), key=lambda item: (-item[1], -item[0]))[:k]
+    return [(searcher.parts[doc], round(score, 4)) for doc, score in ranked]
+
+
+def time_per_query(function, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        result = function()
+    return (time.perf_counter() - start) * 1000 / repeats, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the linear symptom scan with the BM25 index")
+    parser.add_argument('part_count', nargs='?', type=int, default=100_000,
+                        help="parts in the synthetic catalog (default: %(default)s)")
+    count = parser.parse_args().part_count
+    parts = synthetic_catalog(count)
+
+    print("=" * 78)
+    print(f"SYMPTOM SEARCH BENCHMARK: {count:,} parts")
+    print("=" * 78)
+
+    start = time.perf_counter()
+    index = build_search_index(parts)
+    build_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    searcher = SymptomSearch(index)
+    load_seconds = time.perf_counter() - start
+    print(f"Index build: {build_seconds:.2f}s, load: {load_seconds:.2f}s, terms: {len(index['terms'])}\n")
+
+    print(f"{'query':<26} {'scan ms':>9} {'found':>7} {'bm25 ms':>9} {'top-5':>6}  exact")
+    mismatches = 0
+    for query in QUERIES:
+        scan_ms, scanned = time_per_query(lambda: linear_scan(parts, query), 3)
+        bm25_ms, ranked = time_per_query(lambda: searcher.search(query, k=5), 200)
+        # Equal scores may tie-break differently, so compare the score sequence
+        exact = [score for _, score in ranked] == [score for _, score in exhaustive_top_k(searcher, query, 5)]
+        mismatches += not exact
+        print(f"{query:<26} {scan_ms:9.2f} {len(scanned):7,} {bm25_ms:9.3f} {len(ranked):6}  "
+              f"{'yes' if exact else 'NO'}")
+
+    if mismatches:
+        print("\n❌ Early-stopping top-k differs from exhaustive scoring")
+        sys.exit(1)
+    print("\n✅ Top-k results match exhaustive BM25 scoring")
+
+
+if __name__ == "__main__":
+    main()
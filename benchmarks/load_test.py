@@ -0,0 +1,185 @@
+"""
+Query Service Load Test
+Starts query_service.py on a catalog (the seed catalog, or a synthetic one
+of --parts parts) and drives it with many concurrent clients replaying a
+chat-like request mix: part lookups, compatibility checks, symptom and
+keyword searches, with popular questions repeated on a Zipf curve. Reports
+requests/sec and p50/p99 latency per endpoint, once with the result cache
+disabled and once with it on.
+
+Usage:
+  python benchmarks/load_test.py [--parts 100000] [--requests 20000] [--concurrency 64]
+  python benchmarks/load_test.py --url http://127.0.0.1:3002   # an already running service
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import aiohttp
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_symptom_search import QUERIES, synthetic_catalog  # noqa: E402
+
+SEED_FILE = os.path.join(ROOT, "backend", "data", "seedParts.json")
+
+KEYWORDS = ["water filter", "ice maker", "door", "pump", "gasket", "valve", "motor", "shelf", "switch", "hose"]
+# Share of requests per endpoint
+MIX = {"part": 0.35, "compatibility": 0.30, "symptoms": 0.20, "search": 0.15}
+# Distinct questions per endpoint; popularity is Zipf over these
+DISTINCT = 2000
+STARTUP_TIMEOUT = 120
+
+
+def with_models(parts, base):
+    """Give synthetic parts the compatible_models of the seed part they were built from"""
+    for i, part in enumerate(parts):
+        part["compatible_models"] = list(base[i % len(base)].get("compatible_models") or [])
+    return parts
+
+
+def request_paths(parts, count, seed=11):
+    """`count` (endpoint, path) pairs drawn from Zipf-popular questions about the catalog"""
+    rng = random.Random(seed)
+    models = sorted({model for part in parts for model in part.get("compatible_models") or []}) or ["WRS325SDHZ"]
+    questions = {
+        "part": [f"/parts/{rng.choice(parts)['part_number']}" for _ in range(DISTINCT)],
+        "compatibility": [f"/compatibility?part={rng.choice(parts)['part_number']}&model={rng.choice(models)}"
+                          for _ in range(DISTINCT)],
+        "symptoms": [f"/symptoms?q={query.replace(' ', '+')}&limit={limit}"
+                     for query in QUERIES for limit in range(1, 11)],
+        "search": [f"/search?q={keyword.replace(' ', '+')}&limit={limit}"
+                   for keyword in KEYWORDS for limit in range(1, 11)],
+    }
+    weights = {endpoint: [1 / rank for rank in range(1, len(paths) + 1)] for endpoint, paths in questions.items()}
+    endpoints = rng.choices(list(MIX), list(MIX.values()), k=count)
+    return [(endpoint, rng.choices(questions[endpoint], weights[endpoint])[0]) for endpoint in endpoints]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def wait_ready(session, url):
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        try:
+            async with session.get(f"{url}/health") as response:
+                if response.status == 200:
+                    return await response.json()
+        except aiohttp.ClientError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError(f"query service at {url} did not start within {STARTUP_TIMEOUT}s")
+
+
+async def drive(url, requests, concurrency):
+    """Send every request with `concurrency` clients; returns (seconds, {endpoint: [latency]}, errors, health)"""
+    latencies = {endpoint: [] for endpoint in MIX}
+    errors = 0
+    queue = iter(requests)
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        await wait_ready(session, url)
+
+        async def client():
+            nonlocal errors
+            for endpoint, path in queue:
+                started = time.perf_counter()
+                try:
+                    async with session.get(url + path) as response:
+                        await response.read()
+                        if response.status >= 500:
+                            errors += 1
+                except aiohttp.ClientError:
+                    errors += 1
+                latencies[endpoint].append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+        seconds = time.perf_counter() - started
+        async with session.get(f"{url}/health") as response:
+            health = await response.json()
+    return seconds, latencies, errors, health
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0.0
+
+
+def report(label, seconds, latencies, errors, health):
+    total = sum(len(values) for values in latencies.values())
+    everything = [value for values in latencies.values() for value in values]
+    cache = health["cache"]
+    print(f"\n{label}: {total:,} requests in {seconds:.2f}s = {total / seconds:,.0f} req/s, "
+          f"{errors} errors, cache hit rate {cache['hit_rate']:.1%}")
+    print(f"  {'endpoint':<15} {'requests':>9} {'p50 ms':>9} {'p99 ms':>9}")
+    for endpoint, values in list(latencies.items()) + [("all", everything)]:
+        print(f"  {endpoint:<15} {len(values):9,} {percentile(values, 0.50) * 1000:9.2f} "
+              f"{percentile(values, 0.99) * 1000:9.2f}")
+
+
+def run_service(catalog_path, cache_size, requests, concurrency):
+    """Start query_service.py on a free port, drive it, and stop it"""
+    port = free_port()
+    command = [sys.executable, os.path.join(ROOT, "query_service.py"), "--catalog", catalog_path,
+               "--port", str(port), "--cache-size", str(cache_size)]
+    service = subprocess.Popen(command, cwd=ROOT, stdout=subprocess.DEVNULL)
+    try:
+        return asyncio.run(drive(f"http://127.0.0.1:{port}", requests, concurrency))
+    finally:
+        service.terminate()
+        service.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the catalog query service")
+    parser.add_argument('--parts', type=int, default=0,
+                        help="serve a synthetic catalog of this many parts (default: the seed catalog)")
+    parser.add_argument('--requests', type=int, default=20_000)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--url', help="load test a running service instead of starting one")
+    args = parser.parse_args()
+
+    with open(SEED_FILE, 'r', encoding='utf-8') as f:
+        parts = json.load(f)["parts"]
+    if args.parts:
+        parts = with_models(synthetic_catalog(args.parts), parts)
+    requests = request_paths(parts, args.requests)
+
+    print("=" * 78)
+    print(f"QUERY SERVICE LOAD TEST: {len(parts):,} parts, {args.requests:,} requests, "
+          f"{args.concurrency} concurrent clients")
+    print("=" * 78)
+
+    if args.url:
+        report(args.url, *asyncio.run(drive(args.url.rstrip('/'), requests, args.concurrency)))
+        return
+
+    catalog_path = SEED_FILE
+    if args.parts:
+        fd, catalog_path = tempfile.mkstemp(suffix=".json")
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({"parts": parts}, f)
+    try:
+        report("Cache off", *run_service(catalog_path, 0, requests, args.concurrency))
+        report("Cache on", *run_service(catalog_path, 10_000, requests, args.concurrency))
+    finally:
+        if catalog_path != SEED_FILE:
+            os.remove(catalog_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""
+Record / Replay Harness
+Captures live partselect.com responses into the fixture corpus
+(fixtures/pages/ + manifest.json) and serves them back from a local HTTP
+server, so the scrapers can be run and benchmarked without network access.
+
+Each manifest entry's "url" is the address the scraper requests and the
+replay server answers, and "source" says where the page came from:
+"recorded" pages were fetched from that URL (hidden form field and token
+meta tag values blanked before saving), "synthetic" ones were written by
+hand to mimic the site's markup and were never served by it.
+
+Usage:
+  python benchmarks/replay.py record comprehensive PS11752778 ...
+  python benchmarks/replay.py record specific PS11756119 ...
+  python benchmarks/replay.py record listing /Refrigerator-Parts.htm ...
+  python benchmarks/replay.py serve [--port 8765]
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urljoin, urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+FIXTURE_DIR = os.path.join(ROOT, "fixtures", "pages")
+MANIFEST_FILE = "manifest.json"
+
+SCRAPERS = ("comprehensive", "specific", "listing")
+
+# Recorded pages are committed: hidden form fields (CSRF tokens, view state)
+# and token meta tags keep their tags but lose their values
+HIDDEN_INPUT = re.compile(rb'<input\b[^>]*\btype\s*=\s*["\']?hidden[^>]*>', re.I)
+VALUE_ATTR = re.compile(rb'(\bvalue\s*=\s*)(?:"[^"]*"|\'[^\']*\'|[^\s>]+)', re.I)
+TOKEN_META = re.compile(rb'<meta\b[^>]*\bname\s*=\s*["\']?[\w-]*(?:csrf|token)[^>]*>', re.I)
+CONTENT_ATTR = re.compile(rb'(\bcontent\s*=\s*)(?:"[^"]*"|\'[^\']*\'|[^\s>]+)', re.I)
+
+
+def load_manifest(fixture_dir=FIXTURE_DIR):
+    with open(os.path.join(fixture_dir, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_manifest(manifest, fixture_dir=FIXTURE_DIR):
+    path = os.path.join(fixture_dir, MANIFEST_FILE)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def url_key(url):
+    """Path + query of a URL: what the replay server matches requests on"""
+    parts = urlsplit(url)
+    return parts.path + (f"?{parts.query}" if parts.query else "")
+
+
+class ReplayServer:
+    """
+    Local HTTP server answering each manifest URL with its recorded body
+    (and 404 for anything else). Use as a context manager; `base_url` replaces
+    the scrapers' BASE_URL while it runs.
+    """
+
+    def __init__(self, fixture_dir=FIXTURE_DIR, port=0):
+        self.fixture_dir = fixture_dir
+        self.pages = {}
+        for entry in load_manifest(fixture_dir):
+            with open(os.path.join(fixture_dir, entry["file"]), 'rb') as f:
+                self.pages[url_key(entry["url"])] = f.read()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(('127.0.0.1', port), self.handler_class())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def handler_class(self):
+        replay = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body go out in separate writes; without this every
+            # keep-alive response stalls on a delayed ACK
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                body = replay.pages.get(self.path)
+                with replay.lock:
+                    if body is None:
+                        replay.misses += 1
+                    else:
+                        replay.hits += 1
+                status = 200 if body is not None else 404
+                body = body if body is not None else b"Not Found"
+                self.send_response(status)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def sanitize(content):
+    """A live page fit to commit as a fixture"""
+    content = HIDDEN_INPUT.sub(lambda match: VALUE_ATTR.sub(rb'\1""', match.group()), content)
+    return TOKEN_META.sub(lambda match: CONTENT_ATTR.sub(rb'\1""', match.group()), content)
+
+
+def fixture_name(scraper, key):
+    """File name for a recorded page"""
+    if scraper == "listing":
+        return "listing-" + re.sub(r'[^a-z0-9]+', '-', os.path.splitext(key)[0].lower()).strip('-') + ".html"
+    return f"{key}.html"
+
+
+def record_targets(scraper, keys):
+    """(key, candidate urls, part_info) for each PS number / listing path to record"""
+    if scraper == "listing":
+        import scraper as listing_scraper
+        types = {path: kind for kind, paths in listing_scraper.CATEGORIES.items() for path in paths}
+        for path in keys:
+            part_info = {"category_url": path, "type": types.get(path, "refrigerator")}
+            yield path, [urljoin(listing_scraper.BASE_URL, path)], part_info
+        return
+
+    if scraper == "comprehensive":
+        import scraper_comprehensive
+        known = {part["ps"]: part for part in scraper_comprehensive.KNOWN_PARTS}
+        urls = lambda part_info: [url for _, url in scraper_comprehensive.part_urls(part_info)]  # noqa: E731
+    else:
+        import scraper_specific
+        known = {part["ps"]: part for part in scraper_specific.PARTS_TO_SCRAPE}
+        urls = lambda part_info: [scraper_specific.part_url(part_info)]  # noqa: E731
+
+    for ps in keys:
+        if ps not in known:
+            print(f"⚠️  {ps} is not in the {scraper} scraper's part list; skipping")
+            continue
+        yield ps, urls(known[ps]), known[ps]
+
+
+def record(scraper, keys, fixture_dir=FIXTURE_DIR):
+    """Fetch pages live and add them to the fixture corpus; returns how many were recorded"""
+    import fetch
+
+    # Record what the site serves now, not a cached copy
+    fetch.CACHE_ENABLED = False
+    manifest = load_manifest(fixture_dir)
+    recorded = 0
+    for key, urls, part_info in record_targets(scraper, keys):
+        for url in urls:
+            page = fetch.fetch(url)
+            if page.status != 200:
+                continue
+            filename = fixture_name(scraper, key)
+            with open(os.path.join(fixture_dir, filename), 'wb') as f:
+                f.write(sanitize(page.content))
+            manifest = [entry for entry in manifest if entry["file"] != filename]
+            manifest.append({"file": filename, "scraper": scraper, "source": "recorded", "url": url,
+                             "part_info": part_info})
+            recorded += 1
+            print(f"📼 {key}: {len(page.content) / 1024:.0f} KB from {url}")
+            break
+        else:
+            print(f"❌ {key}: no URL returned 200")
+    save_manifest(manifest, fixture_dir)
+    return recorded
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record live pages into the fixture corpus, or replay them")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    record_parser = commands.add_parser('record', help="fetch pages live and save them as fixtures")
+    record_parser.add_argument('scraper', choices=SCRAPERS)
+    record_parser.add_argument('keys', nargs='+', help="PS numbers, or listing paths for the listing scraper")
+
+    serve_parser = commands.add_parser('serve', help="serve the recorded pages until interrupted")
+    serve_parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    if args.command == 'record':
+        count = record(args.scraper, args.keys)
+        print(f"✅ Recorded {count} pages into {FIXTURE_DIR}")
+        return
+
+    replay = ReplayServer(port=args.port)
+    print(f"📼 Replaying {len(replay.pages)} pages at {replay.base_url} (Ctrl+C to stop)")
+    try:
+        replay.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        replay.server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Catalog Index Builder
+Precomputes lookup indexes next to seedParts.json so the backend can resolve
+part numbers, models and symptoms without scanning every part:
+
+  parts           lowercased part number -> position
+  models          lowercased model number -> positions of compatible parts
+  symptom_tokens  symptom word -> positions of parts that fix it
+  symptom_suffixes  [word, offset] for every suffix of every symptom word,
+                  sorted by (suffix, word): the words containing a string
+                  are one binary search away
+
+Positions index into the "parts" array of seedParts.json.
+"""
+
+import bisect
+import json
+import os
+import re
+
+SEED_FILE = "backend/data/seedParts.json"
+INDEX_FILE = "backend/data/partsIndex.json"
+INDEX_VERSION = 2
+
+WORD = re.compile(r'[a-z0-9]+')
+
+
+def normalize_number(value):
+    """Part/model numbers compare case-insensitively (same as toolExecutor.js)"""
+    return str(value).lower()
+
+
+def symptom_tokens(text):
+    """Lowercase words in a symptom"""
+    return WORD.findall(text.lower())
+
+
+def build_index(parts):
+    """Build the index dict for a list of part records"""
+    by_number = {}
+    models = {}
+    tokens = {}
+
+    for position, part in enumerate(parts):
+        by_number.setdefault(normalize_number(part["part_number"]), position)
+
+        for model in part.get("compatible_models") or []:
+            postings = models.setdefault(normalize_number(model), [])
+            if not postings or postings[-1] != position:
+                postings.append(position)
+
+        for symptom in part.get("symptoms_fixed") or []:
+            for token in symptom_tokens(symptom):
+                postings = tokens.setdefault(token, [])
+                if not postings or postings[-1] != position:
+                    postings.append(position)
+
+    return {
+        "version": INDEX_VERSION,
+        "part_count": len(parts),
+        "parts": by_number,
+        "models": models,
+        "symptom_tokens": tokens,
+        "symptom_suffixes": token_suffixes(tokens),
+    }
+
+
+def suffix_key(entry):
+    token, offset = entry
+    return token[offset:], token
+
+
+def token_suffixes(tokens):
+    """[token, offset] for every suffix of every token, in suffix order"""
+    return sorted(([token, offset] for token in tokens for offset in range(len(token))), key=suffix_key)
+
+
+def add_suffixes(suffixes, token):
+    for offset in range(len(token)):
+        bisect.insort(suffixes, [token, offset], key=suffix_key)
+
+
+def remove_suffixes(suffixes, token):
+    for offset in range(len(token)):
+        del suffixes[bisect.bisect_left(suffixes, (token[offset:], token), key=suffix_key)]
+
+
+def part_keys(part):
+    """(model keys, symptom tokens) a part is posted under"""
+    models = {normalize_number(model) for model in part.get("compatible_models") or []}
+    tokens = {token for symptom in part.get("symptoms_fixed") or [] for token in symptom_tokens(symptom)}
+    return models, tokens
+
+
+def update_index(index, changes):
+    """
+    Patch a built index in place for changed parts. `changes` holds
+    (position, old_part, new_part) in the order they were made, with old_part
+    None for a part appended at `position`; the result equals build_index()
+    over the changed catalog.
+    """
+    tokens = index["symptom_tokens"]
+    for position, old, new in changes:
+        if old is None:
+            index["parts"].setdefault(normalize_number(new["part_number"]), position)
+            index["part_count"] = max(index["part_count"], position + 1)
+            old = {}
+        for postings_by_key, before, after in zip((index["models"], tokens), part_keys(old), part_keys(new)):
+            for key in before - after:
+                postings = postings_by_key[key]
+                postings.remove(position)
+                if not postings:
+                    del postings_by_key[key]
+                    if postings_by_key is tokens:
+                        remove_suffixes(index["symptom_suffixes"], key)
+            for key in after - before:
+                if postings_by_key is tokens and key not in tokens:
+                    add_suffixes(index["symptom_suffixes"], key)
+                bisect.insort(postings_by_key.setdefault(key, []), position)
+    return index
+
+
+def load_index(index_path=INDEX_FILE):
+    """The index written by write_index(), or None if it is missing or another version"""
+    try:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return index if index.get("version") == INDEX_VERSION else None
+
+
+def write_index(index, index_path=INDEX_FILE):
+    """Write the index compactly and atomically"""
+    tmp_path = index_path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, separators=(',', ':'), ensure_ascii=False)
+    os.replace(tmp_path, index_path)
+
+
+def build_index_file(seed_path=SEED_FILE, index_path=INDEX_FILE):
+    """Rebuild the index file from the seed catalog; returns the index"""
+    with open(seed_path, 'r', encoding='utf-8') as f:
+        parts = json.load(f)["parts"]
+    index = build_index(parts)
+    write_index(index, index_path)
+    return index
+
+
+def main():
+    index = build_index_file()
+    print(f"✅ Indexed {index['part_count']} parts -> {INDEX_FILE}")
+    print(f"   Part numbers: {len(index['parts'])}")
+    print(f"   Models: {len(index['models'])}")
+    print(f"   Symptom tokens: {len(index['symptom_tokens'])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""
+Compact Binary Catalog
+A memory-mappable catalog file written from seedParts.json. Repeated text
+(install instructions, descriptions, model numbers, symptoms) is stored once
+in a string table; each part is a fixed-size record of string ids, so a
+single part can be read by number without deserializing the whole file.
+
+Layout (little-endian):
+  header      magic, version, counts and section offsets
+  records     record_count x RECORD (presence bits, null bits, field slots)
+  lists       u32 string ids referenced by list fields
+  directory   record_count x (u32 key string id, u32 record index), sorted by key
+  str_index   (string_count + 1) x u32 byte offsets into str_data
+  str_data    UTF-8 bytes of every distinct string
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+
+SEED_FILE = "backend/data/seedParts.json"
+CATALOG_FILE = "backend/data/catalog.bin"
+
+MAGIC = b'PSCATLG\x00'
+VERSION = 1
+
+# (field, kind): "str" -> string id, "num" -> float64, "list" -> (start, count) into lists
+FIELDS = [
+    ("part_number", "str"),
+    ("manufacturer_part_number", "str"),
+    ("name", "str"),
+    ("type", "str"),
+    ("brand", "str"),
+    ("price", "num"),
+    ("description", "str"),
+    ("compatible_models", "list"),
+    ("symptoms_fixed", "list"),
+    ("install_instructions", "str"),
+    ("image_url", "str"),
+    ("product_url", "str"),
+]
+
+HEADER = struct.Struct('<8sIIIIIQQQQQ')
+SLOT_FORMATS = {"str": "I", "num": "d", "list": "II"}
+RECORD = struct.Struct('<II' + ''.join(SLOT_FORMATS[kind] for _, kind in FIELDS))
+DIRECTORY_ENTRY = struct.Struct('<II')
+U32 = struct.Struct('<I')
+
+
+class StringTable:
+    """Interns strings: each distinct value is stored once and referenced by id"""
+
+    def __init__(self):
+        self.ids = {}
+        self.strings = []
+
+    def intern(self, value):
+        string_id = self.ids.get(value)
+        if string_id is None:
+            string_id = self.ids[value] = len(self.strings)
+            self.strings.append(value)
+        return string_id
+
+
+def pack_record(part, strings, lists):
+    """Fixed-size record for one part; list values are appended to `lists`"""
+    present = 0
+    nulls = 0
+    slots = []
+    for bit, (field, kind) in enumerate(FIELDS):
+        value = part.get(field)
+        if field in part:
+            present |= 1 << bit
+        if value is None:
+            if field in part:
+                nulls |= 1 << bit
+            slots.extend((0, 0) if kind == "list" else (0,))
+        elif kind == "str":
+            slots.append(strings.intern(value))
+        elif kind == "num":
+            slots.append(float(value))
+        else:
+            slots.extend((len(lists), len(value)))
+            lists.extend(strings.intern(item) for item in value)
+    return RECORD.pack(present, nulls, *slots)
+
+
+def write_catalog_file(parts, path=CATALOG_FILE):
+    """Write parts to the binary catalog atomically; returns the file size"""
+    strings = StringTable()
+    lists = []
+    records = [pack_record(part, strings, lists) for part in parts]
+    # Directory is sorted by key text (not string id) so readers can binary search it
+    directory = sorted(((strings.intern(part["part_number"].lower()), index)
+                        for index, part in enumerate(parts)),
+                       key=lambda entry: strings.strings[entry[0]])
+
+    encoded = [value.encode('utf-8') for value in strings.strings]
+    str_index = [0]
+    for data in encoded:
+        str_index.append(str_index[-1] + len(data))
+
+    records_offset = HEADER.size
+    lists_offset = records_offset + RECORD.size * len(records)
+    directory_offset = lists_offset + U32.size * len(lists)
+    str_index_offset = directory_offset + DIRECTORY_ENTRY.size * len(directory)
+    str_data_offset = str_index_offset + U32.size * len(str_index)
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(records), len(lists), len(encoded), len(FIELDS),
+                            records_offset, lists_offset, directory_offset,
+                            str_index_offset, str_data_offset))
+        f.write(b''.join(records))
+        f.write(struct.pack(f'<{len(lists)}I', *lists))
+        f.write(b''.join(DIRECTORY_ENTRY.pack(*entry) for entry in directory))
+        f.write(struct.pack(f'<{len(str_index)}I', *str_index))
+        f.write(b''.join(encoded))
+        size = f.tell()
+    os.replace(tmp_path, path)
+    return size
+
+
+class CatalogReader:
+    """Random access to a binary catalog through mmap; nothing is loaded up front"""
+
+    def __init__(self, path=CATALOG_FILE):
+        self.file = open(path, 'rb')
+        self.buffer = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, self.record_count, _, self.string_count, field_count,
+         self.records_offset, self.lists_offset, self.directory_offset,
+         self.str_index_offset, self.str_data_offset) = HEADER.unpack_from(self.buffer, 0)
+        if magic != MAGIC or version != VERSION or field_count != len(FIELDS):
+            raise ValueError(f"{path} is not a version {VERSION} catalog file")
+
+    def __len__(self):
+        return self.record_count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def string(self, string_id):
+        """Decode one string from the table"""
+        start, end = struct.unpack_from('<II', self.buffer, self.str_index_offset + U32.size * string_id)
+        return self.buffer[self.str_data_offset + start:self.str_data_offset + end].decode('utf-8')
+
+    def string_list(self, start, count):
+        ids = struct.unpack_from(f'<{count}I', self.buffer, self.lists_offset + U32.size * start)
+        return [self.string(string_id) for string_id in ids]
+
+    def record(self, index):
+        """Decode the part at a record index"""
+        values = RECORD.unpack_from(self.buffer, self.records_offset + RECORD.size * index)
+        present, nulls = values[0], values[1]
+        slots = iter(values[2:])
+        part = {}
+        for bit, (field, kind) in enumerate(FIELDS):
+            slot = (next(slots), next(slots)) if kind == "list" else next(slots)
+            if not present & (1 << bit):
+                continue
+            if nulls & (1 << bit):
+                part[field] = None
+            elif kind == "str":
+                part[field] = self.string(slot)
+            elif kind == "num":
+                part[field] = slot
+            else:
+                part[field] = self.string_list(*slot)
+        return part
+
+    def find_index(self, part_number):
+        """Binary search the directory for a part number; returns its record index or None"""
+        key = part_number.lower()
+        low, high = 0, self.record_count
+        while low < high:
+            middle = (low + high) // 2
+            string_id, index = DIRECTORY_ENTRY.unpack_from(
+                self.buffer, self.directory_offset + DIRECTORY_ENTRY.size * middle)
+            candidate = self.string(string_id)
+            if candidate == key:
+                return index
+            if candidate < key:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+
+    def get(self, part_number):
+        """Look up one part by number without reading the rest of the catalog"""
+        index = self.find_index(part_number)
+        return None if index is None else self.record(index)
+
+    def __iter__(self):
+        for index in range(self.record_count):
+            yield self.record(index)
+
+    def close(self):
+        self.buffer.close()
+        self.file.close()
+
+
+def build_catalog_file(seed_path=SEED_FILE, path=CATALOG_FILE):
+    """Rebuild the binary catalog from the seed JSON; returns (part count, file size)"""
+    with open(seed_path, 'r', encoding='utf-8') as f:
+        parts = json.load(f)["parts"]
+    return len(parts), write_catalog_file(parts, path)
+
+
+def main():
+    if len(sys.argv) > 1:
+        # python catalog_format.py PS11752778 -> print one part
+        with CatalogReader() as catalog:
+            print(json.dumps(catalog.get(sys.argv[1]), indent=2, ensure_ascii=False))
+        return
+
+    count, size = build_catalog_file()
+    print(f"✅ Wrote {count} parts to {CATALOG_FILE}")
+    print(f"   {size / 1024:.1f} KB (seedParts.json: {os.path.getsize(SEED_FILE) / 1024:.1f} KB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""
+Multi-Source Catalog Merge
+Consolidates several scrapers' JSONL part streams into one catalog without
+holding them in memory: each stream is cut into sorted runs on disk, the
+runs are k-way merged by part number, and every part's records are folded
+into one with field-level precedence rules, so a real scraped price beats
+the 49.99 placeholder and real symptoms beat an empty or filler list no
+matter which scraper ran last.
+
+Usage:
+  python catalog_merge.py                       # every scraper's stream in SOURCES
+  python catalog_merge.py a.jsonl b.jsonl ...   # these streams, highest precedence first
+"""
+
+import argparse
+import heapq
+import json
+import os
+import re
+import shutil
+import tempfile
+
+from part_sink import SCRAPED_DIR, SEED_FILE, read_jsonl, write_catalog
+
+# Scraper streams in precedence order: earlier sources win ties between real values
+SOURCES = [
+    os.path.join(SCRAPED_DIR, "comprehensive.jsonl"),   # scraper_comprehensive.py
+    os.path.join(SCRAPED_DIR, "specific.jsonl"),        # scraper_specific.py
+    os.path.join(SCRAPED_DIR, "listing.jsonl"),         # scraper.py
+]
+
+# Records per sorted run, and how many runs one merge pass reads at once
+RUN_SIZE = 50_000
+MERGE_FAN_IN = 64
+
+# Filler the scrapers write when a page doesn't have the field
+PLACEHOLDER_PRICE = 49.99
+PLACEHOLDER_NAME = re.compile(r'^\w+ (refrigerator|dishwasher) part$', re.I)
+PLACEHOLDER_DESCRIPTION = re.compile(r'^(genuine .*replacement part.*|oem \w+ part)$', re.I)
+PLACEHOLDER_MODEL = re.compile(r'^compatible with various ', re.I)
+PLACEHOLDER_SYMPTOMS = {"damaged part", "broken component"}
+PLACEHOLDER_INSTALL = "1. Disconnect power\n2. Remove old part\n3. Install new part\n4. Reconnect power\n5. Test operation"
+
+
+def present(value):
+    return value is not None and value != "" and value != []
+
+
+def real_price(value):
+    return isinstance(value, (int, float)) and value > 0 and round(value, 2) != PLACEHOLDER_PRICE
+
+
+def real_name(value):
+    return present(value) and not PLACEHOLDER_NAME.match(value)
+
+
+def real_description(value):
+    return present(value) and not PLACEHOLDER_DESCRIPTION.match(value)
+
+
+def real_models(value):
+    return present(value) and not all(PLACEHOLDER_MODEL.match(model) for model in value)
+
+
+def real_symptoms(value):
+    return present(value) and not PLACEHOLDER_SYMPTOMS <= set(value)
+
+
+def real_install(value):
+    return present(value) and value.strip() != PLACEHOLDER_INSTALL
+
+
+# Part field -> test for a real (not placeholder) value; the first source with
+# a real value wins, else the first with any value. Other fields: first present.
+FIELD_RULES = {
+    "price": real_price,
+    "name": real_name,
+    "description": real_description,
+    "compatible_models": real_models,
+    "symptoms_fixed": real_symptoms,
+    "install_instructions": real_install,
+}
+
+# List fields whose real values are combined across sources instead of picked
+UNION_FIELDS = ("compatible_models",)
+
+
+def merge_records(records):
+    """Fold one part's records (highest precedence first) into a single record"""
+    fields = []
+    for record in records:
+        fields += [field for field in record if field not in fields]
+
+    merged = {}
+    for field in fields:
+        values = [record[field] for record in records if field in record]
+        is_real = FIELD_RULES.get(field, present)
+        real = [value for value in values if is_real(value)]
+        if field in UNION_FIELDS and real:
+            combined = {}
+            for value in real:
+                for item in value:
+                    if not PLACEHOLDER_MODEL.match(item):
+                        combined.setdefault(item, None)
+            merged[field] = list(combined)
+        elif real:
+            merged[field] = real[0]
+        else:
+            merged[field] = next((value for value in values if present(value)), values[0])
+    return merged
+
+
+def write_run(rows, run_dir, number):
+    """Sort a buffer of (part_number, source, sequence, record) rows and spill it to disk"""
+    rows.sort(key=lambda row: row[:3])
+    path = os.path.join(run_dir, f"run-{number:06d}.jsonl")
+    with open(path, 'w', encoding='utf-8') as f:
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False) + '\n')
+    return path
+
+
+def read_run(path):
+    for row in read_jsonl(path):
+        yield tuple(row)
+
+
+def sorted_runs(sources, run_dir, run_size=RUN_SIZE):
+    """Cut every source stream into sorted runs; returns the run paths"""
+    runs = []
+    rows = []
+    for rank, source in enumerate(sources):
+        for sequence, record in enumerate(read_jsonl(source)):
+            rows.append((record["part_number"], rank, sequence, record))
+            if len(rows) >= run_size:
+                runs.append(write_run(rows, run_dir, len(runs)))
+                rows = []
+    if rows:
+        runs.append(write_run(rows, run_dir, len(runs)))
+    return runs
+
+
+def merge_runs(runs, run_dir, fan_in=MERGE_FAN_IN):
+    """Merge runs in passes of `fan_in` until one pass can read them all; yields sorted rows"""
+    number = len(runs)
+    while len(runs) > fan_in:
+        merged = []
+        for start in range(0, len(runs), fan_in):
+            group = runs[start:start + fan_in]
+            path = os.path.join(run_dir, f"run-{number:06d}.jsonl")
+            number += 1
+            with open(path, 'w', encoding='utf-8') as f:
+                for row in heapq.merge(*(read_run(run) for run in group), key=lambda row: row[:3]):
+                    f.write(json.dumps(row, ensure_ascii=False) + '\n')
+            for run in group:
+                os.remove(run)
+            merged.append(path)
+        runs = merged
+    yield from heapq.merge(*(read_run(run) for run in runs), key=lambda row: row[:3])
+
+
+def merged_parts(rows):
+    """One consolidated record per part number from rows sorted by part number"""
+    current = None
+    records = []
+    for part_number, _, _, record in rows:
+        if part_number != current and records:
+            yield merge_records(records)
+            records = []
+        current = part_number
+        records.append(record)
+    if records:
+        yield merge_records(records)
+
+
+def merge_catalog(sources=None, output_path=SEED_FILE, run_size=RUN_SIZE, fan_in=MERGE_FAN_IN):
+    """
+    External sort-merge of JSONL part streams (highest precedence first) into
+    a {"parts": [...]} catalog ordered by part number. Missing sources are
+    skipped. Returns the number of parts written.
+    """
+    sources = [path for path in (SOURCES if sources is None else sources) if os.path.exists(path)]
+    run_dir = tempfile.mkdtemp(prefix=".merge-", dir=os.path.dirname(output_path) or ".")
+    try:
+        runs = sorted_runs(sources, run_dir, run_size)
+        return write_catalog(merged_parts(merge_runs(runs, run_dir, fan_in)), output_path)
+    finally:
+        shutil.rmtree(run_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge scraper JSONL streams into one catalog")
+    parser.add_argument('sources', nargs='*', help="JSONL part streams, highest precedence first "
+                                                    "(default: every scraper's stream)")
+    parser.add_argument('-o', '--output', default=SEED_FILE)
+    parser.add_argument('--run-size', type=int, default=RUN_SIZE,
+                        help="records sorted in memory at a time (default: %(default)s)")
+    args = parser.parse_args()
+
+    sources = args.sources or SOURCES
+    found = [path for path in sources if os.path.exists(path)]
+    if not found:
+        print(f"❌ None of these exist: {', '.join(sources)}")
+        return
+    count = merge_catalog(found, args.output, args.run_size)
+    print(f"💾 Merged {len(found)} streams ({', '.join(found)}) into {count} parts -> {args.output}")
+    print(f"   Apply the overlays with: python enhance_data.py")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""
+Model Compatibility Matrix
+Sparse part x model compatibility stored as one bitset per model (a Python
+int with bit i set when part i fits). "Which parts fit model X", "which
+models does part P fit" and "what do these share" become dictionary lookups
+and bitwise ANDs instead of scans over every compatible_models list.
+"""
+
+import json
+import os
+import sys
+
+SEED_FILE = "backend/data/seedParts.json"
+MATRIX_FILE = "backend/data/compatMatrix.json"
+MATRIX_VERSION = 1
+
+# bytes.translate table: 0 stays 0, every other byte becomes 1
+NONZERO_BYTES = bytes([0] + [1] * 255)
+
+
+def normalize_number(value):
+    """Part/model numbers compare case-insensitively"""
+    return str(value).lower()
+
+
+def bit_positions(bits):
+    """Indexes of the set bits in an int, lowest first"""
+    # Jump between the int's non-zero bytes (memchr over a 0/1 copy); peeling
+    # bits off the int itself copies all of it for every bit
+    buffer = bits.to_bytes((bits.bit_length() + 7) >> 3, 'little')
+    nonzero = buffer.translate(NONZERO_BYTES)
+    positions = []
+    offset = nonzero.find(1)
+    while offset != -1:
+        byte = buffer[offset]
+        while byte:
+            low = byte & -byte
+            positions.append((offset << 3) + low.bit_length() - 1)
+            byte ^= low
+        offset = nonzero.find(1, offset + 1)
+    return positions
+
+
+def bits_from_positions(positions):
+    """An int with the given bits set, built in one go (OR-ing bits in one by one is quadratic)"""
+    if not positions:
+        return 0
+    buffer = bytearray((max(positions) >> 3) + 1)
+    for position in positions:
+        buffer[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(buffer, 'little')
+
+
+class CompatMatrix:
+    """Bitset-per-model compatibility matrix with a query API"""
+
+    def __init__(self, part_numbers, models, model_bits, part_columns=None):
+        self.part_numbers = part_numbers
+        self.models = models
+        self.model_bits = dict(zip((normalize_number(m) for m in models), model_bits))
+        self.part_index = {normalize_number(ps): i for i, ps in enumerate(part_numbers)}
+
+        # Transpose once so part -> models is also a single lookup
+        if part_columns is None:
+            part_columns = [[] for _ in part_numbers]
+            for column, bits in enumerate(model_bits):
+                for row in bit_positions(bits):
+                    part_columns[row].append(column)
+        self.part_bits = [bits_from_positions(columns) for columns in part_columns]
+
+    @classmethod
+    def from_parts(cls, parts):
+        """Build the matrix from part records"""
+        part_numbers = [part["part_number"] for part in parts]
+        models = []
+        columns = {}
+        rows = []
+        part_columns = []
+        for row, part in enumerate(parts):
+            part_columns.append([])
+            for model in part.get("compatible_models") or []:
+                key = normalize_number(model)
+                column = columns.get(key)
+                if column is None:
+                    column = columns[key] = len(models)
+                    models.append(model)
+                    rows.append([])
+                if not rows[column] or rows[column][-1] != row:
+                    rows[column].append(row)
+                    part_columns[row].append(column)
+        # Both directions straight from the lists: each bitset is built once
+        return cls(part_numbers, models, [bits_from_positions(column_rows) for column_rows in rows], part_columns)
+
+    @classmethod
+    def load(cls, path=MATRIX_FILE):
+        """Load a matrix written by save()"""
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get("version") != MATRIX_VERSION:
+            raise ValueError(f"{path} is not a version {MATRIX_VERSION} matrix")
+        return cls(data["parts"], data["models"], [int(bits, 16) for bits in data["model_bits"]])
+
+    def save(self, path=MATRIX_FILE):
+        """Write the matrix compactly and atomically (bitsets as hex)"""
+        write_matrix_data({
+            "version": MATRIX_VERSION,
+            "parts": self.part_numbers,
+            "models": self.models,
+            "model_bits": [format(self.model_bits[normalize_number(m)], 'x') for m in self.models],
+        }, path)
+
+    def parts_bits_for_model(self, model):
+        return self.model_bits.get(normalize_number(model), 0)
+
+    def models_bits_for_part(self, part_number):
+        row = self.part_index.get(normalize_number(part_number))
+        return 0 if row is None else self.part_bits[row]
+
+    def parts_for_model(self, model):
+        """Part numbers that fit a model"""
+        return [self.part_numbers[row] for row in bit_positions(self.parts_bits_for_model(model))]
+
+    def models_for_part(self, part_number):
+        """Models a part fits"""
+        return [self.models[column] for column in bit_positions(self.models_bits_for_part(part_number))]
+
+    def is_compatible(self, part_number, model):
+        """Whether a part fits a model"""
+        row = self.part_index.get(normalize_number(part_number))
+        return row is not None and bool(self.parts_bits_for_model(model) >> row & 1)
+
+    def check_many(self, pairs):
+        """Batch is_compatible over (part_number, model) pairs"""
+        return [self.is_compatible(part_number, model) for part_number, model in pairs]
+
+    def parts_for_all_models(self, models):
+        """Parts that fit every one of the given models"""
+        bits = -1
+        for model in models:
+            bits &= self.parts_bits_for_model(model)
+        return [] if bits == -1 else [self.part_numbers[row] for row in bit_positions(bits)]
+
+    def shared_models(self, *part_numbers):
+        """Models that every one of the given parts fits"""
+        bits = -1
+        for part_number in part_numbers:
+            bits &= self.models_bits_for_part(part_number)
+        return [] if bits == -1 else [self.models[column] for column in bit_positions(bits)]
+
+
+def write_matrix_data(data, path=MATRIX_FILE):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, separators=(',', ':'), ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def update_matrix_file(changes, part_count, path=MATRIX_FILE):
+    """
+    Patch the saved matrix for changed parts, given as (row, old_part,
+    new_part) with old_part None for an appended part. Only the bitsets of
+    models a part gained or lost are decoded and rewritten. Returns False,
+    writing nothing, if there is no saved matrix of `part_count` parts.
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return False
+    if data.get("version") != MATRIX_VERSION or len(data["parts"]) != part_count:
+        return False
+
+    models, model_bits = data["models"], data["model_bits"]
+    columns = {normalize_number(model): column for column, model in enumerate(models)}
+    touched = {}
+    for row, old, new in changes:
+        if old is None:
+            data["parts"].append(new["part_number"])
+            old = {}
+        before = {normalize_number(model) for model in old.get("compatible_models") or []}
+        after = {}
+        for model in new.get("compatible_models") or []:
+            after.setdefault(normalize_number(model), model)
+        for key in before - after.keys():
+            column = columns[key]
+            bits = touched[column] if column in touched else int(model_bits[column], 16)
+            touched[column] = bits & ~(1 << row)
+        for key in after.keys() - before:
+            column = columns.get(key)
+            if column is None:
+                column = columns[key] = len(models)
+                models.append(after[key])
+                model_bits.append("0")
+            bits = touched[column] if column in touched else int(model_bits[column], 16)
+            touched[column] = bits | (1 << row)
+    for column, bits in touched.items():
+        model_bits[column] = format(bits, 'x')
+
+    # A model no part fits any more has no column in a fresh build either
+    if "0" in model_bits:
+        kept = [column for column, bits in enumerate(model_bits) if bits != "0"]
+        data["models"] = [models[column] for column in kept]
+        data["model_bits"] = [model_bits[column] for column in kept]
+    write_matrix_data(data, path)
+    return True
+
+
+def build_matrix_file(seed_path=SEED_FILE, path=MATRIX_FILE):
+    """Rebuild the matrix file from the seed catalog; returns the matrix"""
+    with open(seed_path, 'r', encoding='utf-8') as f:
+        matrix = CompatMatrix.from_parts(json.load(f)["parts"])
+    matrix.save(path)
+    return matrix
+
+
+def main():
+    if len(sys.argv) > 1:
+        # python compat_matrix.py WDT780SAEM1 -> parts for a model
+        matrix = CompatMatrix.load()
+        print(json.dumps(matrix.parts_for_model(sys.argv[1])))
+        return
+
+    matrix = build_matrix_file()
+    print(f"✅ Wrote {len(matrix.part_numbers)} parts x {len(matrix.models)} models -> {MATRIX_FILE}")
+
+
+if __name__ == "__main__":
+    main()
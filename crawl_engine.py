@@ -0,0 +1,202 @@
+"""
+Async Crawl Engine
+Fetches pages concurrently with a per-host token-bucket rate limit and an
+adaptive (AIMD) per-host limit on requests in flight
+"""
+
+import asyncio
+import contextlib
+import time
+
+import aiohttp
+
+from adaptive_concurrency import INITIAL_LIMIT, AdaptiveLimit
+from fetch import (
+    DEFAULT_HEADERS, MAX_RETRIES, RATE_BURST, RATE_PER_HOST, RETRY_STATUSES, Page, backoff_delay, get_cache,
+    host_of, pool_size_for,
+)
+
+# Polite defaults: the sync fetch layer's per-host rate, at most 8 requests in
+# flight (the adaptive limit starts lower and finds how many the host tolerates)
+DEFAULT_RATE_PER_HOST = RATE_PER_HOST
+DEFAULT_BURST = RATE_BURST
+DEFAULT_CONCURRENCY = 8
+
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens per second, up to `burst` saved up"""
+
+    def __init__(self, rate, burst=1):
+        self.rate = float(rate)
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Wait until a token is available, then take it"""
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class CrawlEngine:
+    """
+    Shared aiohttp session with a global concurrency cap and one token bucket per host.
+
+    Requests are pipelined: a worker grabs the next URL as soon as a token is
+    free instead of waiting for earlier pages to be processed. `concurrency`
+    is a ceiling; each host's adaptive limit starts at `initial_concurrency`,
+    grows while responses stay fast and halves on 429 / 503 / timeouts.
+    """
+
+    def __init__(self, rate_per_host=DEFAULT_RATE_PER_HOST, burst=DEFAULT_BURST,
+                 concurrency=DEFAULT_CONCURRENCY, headers=None, timeout=15, cache=None, metrics=None,
+                 initial_concurrency=INITIAL_LIMIT):
+        self.rate_per_host = rate_per_host
+        self.burst = burst
+        self.concurrency = concurrency
+        self.initial_concurrency = initial_concurrency
+        self.headers = dict(DEFAULT_HEADERS if headers is None else headers)
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.cache = get_cache() if cache is None else cache
+        self.metrics = metrics
+        self.buckets = {}
+        self.limits = {}
+        self.slot_freed = {}
+        self.semaphore = None
+        self.session = None
+
+    async def __aenter__(self):
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+        connector = aiohttp.TCPConnector(limit=self.concurrency)
+        trace_configs = [self.metrics.trace_config()] if self.metrics else None
+        self.session = aiohttp.ClientSession(headers=self.headers, timeout=self.timeout,
+                                             connector=connector, trace_configs=trace_configs)
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.session.close()
+
+    def bucket_for(self, url):
+        """Get (or create) the token bucket for a URL's host"""
+        host = host_of(url)
+        if host not in self.buckets:
+            self.buckets[host] = TokenBucket(self.rate_per_host, self.burst)
+        return self.buckets[host]
+
+    def limit_for(self, url):
+        """Get (or create) the adaptive in-flight limit for a URL's host, capped at its pool size"""
+        host = host_of(url)
+        if host not in self.limits:
+            self.limits[host] = AdaptiveLimit(min(self.concurrency, pool_size_for(host)),
+                                              initial=self.initial_concurrency)
+            self.slot_freed[host] = asyncio.Condition()
+        return self.limits[host]
+
+    @contextlib.asynccontextmanager
+    async def host_slot(self, url):
+        """Hold one of the host's in-flight slots, waiting out any Retry-After pause"""
+        limit = self.limit_for(url)
+        slot_freed = self.slot_freed[host_of(url)]
+        async with slot_freed:
+            while True:
+                wait = limit.try_acquire()
+                if wait == 0:
+                    break
+                try:
+                    await asyncio.wait_for(slot_freed.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+        try:
+            yield limit
+        finally:
+            limit.release()
+            async with slot_freed:
+                slot_freed.notify_all()
+
+    async def fetch(self, url, conditional=True):
+        """
+        GET a URL under the rate limit, retrying 429/5xx with backoff, and return
+        a Page; conditional=False skips the cache's validators. The cache is
+        SQLite, so its reads and writes run in a worker thread, off the event loop.
+        """
+        headers = await asyncio.to_thread(self.cache.conditional_headers, url) if self.cache and conditional else {}
+        attempt = 0
+        while True:
+            async with self.semaphore, self.host_slot(url) as limit:
+                waited = time.perf_counter()
+                await self.bucket_for(url).acquire()
+                if self.metrics:
+                    self.metrics.observe("rate_limit", time.perf_counter() - waited)
+                try:
+                    started = time.perf_counter()
+                    async with self.session.get(url, headers=headers) as response:
+                        body_started = time.perf_counter()
+                        content = await response.read()
+                        page = Page(str(response.url), response.status, content, dict(response.headers))
+                except Exception as e:
+                    cut = limit.on_error(e)
+                    if self.metrics:
+                        self.metrics.count_error(e)
+                        if cut:
+                            self.metrics.count("concurrency_backoffs")
+                    raise
+                cut = limit.on_response(page.status, time.perf_counter() - started, page.headers.get('Retry-After'))
+                if self.metrics:
+                    if cut:
+                        self.metrics.count("concurrency_backoffs")
+                    self.metrics.observe("download", time.perf_counter() - body_started)
+                    self.metrics.count_status(page.status)
+
+            attempt += 1
+            if page.status not in RETRY_STATUSES or attempt > MAX_RETRIES:
+                page = await asyncio.to_thread(self.cache.revalidated, url, page) if self.cache else page
+                if page.status == 304 and conditional:
+                    # The cached body was evicted after the validators were sent
+                    return await self.fetch(url, conditional=False)
+                if self.metrics and page.from_cache:
+                    self.metrics.count("not_modified")
+                return page
+            if self.metrics:
+                self.metrics.count("retries")
+            await asyncio.sleep(backoff_delay(attempt, page.headers.get('Retry-After')))
+
+    async def crawl(self, items, handler):
+        """
+        Run `await handler(self, item)` for every item with at most `concurrency`
+        in flight, yielding results in completion order.
+        """
+        queue = asyncio.Queue()
+        for item in items:
+            queue.put_nowait(item)
+        # Bounded so a slow consumer holds back the fetchers
+        results = asyncio.Queue(maxsize=self.concurrency)
+
+        async def worker():
+            while True:
+                try:
+                    item = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                try:
+                    result = await handler(self, item)
+                except Exception as e:
+                    result = e
+                await results.put((item, result))
+
+        workers = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+        pending = queue.qsize()
+        try:
+            for _ in range(pending):
+                yield await results.get()
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
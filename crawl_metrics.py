@@ -0,0 +1,262 @@
+"""
+Crawl Metrics
+Per-stage latency histograms, response/error counters and throughput for a
+scraper run, exported as a Prometheus text file (.prom) or a JSON summary.
+
+Stages:
+  rate_limit  waiting for the per-host token bucket
+  dns         host name resolution            (aiohttp trace)
+  connect     TCP + TLS connection setup      (aiohttp trace)
+  ttfb        request sent -> response headers (aiohttp trace)
+  download    reading the response body
+  fetch       a whole synchronous request (requests-based scrapers)
+  parse       building the BeautifulSoup tree
+  extract     pulling part fields out of the tree
+"""
+
+import bisect
+import contextlib
+import cProfile
+import glob
+import json
+import os
+import pstats
+import threading
+import time
+from collections import Counter
+
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram (Prometheus layout)"""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q):
+        """Estimate a quantile by interpolating inside its bucket"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            if seen + bucket_count >= rank and bucket_count:
+                low = self.buckets[i - 1] if i else 0.0
+                high = min(self.buckets[i], self.max) if i < len(self.buckets) else self.max
+                return low + (high - low) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.max
+
+    def summary(self):
+        """Count plus mean / p50 / p90 / p99 / max in seconds"""
+        def rounded(value):
+            return None if value is None else round(value, 6)
+        return {
+            "count": self.count,
+            "mean": rounded(self.sum / self.count if self.count else None),
+            "p50": rounded(self.quantile(0.5)),
+            "p90": rounded(self.quantile(0.9)),
+            "p99": rounded(self.quantile(0.99)),
+            "max": rounded(self.max),
+        }
+
+
+class CrawlMetrics:
+    """Everything measured during one scraper run"""
+
+    def __init__(self, scraper):
+        self.scraper = scraper
+        self.started = time.time()
+        self.clock_start = time.perf_counter()
+        self.finished = None
+        self.stages = {}
+        self.statuses = Counter()
+        self.errors = Counter()
+        self.events = Counter()
+        # Threaded scrapers record from several threads at once
+        self.lock = threading.Lock()
+
+    def observe(self, stage, seconds):
+        """Record one duration for a stage"""
+        with self.lock:
+            histogram = self.stages.get(stage)
+            if histogram is None:
+                histogram = self.stages[stage] = Histogram()
+            histogram.observe(seconds)
+
+    def count_status(self, status):
+        """Count an HTTP response (every attempt, including retries)"""
+        with self.lock:
+            self.statuses[str(status)] += 1
+
+    def count_error(self, error):
+        """Count an exception by type instead of dropping it"""
+        with self.lock:
+            self.errors[type(error).__name__] += 1
+
+    def count(self, event, n=1):
+        """Count a named event (pages, failures, cache hits, ...)"""
+        with self.lock:
+            self.events[event] += n
+
+    def finish(self):
+        self.finished = time.perf_counter()
+
+    def elapsed(self):
+        return (self.finished or time.perf_counter()) - self.clock_start
+
+    def pages_per_second(self):
+        elapsed = self.elapsed()
+        return self.events["pages"] / elapsed if elapsed else 0.0
+
+    def trace_config(self):
+        """aiohttp TraceConfig feeding the dns / connect / ttfb stages"""
+        import aiohttp
+
+        trace = aiohttp.TraceConfig()
+
+        def started(name):
+            async def callback(session, ctx, params):
+                setattr(ctx, name, time.perf_counter())
+            return callback
+
+        def ended(name, stage):
+            async def callback(session, ctx, params):
+                start = getattr(ctx, name, None)
+                if start is not None:
+                    self.observe(stage, time.perf_counter() - start)
+            return callback
+
+        async def reused(session, ctx, params):
+            self.count("connections_reused")
+
+        trace.on_dns_resolvehost_start.append(started("dns_start"))
+        trace.on_dns_resolvehost_end.append(ended("dns_start", "dns"))
+        trace.on_connection_create_start.append(started("connect_start"))
+        trace.on_connection_create_end.append(ended("connect_start", "connect"))
+        trace.on_connection_reuseconn.append(reused)
+        # request_end fires once the response headers are in, before the body is read
+        trace.on_request_start.append(started("request_start"))
+        trace.on_request_end.append(ended("request_start", "ttfb"))
+        return trace
+
+    def summary(self):
+        """JSON-friendly summary of the run"""
+        return {
+            "scraper": self.scraper,
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+            "duration_seconds": round(self.elapsed(), 3),
+            "pages_per_second": round(self.pages_per_second(), 3),
+            "events": dict(self.events),
+            "responses_by_status": dict(self.statuses),
+            "errors_by_type": dict(self.errors),
+            "stages": {stage: histogram.summary() for stage, histogram in sorted(self.stages.items())},
+        }
+
+    def to_prometheus(self):
+        """Prometheus text exposition format (for a node_exporter textfile collector)"""
+        label = f'scraper="{self.scraper}"'
+        lines = [
+            "# HELP crawl_stage_seconds Time spent in each crawl stage",
+            "# TYPE crawl_stage_seconds histogram",
+        ]
+        for stage, histogram in sorted(self.stages.items()):
+            labels = f'{label},stage="{stage}"'
+            cumulative = 0
+            for bound, bucket_count in zip(histogram.buckets, histogram.counts):
+                cumulative += bucket_count
+                lines.append(f'crawl_stage_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'crawl_stage_seconds_bucket{{{labels},le="+Inf"}} {histogram.count}')
+            lines.append(f'crawl_stage_seconds_sum{{{labels}}} {histogram.sum:.6f}')
+            lines.append(f'crawl_stage_seconds_count{{{labels}}} {histogram.count}')
+
+        lines += ["# HELP crawl_responses_total HTTP responses by status",
+                  "# TYPE crawl_responses_total counter"]
+        lines += [f'crawl_responses_total{{{label},status="{status}"}} {n}'
+                  for status, n in sorted(self.statuses.items())]
+        lines += ["# HELP crawl_errors_total Exceptions by type",
+                  "# TYPE crawl_errors_total counter"]
+        lines += [f'crawl_errors_total{{{label},type="{name}"}} {n}'
+                  for name, n in sorted(self.errors.items())]
+        lines += ["# HELP crawl_events_total Pages, failures and other crawl events",
+                  "# TYPE crawl_events_total counter"]
+        lines += [f'crawl_events_total{{{label},event="{event}"}} {n}'
+                  for event, n in sorted(self.events.items())]
+        lines += ["# HELP crawl_pages_per_second Pages scraped per second over the run",
+                  "# TYPE crawl_pages_per_second gauge",
+                  f"crawl_pages_per_second{{{label}}} {self.pages_per_second():.6f}",
+                  "# HELP crawl_duration_seconds Wall time of the run",
+                  "# TYPE crawl_duration_seconds gauge",
+                  f"crawl_duration_seconds{{{label}}} {self.elapsed():.6f}"]
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        """Write Prometheus text if the path ends in .prom, otherwise a JSON summary"""
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            if path.endswith('.prom'):
+                f.write(self.to_prometheus())
+            else:
+                json.dump(self.summary(), f, indent=2)
+        os.replace(tmp_path, path)
+
+    def report_lines(self):
+        """Short human-readable summary for the end of a run"""
+        lines = [f"⏱️  {self.events['pages']} pages in {self.elapsed():.1f}s "
+                 f"({self.pages_per_second():.2f} pages/sec)"]
+        for stage, histogram in sorted(self.stages.items()):
+            stats = histogram.summary()
+            lines.append(f"   {stage:<10} n={stats['count']:<6} mean={stats['mean'] * 1000:8.1f}ms "
+                         f"p90={stats['p90'] * 1000:8.1f}ms max={stats['max'] * 1000:8.1f}ms")
+        if self.statuses:
+            lines.append("   HTTP: " + ", ".join(f"{status}={n}" for status, n in sorted(self.statuses.items())))
+        if self.errors:
+            lines.append("   Errors: " + ", ".join(f"{name}={n}" for name, n in self.errors.most_common()))
+        return lines
+
+
+# cProfile for the parse stage. Parsing runs in worker processes, so each
+# process profiles into its own file and merge_profiles() combines them.
+_profiler = None
+
+
+@contextlib.contextmanager
+def profiled(path):
+    """Profile a block into `path`.<pid> (no-op when path is None)"""
+    global _profiler
+    if path is None:
+        yield
+        return
+    if _profiler is None:
+        _profiler = cProfile.Profile()
+    _profiler.enable()
+    try:
+        yield
+    finally:
+        _profiler.disable()
+        _profiler.dump_stats(f"{path}.{os.getpid()}")
+
+
+def merge_profiles(path):
+    """Combine per-process profiles into `path`; returns the pstats.Stats or None"""
+    parts = glob.glob(f"{glob.escape(path)}.*")
+    if not parts:
+        return None
+    stats = pstats.Stats(*parts)
+    stats.dump_stats(path)
+    for part in parts:
+        os.remove(part)
+    return stats
@@ -0,0 +1,76 @@
+"""
+Two-Stage Crawl Pipeline
+Async I/O workers download raw pages into a bounded queue; a process pool
+turns the bytes into part dicts, so parsing is not serialized by the GIL.
+The caller owns the pool, so one set of worker processes serves every batch
+of a crawl.
+"""
+
+import asyncio
+import os
+from collections import namedtuple
+
+DEFAULT_PARSE_WORKERS = os.cpu_count() or 2
+DEFAULT_QUEUE_SIZE = 64
+
+_DONE = object()
+
+# A fetch stage returns Finished(result) when it already has the item's result
+# (e.g. an unchanged page); the item then skips the parse stage
+Finished = namedtuple("Finished", ["result"])
+
+
+async def run_pipeline(engine, pool, items, fetch_item, parse_item,
+                       parse_workers=DEFAULT_PARSE_WORKERS, queue_size=DEFAULT_QUEUE_SIZE):
+    """
+    Crawl `items` in two independently sized stages, yielding (item, result).
+
+    fetch_item(engine, item) -> (content, *args) or None   runs in the event loop
+    parse_item(content, item, *args) -> result              runs in `pool`, a
+                                                            ProcessPoolExecutor
+    parse_workers is how many parses are kept in flight; match the pool's size.
+
+    Items whose fetch returns None (or raises) are yielded with that value /
+    exception without touching the parse stage, as are Finished(result) values.
+    """
+    loop = asyncio.get_running_loop()
+    fetched = asyncio.Queue(maxsize=queue_size)
+    results = asyncio.Queue()
+
+    async def produce():
+        # The engine caps in-flight requests; the bounded queue applies
+        # backpressure when parsing falls behind
+        try:
+            async for item, raw in engine.crawl(items, fetch_item):
+                if isinstance(raw, Finished):
+                    await results.put((item, raw.result))
+                elif raw is None or isinstance(raw, Exception):
+                    await results.put((item, raw))
+                else:
+                    await fetched.put((item, raw))
+        finally:
+            for _ in range(parse_workers):
+                await fetched.put(_DONE)
+
+    async def consume():
+        while True:
+            entry = await fetched.get()
+            if entry is _DONE:
+                return
+            item, (content, *args) = entry
+            try:
+                result = await loop.run_in_executor(pool, parse_item, content, item, *args)
+            except Exception as e:
+                result = e
+            await results.put((item, result))
+
+    items = list(items)
+    tasks = [asyncio.create_task(produce())]
+    tasks += [asyncio.create_task(consume()) for _ in range(parse_workers)]
+    try:
+        for _ in range(len(items)):
+            yield await results.get()
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
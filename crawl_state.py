@@ -0,0 +1,135 @@
+"""
+Crawl State Store
+SQLite (WAL mode) record of every URL / part number in a crawl: pending,
+in progress, done, failed, or waiting to retry. Workers claim work from it,
+so an interrupted crawl resumes without repeating completed fetches.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+PENDING = "pending"
+IN_PROGRESS = "in_progress"
+DONE = "done"
+FAILED = "failed"
+RETRY_AFTER = "retry_after"
+
+# Transient failures are retried with exponential backoff, then given up on
+MAX_ATTEMPTS = 4
+RETRY_BASE_DELAY = 60
+
+
+class CrawlState:
+    """Persistent task table for one crawl"""
+
+    def __init__(self, path, fresh=False):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        if fresh:
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS tasks (
+                key TEXT PRIMARY KEY,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                retry_at REAL NOT NULL DEFAULT 0,
+                last_error TEXT,
+                updated REAL NOT NULL
+            )
+        """)
+        self.db.execute("CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status, retry_at)")
+
+    def add_many(self, items, key):
+        """Register tasks that are not already known; `key(item)` names each one"""
+        now = time.time()
+        rows = [(key(item), json.dumps(item), PENDING, now) for item in items]
+        with self.lock:
+            self.db.execute("BEGIN IMMEDIATE")
+            self.db.executemany(
+                "INSERT OR IGNORE INTO tasks (key, payload, status, updated) VALUES (?, ?, ?, ?)", rows)
+            self.db.execute("COMMIT")
+
+    def known(self, keys):
+        """The subset of `keys` that are already tasks"""
+        keys = list(keys)
+        found = set()
+        with self.lock:
+            # Stay under SQLite's bound-parameter limit
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                rows = self.db.execute(f"SELECT key FROM tasks WHERE key IN ({','.join('?' * len(chunk))})",
+                                       chunk).fetchall()
+                found.update(key for key, in rows)
+        return found
+
+    def release_stale(self):
+        """Return tasks left in progress by an interrupted run to the queue"""
+        with self.lock:
+            cursor = self.db.execute("UPDATE tasks SET status = ?, updated = ? WHERE status = ?",
+                                     (PENDING, time.time(), IN_PROGRESS))
+            return cursor.rowcount
+
+    def claim(self, limit):
+        """Atomically take up to `limit` due tasks; returns their payloads"""
+        now = time.time()
+        with self.lock:
+            self.db.execute("BEGIN IMMEDIATE")
+            rows = self.db.execute(
+                "SELECT key, payload FROM tasks WHERE status = ? OR (status = ? AND retry_at <= ?) "
+                "ORDER BY rowid LIMIT ?",
+                (PENDING, RETRY_AFTER, now, limit)).fetchall()
+            self.db.executemany("UPDATE tasks SET status = ?, updated = ? WHERE key = ?",
+                                [(IN_PROGRESS, now, key) for key, _ in rows])
+            self.db.execute("COMMIT")
+        return [json.loads(payload) for _, payload in rows]
+
+    def mark_done(self, key):
+        """Record a finished task"""
+        self.mark_done_many([key])
+
+    def mark_done_many(self, keys):
+        """Record many finished tasks in one transaction"""
+        now = time.time()
+        with self.lock:
+            self.db.execute("BEGIN IMMEDIATE")
+            self.db.executemany("UPDATE tasks SET status = ?, last_error = NULL, updated = ? WHERE key = ?",
+                                [(DONE, now, key) for key in keys])
+            self.db.execute("COMMIT")
+
+    def mark_failed(self, key, error, permanent=False):
+        """Record a failure: schedule a retry, or give up if permanent / out of attempts"""
+        now = time.time()
+        with self.lock:
+            row = self.db.execute("SELECT attempts FROM tasks WHERE key = ?", (key,)).fetchone()
+            attempts = (row[0] if row else 0) + 1
+            if permanent or attempts >= MAX_ATTEMPTS:
+                status, retry_at = FAILED, 0
+            else:
+                status, retry_at = RETRY_AFTER, now + RETRY_BASE_DELAY * (2 ** (attempts - 1))
+            self.db.execute(
+                "UPDATE tasks SET status = ?, attempts = ?, retry_at = ?, last_error = ?, updated = ? "
+                "WHERE key = ?",
+                (status, attempts, retry_at, str(error)[:500], now, key))
+        return status
+
+    def counts(self):
+        """Number of tasks in each status"""
+        with self.lock:
+            rows = self.db.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status").fetchall()
+        return dict(rows)
+
+    def close(self):
+        """Close the database"""
+        with self.lock:
+            self.db.close()
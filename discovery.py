@@ -0,0 +1,139 @@
+"""
+Part Discovery Crawler
+Breadth-first crawl from the category seed pages that follows pagination,
+brand and model links and hands every new PS number to the detail scraper.
+Both seen-sets live on disk: listing URLs are the crawl's own task table, and
+every PS number handed on is recorded in a second state store, so memory stays
+flat however large the site is and a resumed crawl does not repeat itself.
+"""
+
+import asyncio
+import os
+import re
+from urllib.parse import urljoin, urlsplit, urlunsplit
+
+from crawl_engine import CrawlEngine
+from crawl_state import CrawlState
+from part_sink import SCRAPED_DIR
+
+BASE_URL = "https://www.partselect.com"
+
+STATE_FILE = os.path.join(SCRAPED_DIR, "discovery.state.sqlite3")
+PARTS_FILE = os.path.join(SCRAPED_DIR, "discovery.parts.sqlite3")
+RATE_PER_HOST = 2.0
+MAX_CONCURRENCY = 8
+CLAIM_BATCH = 100
+MAX_DEPTH = 4
+
+HREF = re.compile(rb'href\s*=\s*["\']([^"\'#]+)', re.I)
+PART_LINK = re.compile(r'^/(PS\d{5,10})-([A-Za-z]+)-([A-Za-z0-9]+)(?:-[^/?]*)?\.htm$')
+PAGINATION = re.compile(r'[?&](start|page|p)=\d+', re.I)
+LISTING_PAGE = re.compile(r'^/(?:[A-Za-z]+-)?(Refrigerator|Dishwasher)-Parts\.htm$', re.I)
+MODEL_PAGE = re.compile(r'^/Models/[A-Za-z0-9-]+(?:/Parts)?/?$', re.I)
+
+
+def normalize_url(url):
+    """Canonical form for dedupe: lowercase scheme/host, no fragment"""
+    parts = urlsplit(url)
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or '/', parts.query, ''))
+
+
+def extract_links(content, page_url):
+    """Absolute same-site links on a page, via a cheap byte-level href scan"""
+    host = urlsplit(BASE_URL).netloc
+    links = []
+    for match in HREF.finditer(content):
+        href = match.group(1).decode('utf-8', 'ignore').strip()
+        url = urljoin(page_url, href)
+        if urlsplit(url).netloc.lower() == host:
+            links.append(url)
+    return links
+
+
+def classify_links(links, page):
+    """Split a page's links into part_info dicts and follow-up listing pages"""
+    parts = []
+    pages = []
+    for url in links:
+        split = urlsplit(url)
+        match = PART_LINK.match(split.path)
+        if match:
+            ps, brand, mfr = match.groups()
+            parts.append({"ps": ps, "mfr": mfr, "brand": brand, "type": page["type"]})
+            continue
+
+        listing = LISTING_PAGE.match(split.path)
+        if listing:
+            pages.append({"url": url, "type": listing.group(1).lower()})
+        elif PAGINATION.search(split.query) or MODEL_PAGE.match(split.path):
+            pages.append({"url": url, "type": page["type"]})
+    return parts, pages
+
+
+async def fetch_listing(engine, page):
+    return await engine.fetch(page["url"])
+
+
+async def discover(seeds, on_parts, fresh=False, max_depth=MAX_DEPTH, max_pages=None):
+    """
+    Crawl breadth-first from `seeds` ({appliance_type: [paths]}), calling
+    on_parts(list_of_part_info) with each batch of newly found parts.
+    The frontier lives in a CrawlState, so discovery is resumable; parts
+    handed on by an earlier run of the same crawl are not handed on again.
+    Returns (pages_crawled, parts_found).
+    """
+    state = CrawlState(STATE_FILE, fresh=fresh)
+    found = CrawlState(PARTS_FILE, fresh=fresh)
+    seed_pages = [{"url": normalize_url(urljoin(BASE_URL, path)), "type": appliance_type, "depth": 0}
+                  for appliance_type, paths in seeds.items() for path in paths]
+    state.add_many(seed_pages, key=lambda page: page["url"])
+    state.release_stale()
+
+    pages_crawled = 0
+    parts_found = 0
+
+    async with CrawlEngine(rate_per_host=RATE_PER_HOST, concurrency=MAX_CONCURRENCY) as engine:
+        while max_pages is None or pages_crawled < max_pages:
+            limit = CLAIM_BATCH if max_pages is None else min(CLAIM_BATCH, max_pages - pages_crawled)
+            batch = state.claim(limit)
+            if not batch:
+                break
+
+            async for page, result in engine.crawl(batch, fetch_listing):
+                pages_crawled += 1
+                if isinstance(result, Exception):
+                    state.mark_failed(page["url"], f"{type(result).__name__}: {result}")
+                    continue
+                if result.status != 200:
+                    state.mark_failed(page["url"], f"HTTP {result.status}",
+                                      permanent=result.status in (404, 410))
+                    continue
+
+                parts, pages = classify_links(extract_links(result.content, result.url), page)
+
+                known = found.known(part["ps"] for part in parts)
+                new_parts = list({part["ps"]: part for part in parts if part["ps"] not in known}.values())
+                if new_parts:
+                    parts_found += len(new_parts)
+                    on_parts(new_parts)
+                    found.add_many(new_parts, key=lambda part: part["ps"])
+
+                depth = page.get("depth", 0) + 1
+                if depth <= max_depth:
+                    for child in pages:
+                        child["url"] = normalize_url(child["url"])
+                        child["depth"] = depth
+                    # URLs already in the task table are ignored
+                    state.add_many(pages, key=lambda child: child["url"])
+
+                state.mark_done(page["url"])
+                print(f"🔎 {page['url']}: {len(new_parts)} new parts, {len(pages)} links")
+
+    state.close()
+    found.close()
+    return pages_crawled, parts_found
+
+
+def discover_parts(seeds, on_parts, **kwargs):
+    """Synchronous wrapper around discover()"""
+    return asyncio.run(discover(seeds, on_parts, **kwargs))
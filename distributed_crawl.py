@@ -0,0 +1,437 @@
+"""
+Sharded Crawl: Coordinator / Workers / Merge
+Splits the part-number space across N workers by consistent hashing. The
+coordinator puts each part on its shard's queue; each worker drains one shard
+with the comprehensive scraper's pipeline into its own output files; the
+merge step streams every shard's JSONL into the catalog.
+
+A queue directory holds everything:
+  ring.json                      shard count, queue backend, per-worker rate
+  shard-007.sqlite3 / shard-007/ the shard's queue (sqlite / file backend)
+  shard-007.jsonl                parts scraped by worker 7
+  shard-007.fingerprints.sqlite3, .changes.json, .changed.jsonl, .metrics.json, .urls.json
+
+Workers on several machines need the queue directory on shared storage; use
+the file backend there (SQLite locking is unreliable over NFS).
+
+Usage:
+  python distributed_crawl.py coordinate --shards 4 [--backend file] [--discover]
+  python distributed_crawl.py work --shard 2        # on any machine, once per shard
+  python distributed_crawl.py merge
+  python distributed_crawl.py run --shards 4        # all three, with local worker processes
+"""
+
+import argparse
+import asyncio
+import bisect
+import glob
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from urllib.parse import quote
+
+from catalog_merge import merge_catalog
+from crawl_metrics import CrawlMetrics
+from crawl_state import DONE, FAILED, IN_PROGRESS, MAX_ATTEMPTS, PENDING, RETRY_AFTER, RETRY_BASE_DELAY, CrawlState
+from fingerprints import FingerprintStore
+from part_sink import SCRAPED_DIR, SEED_FILE, JsonlSink, read_jsonl
+from scraper import CATEGORIES
+from scraper_comprehensive import KNOWN_PARTS, RATE_PER_HOST, URL_PATTERNS, crawl_parts
+from url_resolver import UrlResolver
+
+QUEUE_DIR = os.path.join(SCRAPED_DIR, "shards")
+RING_FILE = "ring.json"
+
+# Virtual nodes per shard: more points = more even split
+VNODES = 64
+
+
+def ring_hash(key):
+    return int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+class HashRing:
+    """
+    Consistent hash ring over shards 0..N-1. Growing from N to N+1 shards
+    moves only ~1/(N+1) of the keys, so most parts keep their shard (and its
+    fingerprints and JSONL) across re-crawls.
+    """
+
+    def __init__(self, shards, vnodes=VNODES):
+        points = sorted((ring_hash(f"shard-{shard}#{vnode}"), shard)
+                        for shard in range(shards) for vnode in range(vnodes))
+        self.shards = shards
+        self.hashes = [point for point, _ in points]
+        self.owners = [shard for _, shard in points]
+
+    def shard_for(self, key):
+        """Shard that owns a key: the first ring point clockwise of its hash"""
+        index = bisect.bisect(self.hashes, ring_hash(key)) % len(self.hashes)
+        return self.owners[index]
+
+
+def shard_prefix(queue_dir, shard):
+    return os.path.join(queue_dir, f"shard-{shard:03d}")
+
+
+class FileQueue:
+    """
+    Shard queue as a directory of task files, one per part, moved between
+    pending/, in_progress/, done/ and failed/ with os.rename. Renames are
+    atomic on one filesystem (NFS included), so only one worker can claim a
+    task. Same interface as CrawlState.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        for status in (PENDING, IN_PROGRESS, DONE, FAILED):
+            os.makedirs(os.path.join(path, status), exist_ok=True)
+        # Pending task file -> retry_at, for tasks claim() found not yet due
+        self.waiting = {}
+
+    def task_path(self, status, key):
+        return os.path.join(self.path, status, quote(key, safe='') + ".json")
+
+    def read_task(self, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def write_task(self, path, task):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(task, f)
+        os.replace(tmp_path, path)
+
+    def add_many(self, items, key):
+        """Register tasks that are not already known; `key(item)` names each one"""
+        for item in items:
+            name = key(item)
+            if self.known([name]):
+                continue
+            self.write_task(self.task_path(PENDING, name),
+                            {"key": name, "item": item, "attempts": 0, "retry_at": 0, "last_error": None})
+
+    def known(self, keys):
+        """The subset of `keys` that are already tasks"""
+        return {key for key in keys
+                if any(os.path.exists(self.task_path(status, key)) for status in (PENDING, IN_PROGRESS, DONE, FAILED))}
+
+    def release_stale(self):
+        """Return tasks left in progress by an interrupted worker to the queue"""
+        released = 0
+        for name in os.listdir(os.path.join(self.path, IN_PROGRESS)):
+            if name.endswith(".json"):
+                os.replace(os.path.join(self.path, IN_PROGRESS, name), os.path.join(self.path, PENDING, name))
+                released += 1
+        return released
+
+    def claim(self, limit):
+        """
+        Take up to `limit` due tasks; returns their payloads. Walks pending/
+        lazily and stops once it has enough, so a claim reads about `limit`
+        task files however long the queue is; tasks waiting out a retry are
+        read once and then skipped by name until they are due.
+        """
+        now = time.time()
+        claimed = []
+        with os.scandir(os.path.join(self.path, PENDING)) as entries:
+            for entry in entries:
+                if len(claimed) >= limit:
+                    break
+                name = entry.name
+                if not name.endswith(".json") or self.waiting.get(name, 0) > now:
+                    continue
+                try:
+                    task = self.read_task(entry.path)
+                    if task["retry_at"] > now:
+                        self.waiting[name] = task["retry_at"]
+                        continue
+                    os.rename(entry.path, os.path.join(self.path, IN_PROGRESS, name))
+                except FileNotFoundError:
+                    continue  # another worker got there first
+                self.waiting.pop(name, None)
+                claimed.append(task["item"])
+        return claimed
+
+    def mark_done(self, key):
+        """Record a finished task"""
+        for status in (IN_PROGRESS, PENDING):
+            try:
+                os.replace(self.task_path(status, key), self.task_path(DONE, key))
+                return
+            except FileNotFoundError:
+                continue
+
+    def mark_done_many(self, keys):
+        for key in keys:
+            self.mark_done(key)
+
+    def mark_failed(self, key, error, permanent=False):
+        """Record a failure: schedule a retry, or give up if permanent / out of attempts"""
+        source = self.task_path(IN_PROGRESS, key)
+        task = self.read_task(source)
+        task["attempts"] += 1
+        task["last_error"] = str(error)[:500]
+        if permanent or task["attempts"] >= MAX_ATTEMPTS:
+            status, destination = FAILED, FAILED
+        else:
+            status, destination = RETRY_AFTER, PENDING
+            task["retry_at"] = time.time() + RETRY_BASE_DELAY * (2 ** (task["attempts"] - 1))
+        self.write_task(source, task)
+        os.replace(source, self.task_path(destination, key))
+        return status
+
+    def counts(self):
+        """Number of tasks in each status"""
+        counts = {}
+        for status in (PENDING, IN_PROGRESS, DONE, FAILED):
+            names = [name for name in os.listdir(os.path.join(self.path, status)) if name.endswith(".json")]
+            total = len(names)
+            if status == PENDING:
+                # Failed-and-rescheduled tasks wait in pending/ with attempts > 0
+                waiting = sum(1 for name in names
+                              if self.read_task(os.path.join(self.path, PENDING, name))["attempts"])
+                if waiting:
+                    counts[RETRY_AFTER] = waiting
+                total -= waiting
+            if total:
+                counts[status] = total
+        return counts
+
+    def close(self):
+        pass
+
+
+# Queue backends: name -> (opener(queue_dir, shard), path of a shard's queue).
+# Anything with CrawlState's add_many / known / claim / mark_done / mark_failed /
+# counts interface fits.
+QUEUE_BACKENDS = {
+    "sqlite": (lambda queue_dir, shard: CrawlState(shard_prefix(queue_dir, shard) + ".sqlite3"),
+               lambda queue_dir, shard: shard_prefix(queue_dir, shard) + ".sqlite3"),
+    "file": (lambda queue_dir, shard: FileQueue(shard_prefix(queue_dir, shard)),
+             lambda queue_dir, shard: shard_prefix(queue_dir, shard)),
+}
+
+
+def open_queue(config, queue_dir, shard):
+    opener, _ = QUEUE_BACKENDS[config["backend"]]
+    return opener(queue_dir, shard)
+
+
+def queued_shards(queue_dir, config, keys):
+    """{key: shard} for the keys some shard of the ring already has a task for"""
+    _, queue_path = QUEUE_BACKENDS[config["backend"]]
+    placed = {}
+    for shard in range(config["shards"]):
+        if not os.path.exists(queue_path(queue_dir, shard)):
+            continue
+        queue = open_queue(config, queue_dir, shard)
+        placed.update(dict.fromkeys(queue.known(keys), shard))
+        queue.close()
+    return placed
+
+
+def load_ring(queue_dir):
+    with open(os.path.join(queue_dir, RING_FILE), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_ring(queue_dir, config):
+    os.makedirs(queue_dir, exist_ok=True)
+    path = os.path.join(queue_dir, RING_FILE)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(config, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def enqueue(queue_dir, config, parts):
+    """
+    Put each part on a shard's queue: the shard that already has it, else the
+    one that owns its PS number on the ring. Returns {shard: count}
+    """
+    ring = HashRing(config["shards"], config["vnodes"])
+    placed = queued_shards(queue_dir, config, [part["ps"] for part in parts])
+    by_shard = defaultdict(list)
+    for part in parts:
+        by_shard[placed.get(part["ps"], ring.shard_for(part["ps"]))].append(part)
+    for shard, items in by_shard.items():
+        queue = open_queue(config, queue_dir, shard)
+        queue.add_many(items, key=lambda part: part["ps"])
+        queue.close()
+    return {shard: len(items) for shard, items in sorted(by_shard.items())}
+
+
+def reset_queues(queue_dir):
+    """Forget every shard's queue and scraped JSONL (fingerprints and URL caches are kept)"""
+    for path in glob.glob(os.path.join(glob.escape(queue_dir), "shard-[0-9][0-9][0-9]*")):
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        elif path.endswith((".sqlite3", ".sqlite3-wal", ".sqlite3-shm", ".jsonl")) and ".fingerprints." not in path:
+            os.remove(path)
+
+
+def coordinate(queue_dir, shards, backend, rate=RATE_PER_HOST, parts=KNOWN_PARTS, fresh=False):
+    """
+    Write the ring config and enqueue `parts`. The site-wide request rate is
+    split evenly, so N workers together stay within `rate` requests/sec.
+    """
+    if fresh:
+        reset_queues(queue_dir)
+    if os.path.exists(os.path.join(queue_dir, RING_FILE)):
+        previous = load_ring(queue_dir)
+        if previous["backend"] != backend:
+            raise ValueError(f"{queue_dir} already uses the {previous['backend']} backend")
+        if previous["shards"] != shards:
+            # enqueue() leaves parts on the shard that already queued them (with
+            # its fingerprints and JSONL); new parts, and parts on shards past
+            # the new count (no worker drains those), follow the new ring
+            print(f"🔁 Re-sharding {previous['shards']} -> {shards} shards")
+    config = {"shards": shards, "vnodes": VNODES, "backend": backend, "rate_per_worker": rate / shards}
+    save_ring(queue_dir, config)
+    return config, enqueue(queue_dir, config, parts)
+
+
+def run_worker(queue_dir, shard):
+    """Drain one shard's queue into its own JSONL / fingerprint / metrics files; returns (scraped, failed)"""
+    config = load_ring(queue_dir)
+    prefix = shard_prefix(queue_dir, shard)
+    queue = open_queue(config, queue_dir, shard)
+    queue.release_stale()
+    fingerprints = FingerprintStore(prefix + ".fingerprints.sqlite3")
+    metrics = CrawlMetrics(f"comprehensive-shard-{shard}")
+    resolver = UrlResolver(URL_PATTERNS, path=prefix + ".urls.json")
+
+    with JsonlSink(prefix + ".jsonl") as sink:
+        queue.mark_done_many(sink.seen)
+        scraped, failed = asyncio.run(crawl_parts(queue, sink, fingerprints, metrics,
+                                                  rate=config["rate_per_worker"], resolver=resolver))
+    metrics.finish()
+    queue.close()
+    fingerprints.write_report(prefix + ".changes.json", prefix + ".changed.jsonl")
+    fingerprints.close()
+    metrics.write(prefix + ".metrics.json")
+    return scraped, failed
+
+
+def shard_outputs(queue_dir, suffix):
+    return sorted(glob.glob(os.path.join(glob.escape(queue_dir), f"shard-[0-9][0-9][0-9]{suffix}")))
+
+
+def merge_shards(queue_dir, output_path=SEED_FILE):
+    """
+    Merge every shard's JSONL into the catalog with catalog_merge's external sort,
+    and combine the shards' change reports into queue_dir/changes.json for
+    `python enhance_data.py --changes`. Returns (part_count, report).
+    """
+    count = merge_catalog(shard_outputs(queue_dir, ".jsonl"), output_path)
+
+    report = {"run_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "added": [], "changed": [], "removed": [],
+              "unchanged": 0, "reused_without_parsing": 0,
+              "changed_records": os.path.join(queue_dir, "changed.jsonl")}
+    with open(report["changed_records"] + ".tmp", 'w', encoding='utf-8') as out:
+        for path in shard_outputs(queue_dir, ".changes.json"):
+            with open(path, 'r', encoding='utf-8') as f:
+                shard_report = json.load(f)
+            for key in ("added", "changed", "removed"):
+                report[key] += shard_report[key]
+            report["unchanged"] += shard_report["unchanged"]
+            report["reused_without_parsing"] += shard_report["reused_without_parsing"]
+            for record in read_jsonl(shard_report["changed_records"]):
+                out.write(json.dumps(record, ensure_ascii=False) + '\n')
+    os.replace(report["changed_records"] + ".tmp", report["changed_records"])
+    for key in ("added", "changed", "removed"):
+        report[key].sort()
+    report_path = os.path.join(queue_dir, "changes.json")
+    with open(report_path + ".tmp", 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    os.replace(report_path + ".tmp", report_path)
+    return count, report
+
+
+def coordinate_command(args):
+    parts = list(KNOWN_PARTS)
+    if args.discover:
+        from discovery import discover_parts
+        print(f"🔎 Discovering parts from {sum(len(urls) for urls in CATEGORIES.values())} category pages...")
+        discover_parts(CATEGORIES, parts.extend, max_pages=args.max_pages)
+    try:
+        config, counts = coordinate(args.queue_dir, args.shards, args.backend, args.rate, parts, fresh=args.fresh)
+    except ValueError as e:
+        sys.exit(f"❌ {e}")
+    print(f"🧭 {len(parts)} parts over {config['shards']} shards ({config['backend']} queues in {args.queue_dir}), "
+          f"{config['rate_per_worker']:.2f} requests/sec per worker")
+    for shard, count in counts.items():
+        print(f"   shard {shard}: {count} parts")
+
+
+def work_command(args):
+    print(f"🛠️  Worker for shard {args.shard} of {load_ring(args.queue_dir)['shards']}")
+    scraped, failed = run_worker(args.queue_dir, args.shard)
+    print(f"✅ Shard {args.shard}: {scraped} scraped, {failed} failed -> {shard_prefix(args.queue_dir, args.shard)}.jsonl")
+
+
+def merge_command(args):
+    if not shard_outputs(args.queue_dir, ".jsonl"):
+        sys.exit(f"❌ No shard outputs in {args.queue_dir}; run the workers first")
+    count, report = merge_shards(args.queue_dir, args.output)
+    print(f"💾 Merged {len(shard_outputs(args.queue_dir, '.jsonl'))} shards: {count} parts -> {args.output}")
+    print(f"🧾 Changes: {len(report['added'])} added, {len(report['changed'])} changed, "
+          f"{len(report['removed'])} removed -> {os.path.join(args.queue_dir, 'changes.json')}")
+
+
+def run_command(args):
+    """Coordinator, one local worker process per shard, then merge"""
+    coordinate_command(args)
+    workers = [subprocess.Popen([sys.executable, os.path.abspath(__file__), 'work', '--shard', str(shard),
+                                 '--queue-dir', args.queue_dir])
+               for shard in range(args.shards)]
+    failed = [shard for shard, worker in enumerate(workers) if worker.wait() != 0]
+    if failed:
+        print(f"❌ Workers for shards {failed} exited with errors; re-run them with: "
+              f"python distributed_crawl.py work --shard N")
+    merge_command(args)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sharded coordinator / worker crawl of part pages")
+    parser.add_argument('--queue-dir', default=QUEUE_DIR, help="shared queue and output directory")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    def shard_options(command):
+        command.add_argument('--shards', type=int, default=4)
+        command.add_argument('--backend', choices=sorted(QUEUE_BACKENDS), default="sqlite")
+        command.add_argument('--rate', type=float, default=RATE_PER_HOST,
+                             help="total requests/sec across all workers (default: %(default)s)")
+        command.add_argument('--fresh', action='store_true',
+                             help="empty the shard queues and JSONL outputs and scrape every part again")
+        command.add_argument('--discover', action='store_true',
+                             help="crawl the category pages for more parts before enqueueing")
+        command.add_argument('--max-pages', type=int, default=None,
+                             help="stop discovery after this many listing pages")
+
+    shard_options(commands.add_parser('coordinate', help="shard the part list onto the queues"))
+    work = commands.add_parser('work', help="scrape every part on one shard's queue")
+    work.add_argument('--shard', type=int, required=True)
+    merge = commands.add_parser('merge', help="merge the shard outputs into the catalog")
+    merge.add_argument('--output', default=SEED_FILE)
+    run = commands.add_parser('run', help="coordinate, run every shard locally, then merge")
+    shard_options(run)
+    run.add_argument('--output', default=SEED_FILE)
+
+    # --queue-dir is accepted after the subcommand too
+    for command in (work, merge, run, commands.choices['coordinate']):
+        command.add_argument('--queue-dir', default=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    {"coordinate": coordinate_command, "work": work_command,
+     "merge": merge_command, "run": run_command}[args.command](args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,103 +1,248 @@
 """
 Enhance scraped data with realistic compatible models and better symptoms
+
+The overlays live in backend/data/overlays/ as one JSON file per field,
+keyed by part number. Generated lists (compatible models crawled from the
+model pages by model_crawler.py) are then added to what the part records and
+overlays already hold. Changed part records (e.g. a scraper's JSONL stream)
+are patched into seedParts.json with the overlays applied; the catalog is only rewritten when a record actually
+changed. A derived file is left alone when none of the fields it is built
+from changed, and the lookup index and compatibility matrix are patched for
+just the changed parts unless parts were removed.
+
+Usage:
+  python enhance_data.py                     # re-apply overlays to the whole catalog
+  python enhance_data.py changed.jsonl ...   # merge changed/new records
+  python enhance_data.py --changes backend/data/scraped/changes.json
+                                             # apply a scraper run's change report
 """
 
+import argparse
 import json
+import os
+
+from build_index import INDEX_FILE, build_index, load_index, update_index, write_index
+from catalog_format import CATALOG_FILE, FIELDS as CATALOG_FIELDS, write_catalog_file
+from compat_matrix import MATRIX_FILE, CompatMatrix, update_matrix_file
+from part_sink import SCRAPED_DIR, SEED_FILE, read_jsonl, write_catalog
+from symptom_search import FIELD_WEIGHTS, SEARCH_INDEX_FILE, build_search_index, write_search_index
 
-# Load existing scraped data
-with open('backend/data/seedParts.json', 'r') as f:
-    data = json.load(f)
-
-# Model compatibility database based on actual part compatibility
-MODEL_DATABASE = {
-    "PS11752778": ["WDT780SAEM1", "WRS325SDHZ", "MFI2570FEZ", "ED5FHEXVB00", "WRF555SDFZ", "WRS571CIHZ"],
-    "PS11739119": ["WRS325SDHZ", "WRF555SDFZ", "MFI2570FEZ", "ED5FHEXVB00", "WRS571CIHZ"],
-    "PS11755972": ["WRS325SDHZ", "WRF555SDFZ", "MFI2570FEZ", "ED5FHEXVB00"],
-    "PS11755766": ["WRS325SDHZ", "WRF555SDFZ", "MFI2570FEZ", "ED5FHEXVB00"],
-    "PS11755774": ["WRS325SDHZ", "WRF555SDFZ", "MFI2570FEZ"],
-    "PS2366063": ["WRS325SDHZ", "MFI2570FEZ", "WRF555SDFZ"],
-    "PS11739697": ["WRS325SDHZ", "WRF555SDFZ", "ED5FHEXVB00"],
-    "PS12745711": ["GFE28GMKES", "GNE27JMMES", "PFE28KSKSS", "GFE28GBLTS"],
-    "PS12745712": ["GFE28GMKES", "GNE27JMMES", "PFE28KSKSS"],
-    "PS11756119": ["WDT750SAHZ0", "WDF520PADM7", "KDFE104HPS0", "WDT730PAHZ0"],
-    "PS11756074": ["WDT750SAHZ0", "WDF520PADM7", "KDFE104HPS0"],
-    "PS11722229": ["GDT695SSJSS", "GDT665SSNSS", "GDF640HSDSS", "GDT535PGJBB"],
-    "PS11722254": ["GDT695SSJSS", "GDF640HSDSS", "GDT665SSNSS"],
-    "PS11722237": ["GDT695SSJSS", "GDF640HSDSS", "GDT665SSNSS", "GDF510PSMSS"],
-    "PS11722244": ["GDT695SSJSS", "GDF640HSDSS", "GDT665SSNSS"],
-    "PS11722252": ["GDT695SSJSS", "GDF640HSDSS", "GDT665SSNSS"],
-    "PS11756093": ["WDT750SAHZ0", "KDFE104HPS0", "WDF520PADM7"],
-    "PS12583750": ["WRS325SDHZ", "WRF555SDFZ", "MFI2570FEZ"],
-    "PS11739091": ["WRS325SDHZ", "WRF555SDFZ", "ED5FHEXVB00"],
+OVERLAY_DIR = "backend/data/overlays"
+
+# Part field -> overlay file that replaces it
+OVERLAYS = {
+    "compatible_models": "models.json",   # model compatibility based on actual part compatibility
+    "symptoms_fixed": "symptoms.json",    # enhanced symptoms for each part
+    "description": "descriptions.json",   # enhanced descriptions
 }
 
-# Enhanced symptoms for each part type
-ENHANCED_SYMPTOMS = {
-    "PS11752778": ["ice maker not working", "no ice production", "ice maker stopped making ice", "ice cubes not dispensing"],
-    "PS11739119": ["broken drawer", "drawer won't slide", "cracked crisper drawer", "drawer damaged"],
-    "PS11755972": ["refrigerator not cooling", "freezer not cold enough", "loud fan noise", "frost buildup in freezer"],
-    "PS11755766": ["no water to ice maker", "water dispenser not working", "slow water flow", "water leaking"],
-    "PS11755774": ["refrigerator too warm", "temperature fluctuations", "inconsistent cooling", "compressor running constantly"],
-    "PS2366063": ["ice maker overfilling", "ice bin overflowing", "ice maker won't stop making ice"],
-    "PS11739697": ["broken shelf", "cracked glass shelf", "shelf not holding weight"],
-    "PS12745711": ["bad tasting water", "cloudy water", "slow water dispenser", "filter indicator light on"],
-    "PS12745712": ["bad tasting water", "filter needs replacement", "reduced water flow"],
-    "PS11756119": ["dishes not cleaning properly", "poor wash performance", "spray arm not spinning"],
-    "PS11756074": ["dishwasher not washing", "no water circulation", "poor cleaning performance"],
-    "PS11722229": ["dishwasher not draining", "dishwasher not washing", "loud grinding noise", "no water circulation"],
-    "PS11722254": ["door won't latch", "dishwasher won't start", "door pops open during cycle"],
-    "PS11722237": ["detergent dispenser not opening", "soap not dispensing", "dispenser door broken"],
-    "PS11722244": ["dishes not drying", "dishwasher not heating", "poor drying performance"],
-    "PS11722252": ["dishwasher won't start", "control panel not working", "buttons not responding"],
-    "PS11756093": ["rack won't adjust", "upper rack stuck", "rack adjuster broken"],
-    "PS12583750": ["ice smells bad", "ice maker needs cleaning", "buildup in ice maker"],
-    "PS11739091": ["broken door bin", "door shelf cracked", "bin won't stay in place"],
+# Part field -> generated {part_number: [values]} file whose values are added
+# to the field after the overlays (existing values keep their order)
+ADDITIONS = {
+    "compatible_models": os.path.join(SCRAPED_DIR, "partModels.json"),  # model_crawler.py
 }
 
-# Enhanced descriptions
-ENHANCED_DESCRIPTIONS = {
-    "PS11752778": "OEM Whirlpool ice maker assembly. Complete replacement unit for refrigerators with automatic ice makers. Includes mounting hardware and wire harness connector.",
-    "PS11739119": "Refrigerator crisper drawer with humidity control for Whirlpool refrigerators. Helps keep vegetables and fruits fresh. Direct OEM replacement for damaged or broken drawers.",
-    "PS11755972": "Evaporator fan motor for Whirlpool refrigerators. Circulates cold air throughout the refrigerator and freezer compartments. Includes mounting bracket.",
-    "PS11755766": "Water inlet valve for Whirlpool refrigerators. Controls water flow to ice maker and dispenser. Dual solenoid design for ice and water.",
-    "PS11755774": "Temperature sensor thermistor for Whirlpool refrigerators. Monitors compartment temperature and signals the control board for optimal cooling.",
-    "PS2366063": "Ice level control board for Whirlpool refrigerators. Controls ice production and prevents overfilling. Includes optical sensor and mounting hardware.",
-    "PS11739697": "Cantilever shelf with tempered glass for Whirlpool refrigerators. Provides adjustable storage space. Easy snap-in installation.",
-    "PS12745711": "Genuine GE refrigerator water filter. NSF certified to reduce 99% of contaminants including lead, cyst, and chlorine. Replace every 6 months.",
-    "PS12745712": "Genuine GE refrigerator water filter replacement cartridge. Advanced filtration system removes impurities and improves water taste. 6-month lifespan.",
-    "PS11756119": "Lower spray arm assembly for Whirlpool and KitchenAid dishwashers. Features optimized spray pattern for better cleaning coverage. Direct OEM replacement.",
-    "PS11756074": "Circulation pump assembly for Whirlpool and KitchenAid dishwashers. Provides water pressure for spray arms. Quiet operation and reliable performance.",
-    "PS11722229": "Complete pump and motor assembly for GE dishwashers. Includes circulation pump, drain pump, and motor. Professional installation recommended.",
-    "PS11722254": "Door latch and strike assembly for GE dishwashers. Includes latch mechanism, strike, and mounting hardware. Ensures proper door closure.",
-    "PS11722237": "Detergent dispenser assembly with rinse aid compartment for GE dishwashers. Includes actuator and spring mechanism for timed release.",
-    "PS11722244": "Genuine GE heating element for dishwashers. Heats water during wash and dry cycles. 1800W element ensures proper sanitization and drying.",
-    "PS11722252": "Electronic control board for GE dishwashers. Controls all dishwasher functions including cycles, temperature, and timing. Pre-programmed and ready to install.",
-    "PS11756093": "Upper rack position adjuster kit for Whirlpool and KitchenAid dishwashers. Allows easy height adjustment to accommodate tall items. Set of 2 adjusters.",
-    "PS12583750": "Affresh ice machine cleaner tablets for refrigerator ice makers. Removes mineral buildup and odors. Safe for all ice maker types.",
-    "PS11739091": "Door shelf bin for Whirlpool refrigerator fresh food compartment. Clear plastic design with durable construction. Snap-in installation.",
+# Derived file -> part fields it is built from; a change to none of them leaves the file as it is
+DERIVED_FIELDS = {
+    INDEX_FILE: {"part_number", "compatible_models", "symptoms_fixed"},
+    CATALOG_FILE: {field for field, _ in CATALOG_FIELDS},
+    MATRIX_FILE: {"part_number", "compatible_models"},
+    SEARCH_INDEX_FILE: {"part_number"} | set(FIELD_WEIGHTS),
 }
 
-# Enhance each part
-for part in data['parts']:
-    part_number = part['part_number']
-    
-    # Add realistic compatible models
-    if part_number in MODEL_DATABASE:
-        part['compatible_models'] = MODEL_DATABASE[part_number]
-    
-    # Enhance symptoms
-    if part_number in ENHANCED_SYMPTOMS:
-        part['symptoms_fixed'] = ENHANCED_SYMPTOMS[part_number]
-    
-    # Enhance description
-    if part_number in ENHANCED_DESCRIPTIONS:
-        part['description'] = ENHANCED_DESCRIPTIONS[part_number]
-
-# Save enhanced data
-with open('backend/data/seedParts.json', 'w') as f:
-    json.dump(data, f, indent=2)
-
-print(f"✅ Enhanced {len(data['parts'])} parts with realistic model compatibility and symptoms")
-print(f"📊 Sample part: {data['parts'][0]['name']}")
-print(f"   Models: {', '.join(data['parts'][0]['compatible_models'][:3])}")
-print(f"   Symptoms: {', '.join(data['parts'][0]['symptoms_fixed'][:2])}")
+
+def load_overlays(directory=OVERLAY_DIR):
+    """{field: {part_number: value}} for every overlay file present"""
+    overlays = {}
+    for field, filename in OVERLAYS.items():
+        path = os.path.join(directory, filename)
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                overlays[field] = json.load(f)
+    return overlays
+
+
+def load_additions(files=None):
+    """{field: {part_number: values}} for every generated additions file present"""
+    additions = {}
+    for field, path in (ADDITIONS if files is None else files).items():
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                additions[field] = json.load(f)
+    return additions
+
+
+def enhance_part(part, overlays, additions=None):
+    """Copy of a part record with its overlay values applied and additions merged in"""
+    enhanced = dict(part)
+    for field, values in overlays.items():
+        if part["part_number"] in values:
+            enhanced[field] = values[part["part_number"]]
+    for field, values in (additions or {}).items():
+        extra = values.get(part["part_number"])
+        if extra:
+            current = list(enhanced.get(field) or [])
+            present = set(current)
+            enhanced[field] = current + [value for value in extra if value not in present]
+    return enhanced
+
+
+def load_catalog(seed_path=SEED_FILE):
+    with open(seed_path, 'r', encoding='utf-8') as f:
+        return json.load(f)["parts"]
+
+
+def enhance_changed(changed, seed_path=SEED_FILE, overlays=None, removed=(), additions=None):
+    """
+    Patch a stream of changed part records into the catalog with overlays
+    applied. New part numbers are appended, existing ones replaced in place,
+    and `removed` part numbers dropped. Returns (parts, added, updated, deleted);
+    nothing is written if all three are zero, and derived files are updated
+    for just what changed.
+    """
+    overlays = load_overlays() if overlays is None else overlays
+    additions = load_additions() if additions is None else additions
+    removed = set(removed)
+    parts = load_catalog(seed_path)
+    kept = [part for part in parts if part["part_number"] not in removed]
+    deleted = len(parts) - len(kept)
+    parts = kept
+    positions = {part["part_number"]: position for position, part in enumerate(parts)}
+    part_count = len(parts)
+    changes = []
+    added = updated = 0
+
+    for record in changed:
+        enhanced = enhance_part(record, overlays, additions)
+        position = positions.get(enhanced["part_number"])
+        if position is None:
+            positions[enhanced["part_number"]] = len(parts)
+            changes.append((len(parts), None, enhanced))
+            parts.append(enhanced)
+            added += 1
+        elif parts[position] != enhanced:
+            changes.append((position, parts[position], enhanced))
+            parts[position] = enhanced
+            updated += 1
+
+    if deleted:
+        # Removing parts shifts every later position; nothing can be patched
+        write_catalog(parts, seed_path)
+        rebuild_derived(parts)
+    elif changes:
+        write_catalog(parts, seed_path)
+        update_derived(parts, changes, part_count)
+    return parts, added, updated, deleted
+
+
+def changed_fields(changes):
+    """Fields that differ between the old and new records (all of an appended part's fields)"""
+    fields = set()
+    for _, old, new in changes:
+        if old is None:
+            fields.update(new)
+        else:
+            fields.update(field for field in old.keys() | new.keys() if old.get(field) != new.get(field))
+    return fields
+
+
+def update_derived(parts, changes, part_count):
+    """
+    Bring the derived files up to date after `changes` ((position, old_part,
+    new_part), see enhance_changed) to a catalog that had `part_count` parts.
+    Files whose fields did not change are skipped, the index and matrix are
+    patched in place, and catalog.bin and the BM25 index (whose scores
+    depend on every document) are rebuilt.
+    """
+    fields = changed_fields(changes)
+    affected = [path for path, sources in DERIVED_FIELDS.items() if fields & sources]
+    for path in DERIVED_FIELDS:
+        if path not in affected:
+            print(f"⏭️  Kept {path}: no {', '.join(sorted(DERIVED_FIELDS[path]))} changes")
+
+    if INDEX_FILE in affected:
+        index = load_index()
+        if index and index["part_count"] == part_count:
+            write_index(update_index(index, changes))
+            print(f"🗂️  Patched {INDEX_FILE} for {len(changes)} changed parts")
+        else:
+            write_index(build_index(parts))
+            print(f"🗂️  Rebuilt {INDEX_FILE}")
+
+    if CATALOG_FILE in affected:
+        catalog_size = write_catalog_file(parts)
+        print(f"📦 Wrote {CATALOG_FILE} ({catalog_size / 1024:.1f} KB)")
+
+    if MATRIX_FILE in affected:
+        if update_matrix_file(changes, part_count):
+            print(f"🔗 Patched {MATRIX_FILE} for {len(changes)} changed parts")
+        else:
+            CompatMatrix.from_parts(parts).save()
+            print(f"🔗 Rebuilt {MATRIX_FILE}")
+
+    if SEARCH_INDEX_FILE in affected:
+        search_index = build_search_index(parts)
+        write_search_index(search_index)
+        print(f"🔍 Wrote {SEARCH_INDEX_FILE}: {len(search_index['terms'])} terms")
+
+
+def rebuild_derived(parts):
+    """Rewrite every file the backend and tools derive from seedParts.json"""
+    # Lookup indexes the backend loads alongside the catalog
+    index = build_index(parts)
+    write_index(index)
+    print(f"🗂️  Rebuilt {INDEX_FILE}: {len(index['models'])} models, {len(index['symptom_tokens'])} symptom tokens")
+
+    # Compact binary copy of the catalog for readers that look up single parts
+    catalog_size = write_catalog_file(parts)
+    print(f"📦 Wrote {CATALOG_FILE} ({catalog_size / 1024:.1f} KB)")
+
+    # Part x model bitsets for bulk compatibility queries
+    matrix = CompatMatrix.from_parts(parts)
+    matrix.save()
+    print(f"🔗 Wrote {MATRIX_FILE}: {len(matrix.part_numbers)} parts x {len(matrix.models)} models")
+
+    # Ranked full-text search over names, descriptions and symptoms
+    search_index = build_search_index(parts)
+    write_search_index(search_index)
+    print(f"🔍 Wrote {SEARCH_INDEX_FILE}: {len(search_index['terms'])} terms")
+
+
+def changed_records(paths):
+    for path in paths:
+        yield from read_jsonl(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply the overlays in backend/data/overlays to the catalog")
+    parser.add_argument('changed', nargs='*',
+                        help="JSONL files of changed part records (default: every part in the catalog)")
+    parser.add_argument('--changes', metavar='REPORT',
+                        help="change report from scraper_comprehensive.py: merge its changed "
+                             "records and drop its removed parts")
+    args = parser.parse_args()
+
+    removed = []
+    paths = list(args.changed)
+    if args.changes:
+        with open(args.changes, 'r', encoding='utf-8') as f:
+            report = json.load(f)
+        removed = report["removed"]
+        paths.append(report["changed_records"])
+
+    changed = changed_records(paths) if paths else load_catalog()
+    parts, added, updated, deleted = enhance_changed(changed, removed=removed)
+
+    if not (added or updated or deleted):
+        print(f"✅ No changes: {len(parts)} parts already enhanced")
+        return
+
+    print(f"✅ Enhanced {len(parts)} parts with realistic model compatibility and symptoms "
+          f"({added} added, {updated} updated, {deleted} removed)")
+    print(f"📊 Sample part: {parts[0]['name']}")
+    print(f"   Models: {', '.join(parts[0].get('compatible_models', [])[:3])}")
+    print(f"   Symptoms: {', '.join(parts[0].get('symptoms_fixed', [])[:2])}")
+
+
+if __name__ == "__main__":
+    main()
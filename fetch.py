@@ -0,0 +1,218 @@
+"""
+Shared HTTP Fetch Layer
+One pooled, keep-alive session used by every scraper
+"""
+
+import threading
+import time
+from collections import namedtuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from adaptive_concurrency import BACKOFF_STATUSES, AdaptiveLimit
+from http_cache import HttpCache
+
+# Only advertise brotli when we can decode it
+try:
+    import brotli  # noqa: F401
+    ACCEPT_ENCODING = 'gzip, deflate, br'
+except ImportError:
+    ACCEPT_ENCODING = 'gzip, deflate'
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+    'Accept-Encoding': ACCEPT_ENCODING,
+}
+
+# Retry policy shared by the sync session and the async crawl engine
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+MAX_RETRIES = 3
+BACKOFF_FACTOR = 0.5
+
+# Connection pool size per host; hosts not listed get DEFAULT_POOL_SIZE
+DEFAULT_POOL_SIZE = 10
+HOST_POOL_SIZES = {
+    "www.partselect.com": 16,
+}
+
+# Conditional-GET response cache; set False to always download in full
+CACHE_ENABLED = True
+
+# Adaptive (AIMD) cap on requests in flight per host, up to the host's pool
+# size; set False to let callers run as many concurrent requests as they like
+ADAPTIVE_CONCURRENCY = True
+
+# Requests/sec per host, shared by every thread, with up to RATE_BURST saved
+# up; the async crawl engine's defaults. None turns the sync rate limit off.
+RATE_PER_HOST = 2.0
+RATE_BURST = 2
+
+Page = namedtuple("Page", ["url", "status", "content", "headers", "from_cache"], defaults=(False,))
+
+_session = None
+_cache = None
+_limits = {}
+_buckets = {}
+_session_lock = threading.Lock()
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: `rate` tokens per second, up to `burst` saved up.
+    A caller reserves its token straight away and sleeps off any debt, so
+    waiting threads are served in arrival order. crawl_engine.TokenBucket is
+    the asyncio version.
+    """
+
+    def __init__(self, rate, burst=1):
+        self.rate = float(rate)
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until this caller's token is due"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate) - 1
+            self.updated = now
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0
+        if wait:
+            time.sleep(wait)
+
+
+def backoff_delay(attempt, retry_after=None):
+    """Seconds to wait before retry number `attempt` (1-based)"""
+    if retry_after:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            pass
+    return BACKOFF_FACTOR * (2 ** (attempt - 1))
+
+
+def pool_size_for(host):
+    """Connection pool size for a host"""
+    return HOST_POOL_SIZES.get(host, DEFAULT_POOL_SIZE)
+
+
+def build_session():
+    """Create a session with pooled adapters, retries and shared headers"""
+    session = requests.Session()
+    session.headers.update(DEFAULT_HEADERS)
+
+    retry = Retry(
+        total=MAX_RETRIES,
+        backoff_factor=BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(['GET', 'HEAD']),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+
+    default_adapter = HTTPAdapter(pool_connections=len(HOST_POOL_SIZES) + 1,
+                                  pool_maxsize=DEFAULT_POOL_SIZE, max_retries=retry)
+    session.mount('http://', default_adapter)
+    session.mount('https://', default_adapter)
+
+    # Dedicated pools for the hosts we crawl heavily
+    for host, size in HOST_POOL_SIZES.items():
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=size, max_retries=retry)
+        session.mount(f'https://{host}/', adapter)
+        session.mount(f'http://{host}/', adapter)
+
+    return session
+
+
+def get_session():
+    """Get the process-wide shared session"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = build_session()
+    return _session
+
+
+def get_cache():
+    """Get the process-wide response cache (None when caching is disabled)"""
+    global _cache
+    if CACHE_ENABLED and _cache is None:
+        with _session_lock:
+            if _cache is None:
+                _cache = HttpCache()
+    return _cache if CACHE_ENABLED else None
+
+
+def limit_for(host):
+    """Process-wide adaptive concurrency limit for a host"""
+    with _session_lock:
+        if host not in _limits:
+            _limits[host] = AdaptiveLimit(pool_size_for(host))
+        return _limits[host]
+
+
+def bucket_for(host):
+    """Process-wide token bucket for a host (None when the rate limit is off)"""
+    if RATE_PER_HOST is None:
+        return None
+    with _session_lock:
+        if host not in _buckets:
+            _buckets[host] = TokenBucket(RATE_PER_HOST, RATE_BURST)
+        return _buckets[host]
+
+
+def report_response(limit, response, elapsed):
+    """Feed a response to its host's limit, including any 429/503 urllib3 already retried"""
+    retries = getattr(response.raw, 'retries', None)
+    history = retries.history if retries else ()
+    if any(attempt.status in BACKOFF_STATUSES for attempt in history):
+        limit.backoff()
+    # A retried request's time includes the backoff sleeps, so it says nothing about latency
+    limit.on_response(response.status_code, None if history else elapsed, response.headers.get('Retry-After'))
+
+
+def fetch(url, headers=None, timeout=15, conditional=True):
+    """GET a URL through the shared session and return a Page; conditional=False skips the cache's validators"""
+    cache = get_cache()
+    request_headers = dict(headers or {})
+    if cache and conditional:
+        request_headers.update(cache.conditional_headers(url))
+
+    bucket = bucket_for(host_of(url))
+    if bucket:
+        bucket.acquire()
+    limit = limit_for(host_of(url)) if ADAPTIVE_CONCURRENCY else None
+    if limit:
+        limit.acquire()
+    try:
+        start = time.perf_counter()
+        response = get_session().get(url, headers=request_headers, timeout=timeout)
+        if limit:
+            report_response(limit, response, time.perf_counter() - start)
+    except Exception as e:
+        if limit:
+            limit.on_error(e)
+        raise
+    finally:
+        if limit:
+            limit.release()
+    page = Page(response.url, response.status_code, response.content, dict(response.headers))
+
+    if cache:
+        page = cache.revalidated(url, page)
+        if page.status == 304 and conditional:
+            # The cached body was evicted after the validators were sent
+            return fetch(url, headers, timeout, conditional=False)
+    return page
+
+
+def host_of(url):
+    """Host part of a URL"""
+    return urlsplit(url).netloc
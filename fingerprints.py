@@ -0,0 +1,189 @@
+"""
+Page Fingerprint Store
+Remembers a hash of the part-relevant bytes of each part page alongside the
+part dict built from them. When a re-crawled page hashes the same, the stored
+dict is reused and the page is never parsed. Navigation, footer, reviews and
+other chrome that changes between visits are left out of the hash. Each run's outcome is summarized in a change
+report (added / changed / removed / unchanged parts).
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from part_sink import SCRAPED_DIR
+from structured_data import JSON_LD, OG_PRICE, tag_value
+
+STORE_FILE = os.path.join(SCRAPED_DIR, "fingerprints.sqlite3")
+REPORT_FILE = os.path.join(SCRAPED_DIR, "changes.json")
+CHANGED_FILE = os.path.join(SCRAPED_DIR, "changed.jsonl")
+
+# Bump when the extractors change, so every stored dict is rebuilt once
+FINGERPRINT_VERSION = 2
+
+# Markup that changes between visits without changing the part: scripts,
+# styles, comments and hidden form fields (CSRF tokens, view state)
+VOLATILE = re.compile(
+    rb'<script\b.*?</script\s*>|<style\b.*?</style\s*>|<!--.*?-->|<input\b[^>]*\btype\s*=\s*["\']?hidden[^>]*>',
+    re.S | re.I,
+)
+WHITESPACE = re.compile(rb'\s+')
+
+# The part's own region runs from its <h1> (the name) to the footer; before it
+# only the <title> and structured data reach the parser. Matched against the
+# page lowercased once, like structured_data.
+REGION_START = re.compile(rb'<h1\b')
+REGION_END = re.compile(rb'<footer\b')
+TITLE = re.compile(rb'<title\b[^>]*>.*?</title\s*>', re.S)
+# Blocks inside the region that no extractor reads: reviews, Q&A, recommendations
+NOISE_BLOCK = re.compile(
+    rb'<(div|section|ul)\b[^>]*\bclass\s*=\s*["\'][^"\']*(?:review|question|qna|recommend|related)[^"\']*["\'][^>]*>')
+BLOCK_TAGS = {name: re.compile(rb'<(/?)' + name + rb'\b') for name in (b'div', b'section', b'ul')}
+
+ADDED = "added"
+CHANGED = "changed"
+UNCHANGED = "unchanged"
+REMOVED = "removed"
+
+
+def block_end(lowered, opening):
+    """Offset just past the element `opening` (a NOISE_BLOCK match) closes, counting nested same-name tags"""
+    depth = 0
+    for tag in BLOCK_TAGS[opening.group(1)].finditer(lowered, opening.start()):
+        depth += -1 if tag.group(1) else 1
+        if depth == 0:
+            close = lowered.find(b'>', tag.end())
+            return len(lowered) if close == -1 else close + 1
+    return len(lowered)
+
+
+def part_region(content):
+    """
+    The bytes a part dict can depend on: the <title>, JSON-LD and Open Graph
+    price tags wherever they are, and the page from its <h1> to the footer
+    without reviews / Q&A / recommendation blocks. Pages with no <h1> are
+    kept whole.
+    """
+    lowered = content.lower()
+    pieces = [content[match.start():match.end()] for match in TITLE.finditer(lowered)]
+    pieces += [content[match.start(1):match.end(1)] for match in JSON_LD.finditer(lowered)]
+    pieces += [(tag_value(content, match.start()) or '').encode('utf-8') for match in OG_PRICE.finditer(lowered)]
+
+    start = REGION_START.search(lowered)
+    start = start.start() if start else 0
+    end = REGION_END.search(lowered, start)
+    end = end.start() if end else len(content)
+    position = start
+    for block in iter(lambda: NOISE_BLOCK.search(lowered, position, end), None):
+        pieces.append(content[position:block.start()])
+        position = block_end(lowered, block)
+    pieces.append(content[position:end])
+    return b'\0'.join(pieces)
+
+
+def page_fingerprint(content, part_info, url):
+    """Hash of a page's part region with volatile markup stripped, plus everything else the part dict depends on"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(json.dumps([FINGERPRINT_VERSION, url, part_info], sort_keys=True).encode('utf-8'))
+    digest.update(WHITESPACE.sub(b' ', VOLATILE.sub(b'', part_region(content))))
+    return digest.hexdigest()
+
+
+class FingerprintStore:
+    """Persistent PS number -> (fingerprint, part dict) table, plus this run's changes"""
+
+    def __init__(self, path=STORE_FILE):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS fingerprints (
+                ps TEXT PRIMARY KEY,
+                fingerprint TEXT NOT NULL,
+                part TEXT NOT NULL,
+                updated REAL NOT NULL
+            )
+        """)
+        self.changes = {ADDED: [], CHANGED: [], UNCHANGED: [], REMOVED: []}
+        self.reused = 0
+
+    def lookup(self, ps, fingerprint):
+        """The stored part dict if the page is unchanged, else None"""
+        with self.lock:
+            row = self.db.execute("SELECT part FROM fingerprints WHERE ps = ? AND fingerprint = ?",
+                                  (ps, fingerprint)).fetchone()
+        if row is None:
+            return None
+        self.reused += 1
+        return json.loads(row[0])
+
+    def record(self, ps, fingerprint, part):
+        """Store a part scraped this run; returns whether it was added, changed or unchanged"""
+        with self.lock:
+            row = self.db.execute("SELECT part FROM fingerprints WHERE ps = ?", (ps,)).fetchone()
+            self.db.execute("INSERT OR REPLACE INTO fingerprints (ps, fingerprint, part, updated) "
+                            "VALUES (?, ?, ?, ?)",
+                            (ps, fingerprint, json.dumps(part, ensure_ascii=False), time.time()))
+        if row is None:
+            change = ADDED
+        elif json.loads(row[0]) != part:
+            change = CHANGED
+        else:
+            change = UNCHANGED
+        self.changes[change].append(ps)
+        return change
+
+    def record_gone(self, ps):
+        """Forget a part whose page no longer exists"""
+        with self.lock:
+            cursor = self.db.execute("DELETE FROM fingerprints WHERE ps = ?", (ps,))
+        if cursor.rowcount:
+            self.changes[REMOVED].append(ps)
+
+    def part(self, ps):
+        with self.lock:
+            row = self.db.execute("SELECT part FROM fingerprints WHERE ps = ?", (ps,)).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def report(self):
+        """This run's change report"""
+        return {
+            "run_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "added": sorted(self.changes[ADDED]),
+            "changed": sorted(self.changes[CHANGED]),
+            "removed": sorted(self.changes[REMOVED]),
+            "unchanged": len(self.changes[UNCHANGED]),
+            "reused_without_parsing": self.reused,
+        }
+
+    def write_report(self, report_path=REPORT_FILE, changed_path=CHANGED_FILE):
+        """
+        Write the change report, and the added/changed part records as JSONL
+        for `python enhance_data.py --changes <report_path>`. Returns the report.
+        """
+        report = self.report()
+        report["changed_records"] = changed_path
+        tmp_path = report_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        os.replace(tmp_path, report_path)
+
+        tmp_path = changed_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for ps in report["added"] + report["changed"]:
+                f.write(json.dumps(self.part(ps), ensure_ascii=False) + '\n')
+        os.replace(tmp_path, changed_path)
+        return report
+
+    def close(self):
+        """Close the database"""
+        with self.lock:
+            self.db.close()
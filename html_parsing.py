@@ -0,0 +1,76 @@
+"""
+HTML Parsing Backend
+Builds BeautifulSoup trees with lxml, restricted by SoupStrainers to the
+parts of a page the extractors actually read. The strainers only see tag
+names and attributes, so a section in an unnamed container is lost; callers
+re-read such sections from make_soup(content) when the page has their text.
+"""
+
+import re
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+# lxml is pinned in requirements.txt; fall back to the stdlib parser without it
+try:
+    import lxml  # noqa: F401
+    PARSER = 'lxml'
+except ImportError:
+    PARSER = 'html.parser'
+
+# Part page nodes: name, price, description, and the symptom / model / install sections
+PART_PAGE_TAGS = {'title', 'h1'}
+PART_PAGE_SECTION = re.compile(
+    r'price|description|symptom|troubleshoot|model|compatib|install|instruction|repair',
+    re.I,
+)
+
+# Listing page nodes: product tiles and popular/top/featured sections
+LISTING_SECTION = re.compile(r'product|part-result|popular|top-parts|featured', re.I)
+
+
+def attr_text(attrs, name):
+    """An attribute value as one string, whether it arrived split or not"""
+    value = attrs.get(name)
+    if isinstance(value, (list, tuple)):
+        return ' '.join(value)
+    return value or ''
+
+
+def keep_part_node(name, attrs):
+    """SoupStrainer predicate for part detail pages"""
+    if name in PART_PAGE_TAGS:
+        return True
+    if name == 'meta':
+        return attrs.get('property') == 'product:price:amount'
+    if attrs.get('itemprop') in ('price', 'description'):
+        return True
+    for attr in ('id', 'class'):
+        if PART_PAGE_SECTION.search(attr_text(attrs, attr)):
+            return True
+    return False
+
+
+def keep_listing_node(name, attrs):
+    """SoupStrainer predicate for category listing pages"""
+    if name not in ('div', 'section'):
+        return False
+    return bool(LISTING_SECTION.search(attr_text(attrs, 'class')))
+
+
+PART_PAGE_STRAINER = SoupStrainer(keep_part_node)
+LISTING_STRAINER = SoupStrainer(keep_listing_node)
+
+
+def make_soup(content, strainer=None):
+    """Parse HTML with the fast backend, optionally keeping only strained subtrees"""
+    return BeautifulSoup(content, PARSER, parse_only=strainer)
+
+
+def part_page_soup(content):
+    """Parse a part detail page, keeping only the nodes the extractors use"""
+    return make_soup(content, PART_PAGE_STRAINER)
+
+
+def listing_soup(content):
+    """Parse a category listing page, keeping only product tiles and sections"""
+    return make_soup(content, LISTING_STRAINER)
@@ -0,0 +1,130 @@
+"""
+Conditional-GET HTTP Cache
+On-disk response cache keyed by URL. Stores ETag/Last-Modified validators,
+revalidates with If-None-Match/If-Modified-Since and serves the cached body
+on a 304. Total size is bounded with least-recently-used eviction.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+CACHE_DIR = ".http_cache"
+CACHE_FILE = os.path.join(CACHE_DIR, "responses.sqlite3")
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# Response headers worth keeping alongside the body
+KEPT_HEADERS = ('ETag', 'Last-Modified', 'Content-Type')
+
+
+class HttpCache:
+    """Size-bounded LRU cache of validated HTTP responses backed by SQLite"""
+
+    def __init__(self, path=CACHE_FILE, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                headers TEXT NOT NULL,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self.db.execute("CREATE INDEX IF NOT EXISTS responses_lru ON responses (last_access)")
+        self.db.commit()
+        self.total_bytes = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def conditional_headers(self, url):
+        """If-None-Match / If-Modified-Since headers for a cached URL"""
+        with self.lock:
+            row = self.db.execute("SELECT etag, last_modified FROM responses WHERE url = ?",
+                                  (url,)).fetchone()
+        if not row:
+            return {}
+        headers = {}
+        if row[0]:
+            headers['If-None-Match'] = row[0]
+        if row[1]:
+            headers['If-Modified-Since'] = row[1]
+        return headers
+
+    def get(self, url):
+        """Cached (body, headers) for a URL, or None; marks it recently used"""
+        with self.lock:
+            row = self.db.execute("SELECT body, headers FROM responses WHERE url = ?",
+                                  (url,)).fetchone()
+            if not row:
+                return None
+            self.db.execute("UPDATE responses SET last_access = ? WHERE url = ?", (time.time(), url))
+            self.db.commit()
+        return row[0], json.loads(row[1])
+
+    def store(self, url, content, headers):
+        """Cache a 200 response if it carries a validator"""
+        by_name = {name.lower(): value for name, value in headers.items()}
+        etag = by_name.get('etag')
+        last_modified = by_name.get('last-modified')
+        if not etag and not last_modified:
+            return
+        kept = {name: by_name[name.lower()] for name in KEPT_HEADERS if name.lower() in by_name}
+        size = len(content)
+        if size > self.max_bytes:
+            return
+
+        with self.lock:
+            old = self.db.execute("SELECT size FROM responses WHERE url = ?", (url,)).fetchone()
+            if old:
+                self.total_bytes -= old[0]
+            self.db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, etag, last_modified, json.dumps(kept), content, size, time.time()),
+            )
+            self.total_bytes += size
+            self.evict()
+            self.db.commit()
+
+    def evict(self):
+        """Drop least recently used entries until under max_bytes (lock held)"""
+        while self.total_bytes > self.max_bytes:
+            rows = self.db.execute(
+                "SELECT url, size FROM responses ORDER BY last_access LIMIT 64").fetchall()
+            if not rows:
+                break
+            for url, size in rows:
+                self.db.execute("DELETE FROM responses WHERE url = ?", (url,))
+                self.total_bytes -= size
+                if self.total_bytes <= self.max_bytes:
+                    break
+
+    def revalidated(self, url, page):
+        """
+        Apply a fetched Page to the cache: a 304 is swapped for the cached body,
+        a 200 is stored for next time. Returns the Page to use; a 304 comes back
+        unchanged if its entry was evicted since conditional_headers(), and the
+        caller should fetch again without validators.
+        """
+        if page.status == 304:
+            cached = self.get(url)
+            if cached:
+                content, headers = cached
+                return page._replace(status=200, content=content, headers={**headers, **page.headers},
+                                     from_cache=True)
+        elif page.status == 200:
+            self.store(url, page.content, page.headers)
+        return page
+
+    def close(self):
+        """Close the database"""
+        with self.lock:
+            self.db.close()
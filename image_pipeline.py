@@ -0,0 +1,221 @@
+"""
+Part Image Assets
+Downloads every part's image_url through the crawl engine (same rate limit,
+adaptive concurrency and conditional-GET cache as the page crawl), stores each
+distinct image once under its content hash, and renders a thumbnail plus a
+WebP copy of it in a process pool. public/images/parts/manifest.json maps
+part numbers to the local files, which is what ProductCard loads. A part
+only loses its cached image on a 404/410 or an invalid image; errors that may
+clear up (429/5xx after retries, timeouts) keep the previous run's files.
+
+Thumbnails need Pillow; without it the originals are still cached locally
+and the manifest points at them.
+
+Usage: python image_pipeline.py [catalog.json]
+"""
+
+import argparse
+import asyncio
+import functools
+import hashlib
+import io
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from crawl_engine import CrawlEngine
+from crawl_metrics import CrawlMetrics
+from crawl_pipeline import Finished, run_pipeline
+from part_sink import SEED_FILE
+
+# Pillow is optional: without it only the originals are cached
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+IMAGE_DIR = "public/images/parts"
+MANIFEST_FILE = os.path.join(IMAGE_DIR, "manifest.json")
+# URL the frontend serves IMAGE_DIR under (public/ is the web root)
+ASSET_URL = "/images/parts"
+MANIFEST_VERSION = 1
+
+# Cards show images at 140px; render at 2x for high-density screens
+THUMBNAIL_SIZE = (280, 280)
+JPEG_QUALITY = 85
+WEBP_QUALITY = 80
+
+RATE_PER_HOST = 2.0
+MAX_CONCURRENCY = 8
+PROCESS_WORKERS = os.cpu_count() or 2
+
+# Magic numbers of the formats we accept; anything else (an HTML error page
+# served with a 200, a truncated body) is rejected
+IMAGE_SIGNATURES = {
+    b'\xff\xd8\xff': ".jpg",
+    b'\x89PNG\r\n\x1a\n': ".png",
+    b'GIF87a': ".gif",
+    b'GIF89a': ".gif",
+}
+# Statuses that mean the image is gone for good; any other failure keeps last run's image
+GONE_STATUSES = (404, 410)
+HASHED_FILE = re.compile(r'^[0-9a-f]{32}(?:-thumb)?\.(?:jpg|png|gif|webp)$')
+
+
+class ImageUnavailable(RuntimeError):
+    """The image host answered with an error after the engine's retries (may clear up)"""
+
+
+def image_extension(content):
+    """File extension for image bytes, or None if they are not an image we accept"""
+    if content[:4] == b'RIFF' and content[8:12] == b'WEBP':
+        return ".webp"
+    for signature, extension in IMAGE_SIGNATURES.items():
+        if content.startswith(signature):
+            return extension
+    return None
+
+
+def content_hash(content):
+    return hashlib.blake2b(content, digest_size=16).hexdigest()
+
+
+def write_file(path, data):
+    """Write bytes atomically (no-op if the file already exists: names are content hashes)"""
+    if os.path.exists(path):
+        return
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def asset_files(entry):
+    return [entry[key].rsplit('/', 1)[-1] for key in ("original", "thumb", "thumb_webp") if key in entry]
+
+
+def load_manifest(path=MANIFEST_FILE):
+    if not os.path.exists(path):
+        return {"version": MANIFEST_VERSION, "parts": {}}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def make_variants(content, part, digest, extension, image_dir=IMAGE_DIR):
+    """
+    Process-pool stage: save the original and, with Pillow, a thumbnail as
+    JPEG and WebP. Returns the part's manifest entry.
+    """
+    original = f"{digest}{extension}"
+    write_file(os.path.join(image_dir, original), content)
+    entry = {"source": part["image_url"], "hash": digest, "bytes": len(content),
+             "original": f"{ASSET_URL}/{original}"}
+    if Image is None:
+        entry["image_url"] = entry["original"]
+        return entry
+
+    with Image.open(io.BytesIO(content)) as image:
+        entry["width"], entry["height"] = image.size
+        thumb = image.convert("RGB")
+        thumb.thumbnail(THUMBNAIL_SIZE)
+        for suffix, image_format, options in ((".jpg", "JPEG", {"quality": JPEG_QUALITY, "optimize": True}),
+                                              (".webp", "WEBP", {"quality": WEBP_QUALITY, "method": 6})):
+            buffer = io.BytesIO()
+            thumb.save(buffer, image_format, **options)
+            write_file(os.path.join(image_dir, f"{digest}-thumb{suffix}"), buffer.getvalue())
+    entry["thumb"] = f"{ASSET_URL}/{digest}-thumb.jpg"
+    entry["thumb_webp"] = f"{ASSET_URL}/{digest}-thumb.webp"
+    entry["image_url"] = entry["thumb"]
+    return entry
+
+
+async def build_image_assets(parts, image_dir=IMAGE_DIR, manifest_path=MANIFEST_FILE, metrics=None):
+    """
+    Fetch, validate, deduplicate and resize every part's image, then write the
+    manifest. Returns the manifest.
+    """
+    os.makedirs(image_dir, exist_ok=True)
+    metrics = metrics or CrawlMetrics("images")
+    previous = load_manifest(manifest_path)["parts"]
+    # Content hash -> entry of an image already rendered (this run or a previous one)
+    rendered = {entry["hash"]: entry for entry in previous.values()
+                if (Image is None or "thumb" in entry)
+                and all(os.path.exists(os.path.join(image_dir, name)) for name in asset_files(entry))}
+    items = [{"part_number": part["part_number"], "image_url": part["image_url"]}
+             for part in parts if part.get("image_url")]
+
+    async def fetch_stage(engine, part):
+        page = await engine.fetch(part["image_url"])
+        if page.status in GONE_STATUSES:
+            metrics.count("missing")
+            return None
+        if page.status != 200:
+            # 429/5xx that outlasted the retries: handled like a network error
+            raise ImageUnavailable(f"HTTP {page.status}")
+        extension = image_extension(page.content)
+        if extension is None:
+            metrics.count("invalid")
+            return None
+        digest = content_hash(page.content)
+        if digest in rendered:
+            metrics.count("deduplicated")
+            return Finished(dict(rendered[digest], source=part["image_url"]))
+        return page.content, digest, extension
+
+    manifest = {"version": MANIFEST_VERSION, "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "thumbnail_size": list(THUMBNAIL_SIZE), "parts": {}}
+    render_stage = functools.partial(make_variants, image_dir=image_dir)
+    async with CrawlEngine(rate_per_host=RATE_PER_HOST, concurrency=MAX_CONCURRENCY, metrics=metrics) as engine:
+        with ProcessPoolExecutor(max_workers=PROCESS_WORKERS) as pool:
+            async for part, entry in run_pipeline(engine, pool, items, fetch_stage, render_stage,
+                                                  parse_workers=PROCESS_WORKERS):
+                if isinstance(entry, Exception):
+                    # Possibly transient: keep last run's image for this part
+                    metrics.count_error(entry)
+                    print(f"❌ {part['part_number']}: {type(entry).__name__}: {entry}")
+                    entry = previous.get(part["part_number"])
+                    if entry is None or entry["hash"] not in rendered:
+                        continue
+                if entry is None:
+                    print(f"❌ {part['part_number']}: no usable image at {part['image_url']}")
+                    continue
+                rendered.setdefault(entry["hash"], entry)
+                manifest["parts"][part["part_number"]] = entry
+                metrics.count("images")
+    metrics.finish()
+
+    # Drop hashed files no part points at any more
+    referenced = {name for entry in manifest["parts"].values() for name in asset_files(entry)}
+    for name in os.listdir(image_dir):
+        if HASHED_FILE.match(name) and name not in referenced:
+            os.remove(os.path.join(image_dir, name))
+
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cache part images locally and render thumbnails")
+    parser.add_argument('catalog', nargs='?', default=SEED_FILE)
+    args = parser.parse_args()
+
+    with open(args.catalog, 'r', encoding='utf-8') as f:
+        parts = json.load(f)["parts"]
+    if Image is None:
+        print("⚠️  Pillow is not installed: caching originals only (pip install Pillow for thumbnails)")
+
+    metrics = CrawlMetrics("images")
+    manifest = asyncio.run(build_image_assets(parts, metrics=metrics))
+    unique = len({entry["hash"] for entry in manifest["parts"].values()})
+    print(f"🖼️  {len(manifest['parts'])}/{len(parts)} parts have images ({unique} unique, "
+          f"{metrics.events['deduplicated']} reused, {metrics.events['invalid']} invalid, "
+          f"{metrics.events['missing']} missing) -> {MANIFEST_FILE}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+"""
+Model Page Crawler
+Builds compatibility from the model side: a model's parts pages list every
+part that fits it, so crawling each model once (plus its pagination) gives
+complete part -> models lists for far fewer requests than a part page per
+part, and without the part pages' cap on listed models.
+
+Model pages go through the shared crawl engine (rate limit, adaptive
+concurrency, conditional-GET cache). Each crawled page is streamed to
+models.jsonl; the inverted part -> models map is written to partModels.json,
+which enhance_data.py merges into the catalog's compatible_models.
+
+Usage:
+  python model_crawler.py                    # every model in the catalog and overlays
+  python model_crawler.py WDT780SAEM1 ...    # plus these models
+  python model_crawler.py --enqueue          # also queue unknown parts for scraper_comprehensive.py
+"""
+
+import argparse
+import asyncio
+import json
+import os
+from urllib.parse import quote, urlsplit
+
+from crawl_engine import CrawlEngine
+from crawl_metrics import CrawlMetrics
+from crawl_state import DONE, FAILED, RETRY_AFTER, CrawlState
+from discovery import PAGINATION, PART_LINK, extract_links, normalize_url
+from enhance_data import OVERLAY_DIR, OVERLAYS, enhance_changed, load_catalog
+from part_sink import SCRAPED_DIR, drop_partial_line, read_jsonl
+
+BASE_URL = "https://www.partselect.com"
+
+STATE_FILE = os.path.join(SCRAPED_DIR, "models.state.sqlite3")
+# One record per crawled model page: {"url", "model", "parts": [part_info, ...]}
+JSONL_FILE = os.path.join(SCRAPED_DIR, "models.jsonl")
+# Inverted result: part number -> every model whose pages list it
+MAP_FILE = os.path.join(SCRAPED_DIR, "partModels.json")
+METRICS_FILE = os.path.join(SCRAPED_DIR, "models.metrics.json")
+
+RATE_PER_HOST = 2.0
+MAX_CONCURRENCY = 8
+CLAIM_BATCH = 100
+FLUSH_EVERY = 25
+
+# Pagination guard: stop following a model's "next page" links after this many pages
+MAX_MODEL_PAGES = 50
+
+
+def model_url(model):
+    """First page of a model's parts list"""
+    return normalize_url(f"{BASE_URL}/Models/{quote(model)}/Parts/")
+
+
+def seed_models(parts, extra=()):
+    """{model: appliance type} for every model the catalog or the models overlay mentions"""
+    types = {part["part_number"]: part.get("type") for part in parts}
+    models = {}
+    for part in parts:
+        for model in part.get("compatible_models") or []:
+            models.setdefault(model, part.get("type"))
+
+    overlay_path = os.path.join(OVERLAY_DIR, OVERLAYS["compatible_models"])
+    if os.path.exists(overlay_path):
+        with open(overlay_path, 'r', encoding='utf-8') as f:
+            for part_number, overlay_models in json.load(f).items():
+                for model in overlay_models:
+                    models.setdefault(model, types.get(part_number))
+
+    for model in extra:
+        models.setdefault(model, None)
+    return models
+
+
+def parse_model_page(content, page):
+    """
+    Part infos listed on a model page, and the same model's further pages.
+    Uses the discovery crawler's byte-level href scan, not a DOM parse.
+    """
+    model_root = f"/models/{quote(page['model']).lower()}/"
+    parts = {}
+    pages = []
+    for url in extract_links(content, page["url"]):
+        split = urlsplit(url)
+        match = PART_LINK.match(split.path)
+        if match:
+            ps, brand, mfr = match.groups()
+            parts.setdefault(ps, {"ps": ps, "mfr": mfr, "brand": brand, "type": page.get("type") or "unknown"})
+        elif split.path.lower().startswith(model_root) and PAGINATION.search(f"?{split.query}"):
+            pages.append(normalize_url(url))
+    return list(parts.values()), pages
+
+
+def latest_pages(records):
+    """
+    The last record for each page URL in a stream of model page records: a
+    page crawled again (e.g. after an interrupted run) replaces what it listed
+    before, so parts it no longer lists drop out
+    """
+    latest = {}
+    for record in records:
+        latest[record["url"]] = record
+    return list(latest.values())
+
+
+def invert(records):
+    """part number -> sorted models, from a stream of model page records (latest per page)"""
+    part_models = {}
+    for record in latest_pages(records):
+        for part in record["parts"]:
+            part_models.setdefault(part["ps"], set()).add(record["model"])
+    return {ps: sorted(models) for ps, models in sorted(part_models.items())}
+
+
+def write_map(part_models, path=MAP_FILE):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(part_models, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+async def fetch_model_page(engine, page):
+    return await engine.fetch(page["url"])
+
+
+async def crawl_models(state, out, metrics, rate=RATE_PER_HOST):
+    """
+    Crawl every due model page in the state store, appending one record per
+    page to `out` and queueing the pages it links to. Returns (pages, failed).
+    """
+    crawled = 0
+    failed = 0
+    pending = 0
+
+    async with CrawlEngine(rate_per_host=rate, concurrency=MAX_CONCURRENCY, metrics=metrics) as engine:
+        while True:
+            batch = state.claim(CLAIM_BATCH)
+            if not batch:
+                break
+
+            async for page, result in engine.crawl(batch, fetch_model_page):
+                if isinstance(result, Exception):
+                    # Counted by the engine; may clear up on a later run
+                    status = state.mark_failed(page["url"], f"{type(result).__name__}: {result}")
+                    metrics.count("failed")
+                    failed += 1
+                    print(f"❌ {page['model']}: {page['url']} ({status})")
+                    continue
+                if result.status != 200:
+                    permanent = result.status in (404, 410)
+                    status = state.mark_failed(page["url"], f"HTTP {result.status}", permanent=permanent)
+                    metrics.count("gone" if permanent else "failed")
+                    failed += 1
+                    print(f"❌ {page['model']}: HTTP {result.status} ({status})")
+                    continue
+
+                parts, next_pages = parse_model_page(result.content, page)
+                if page["page"] < MAX_MODEL_PAGES:
+                    # Already-known URLs are ignored by the state store
+                    state.add_many([dict(page, url=url, page=page["page"] + 1) for url in next_pages],
+                                   key=lambda child: child["url"])
+
+                out.write(json.dumps({"url": page["url"], "model": page["model"], "parts": parts}) + '\n')
+                pending += 1
+                if pending >= FLUSH_EVERY:
+                    out.flush()
+                    pending = 0
+                state.mark_done(page["url"])
+                metrics.count("pages")
+                crawled += 1
+                print(f"✅ {page['model']}: {len(parts)} parts (page {page['page']})")
+            out.flush()
+
+        for host, limit in engine.limits.items():
+            print(f"\n🎚️  {host}: settled at {limit.allowed} requests in flight "
+                  f"({limit.increases} ramp-ups, {limit.decreases} backoffs)")
+
+    return crawled, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Crawl model pages and invert them into part -> models")
+    parser.add_argument('models', nargs='*', help="extra model numbers to crawl")
+    parser.add_argument('--fresh', action='store_true',
+                        help="discard the previous run's pages and crawl every model again")
+    parser.add_argument('--rate', type=float, default=RATE_PER_HOST,
+                        help="requests/sec ceiling per host (default: %(default)s)")
+    parser.add_argument('--enqueue', action='store_true',
+                        help="queue parts found on model pages but missing from the catalog "
+                             "for scraper_comprehensive.py")
+    parser.add_argument('--no-merge', action='store_true',
+                        help="only write the part -> models map; don't merge it into the catalog")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("MODEL PAGE CRAWLER")
+    print("=" * 70)
+
+    catalog = load_catalog()
+    models = seed_models(catalog, args.models)
+    state = CrawlState(STATE_FILE, fresh=args.fresh)
+    state.add_many([{"url": model_url(model), "model": model, "type": appliance_type, "page": 1}
+                    for model, appliance_type in models.items()],
+                   key=lambda page: page["url"])
+    state.release_stale()
+
+    if args.fresh and os.path.exists(JSONL_FILE):
+        os.remove(JSONL_FILE)
+    if os.path.exists(JSONL_FILE):
+        drop_partial_line(JSONL_FILE)
+
+    print(f"\nCrawling parts pages for {len(models)} models...\n")
+    metrics = CrawlMetrics("models")
+    with open(JSONL_FILE, 'a', encoding='utf-8') as out:
+        crawled, failed = asyncio.run(crawl_models(state, out, metrics, args.rate))
+    metrics.finish()
+
+    counts = state.counts()
+    state.close()
+
+    part_models = invert(read_jsonl(JSONL_FILE))
+    write_map(part_models)
+    known = {part["part_number"] for part in catalog}
+    covered = sum(1 for ps in part_models if ps in known)
+
+    print("\n" + "=" * 70)
+    print("MODEL CRAWL COMPLETE")
+    print("=" * 70)
+    print(f"✅ Crawled {crawled} model pages ({counts.get(DONE, 0)} in total)")
+    print(f"❌ Failed: {failed} pages ({counts.get(FAILED, 0)} given up on)")
+    if counts.get(RETRY_AFTER):
+        print(f"⏳ Waiting to retry: {counts[RETRY_AFTER]} pages (run again later)")
+    print(f"🔗 {len(part_models)} parts x {len({m for ms in part_models.values() for m in ms})} models "
+          f"-> {MAP_FILE} ({covered}/{len(known)} catalog parts covered)")
+
+    if args.enqueue:
+        from scraper_comprehensive import STATE_FILE as PART_STATE_FILE
+        unknown = {}
+        for record in latest_pages(read_jsonl(JSONL_FILE)):
+            for part in record["parts"]:
+                if part["ps"] not in known:
+                    unknown.setdefault(part["ps"], part)
+        part_state = CrawlState(PART_STATE_FILE)
+        part_state.add_many(unknown.values(), key=lambda part: part["ps"])
+        part_state.close()
+        print(f"📥 Queued {len(unknown)} parts not in the catalog for scraper_comprehensive.py")
+
+    metrics.write(METRICS_FILE)
+    print()
+    for line in metrics.report_lines():
+        print(line)
+    print(f"   Metrics: {METRICS_FILE}")
+
+    if args.no_merge:
+        print(f"\n   Merge later with: python enhance_data.py")
+        return
+    parts, added, updated, deleted = enhance_changed(catalog)
+    print(f"\n💾 Merged into the catalog: {updated} parts gained compatible models")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""
+Single-Pass Part Page Extractor
+Walks a parsed part page once and dispatches each node to the field
+extractors (name, price, description, symptoms, models, install steps)
+"""
+
+import re
+from bisect import bisect_right
+
+from bs4 import NavigableString, Tag
+
+# Text markers, compiled once per process instead of once per page
+FIXES_SYMPTOMS = re.compile(r'fixes? the following symptoms?', re.I)
+SYMPTOM_WORDS = re.compile(r'symptom|problem|issue', re.I)
+MODELS_MARKER = re.compile(r'works? with.*following|compatible.*model', re.I)
+INSTALL_MARKER = re.compile(r'installation|how to (install|replace)', re.I)
+MODEL_LINK = re.compile(r'/Models/')
+PRICE_TEXT = re.compile(r'\$?([\d,]+\.?\d*)')
+
+
+def has_class(tag, name):
+    return name in tag.get('class', ())
+
+
+# Price and description candidates in priority order: (slot, tag name, predicate)
+PRICE_SLOTS = [
+    ('span', lambda tag: has_class(tag, 'price')),
+    ('div', lambda tag: has_class(tag, 'price')),
+    ('span', lambda tag: tag.get('itemprop') == 'price'),
+    ('meta', lambda tag: tag.get('property') == 'product:price:amount'),
+]
+DESCRIPTION_SLOTS = [
+    ('div', lambda tag: has_class(tag, 'product-description')),
+    ('div', lambda tag: tag.get('itemprop') == 'description'),
+    ('div', lambda tag: has_class(tag, 'description')),
+    ('p', lambda tag: has_class(tag, 'description')),
+]
+
+
+def slots_by_tag(slots):
+    """Index slot numbers by tag name so each tag only checks its own predicates"""
+    index = {}
+    for slot, (name, predicate) in enumerate(slots):
+        index.setdefault(name, []).append((slot, predicate))
+    return index
+
+
+PRICE_BY_TAG = slots_by_tag(PRICE_SLOTS)
+DESCRIPTION_BY_TAG = slots_by_tag(DESCRIPTION_SLOTS)
+
+
+class PageScan:
+    """Everything the field extractors need, collected in one walk of the tree"""
+
+    def __init__(self):
+        self.title = None
+        self.h1 = None
+        self.price_nodes = [None] * len(PRICE_SLOTS)
+        self.description_nodes = [None] * len(DESCRIPTION_SLOTS)
+        self.fixes_text = None
+        self.symptom_texts = []
+        self.models_text = None
+        self.install_texts = []
+        # Document position of every element, and of every <ol>, for find_next('ol')
+        self.position = {}
+        self.ol_positions = []
+        self.ols = []
+
+    def visit_tag(self, tag, position):
+        name = tag.name
+        self.position[id(tag)] = position
+        if name == 'title':
+            if self.title is None:
+                self.title = tag
+        elif name == 'h1':
+            if self.h1 is None:
+                self.h1 = tag
+        elif name == 'ol':
+            self.ol_positions.append(position)
+            self.ols.append(tag)
+        for slot, predicate in PRICE_BY_TAG.get(name, ()):
+            if self.price_nodes[slot] is None and predicate(tag):
+                self.price_nodes[slot] = tag
+        for slot, predicate in DESCRIPTION_BY_TAG.get(name, ()):
+            if self.description_nodes[slot] is None and predicate(tag):
+                self.description_nodes[slot] = tag
+
+    def visit_text(self, text):
+        if self.fixes_text is None and FIXES_SYMPTOMS.search(text):
+            self.fixes_text = text
+        if SYMPTOM_WORDS.search(text):
+            self.symptom_texts.append(text)
+        if self.models_text is None and MODELS_MARKER.search(text):
+            self.models_text = text
+        if INSTALL_MARKER.search(text):
+            self.install_texts.append(text)
+
+    def next_ol(self, tag):
+        """First <ol> after `tag` starts, in document order (like tag.find_next('ol'))"""
+        start = self.position.get(id(tag), -1)
+        index = bisect_right(self.ol_positions, start)
+        return self.ols[index] if index < len(self.ols) else None
+
+
+def scan_page(soup):
+    """Walk the document once, dispatching each node to the field collectors"""
+    scan = PageScan()
+    scan.position[id(soup)] = -1
+    for position, node in enumerate(soup.descendants):
+        if isinstance(node, Tag):
+            scan.visit_tag(node, position)
+        elif isinstance(node, NavigableString):
+            scan.visit_text(node)
+    return scan
+
+
+def clean_list_text(li):
+    return li.get_text(strip=True).replace('•', '').strip().lower()
+
+
+def clean_name(name, ps, mfr):
+    """Drop the "WPW10873791 ..." / "PS11752778 ..." tail from a product name"""
+    name = re.sub(r'\s+' + re.escape(mfr) + r'.*', '', name)
+    name = re.sub(r'\s+' + re.escape(ps) + r'.*', '', name)
+    return name.strip()
+
+
+def extract_name(scan, ps, mfr):
+    name = ""
+    if scan.title:
+        title_text = scan.title.get_text()
+        # Parse "Ice Maker Assembly WPW10873791" format
+        name = clean_name(title_text.split('|')[0].strip(), ps, mfr)
+
+    if not name and scan.h1:
+        name = scan.h1.get_text(strip=True)
+        name = re.sub(r'\s+' + re.escape(mfr) + r'.*', '', name)
+    return name
+
+
+def extract_price(scan):
+    price = 0.0
+    for price_elem in scan.price_nodes:
+        if price_elem:
+            if price_elem.name == 'meta':
+                price_text = price_elem.get('content', '')
+            else:
+                price_text = price_elem.get_text(strip=True)
+
+            price_match = PRICE_TEXT.search(price_text)
+            if price_match:
+                price = float(price_match.group(1).replace(',', ''))
+                if price > 0:
+                    break
+    return price
+
+
+def extract_description(scan):
+    for desc_elem in scan.description_nodes:
+        if desc_elem:
+            desc_text = desc_elem.get_text(strip=True)
+            if len(desc_text) > 50:
+                return desc_text[:800]
+    return ""
+
+
+def extract_symptoms(scan):
+    symptoms = []
+    if scan.fixes_text is not None and scan.fixes_text.parent:
+        for li in scan.fixes_text.parent.find_all('li'):
+            symptom = clean_list_text(li)
+            if symptom and len(symptom) > 5:
+                symptoms.append(symptom)
+
+    # If no symptoms found, try any section that mentions symptoms/problems
+    if not symptoms:
+        for text in scan.symptom_texts:
+            parent = text.parent
+            if parent:
+                for li in parent.find_all('li')[:5]:
+                    symptom = clean_list_text(li)
+                    if symptom and len(symptom) > 5:
+                        symptoms.append(symptom)
+                if symptoms:
+                    break
+    return symptoms
+
+
+def extract_models(scan):
+    models = []
+    if scan.models_text is not None and scan.models_text.parent:
+        for link in scan.models_text.parent.find_all('a', href=MODEL_LINK)[:15]:
+            model = link.get_text(strip=True)
+            if model and len(model) > 3:
+                models.append(model)
+    return models
+
+
+def extract_install_steps(scan):
+    install_steps = []
+    for header in scan.install_texts:
+        parent = header.parent
+        if parent:
+            ol = scan.next_ol(parent)
+            if ol:
+                for li in ol.find_all('li')[:15]:
+                    step_text = li.get_text(strip=True)
+                    if step_text:
+                        install_steps.append(step_text)
+                break
+    return install_steps
+
+
+# Field -> extractor over a PageScan
+FIELD_EXTRACTORS = {
+    "name": lambda scan, ps, mfr: extract_name(scan, ps, mfr),
+    "price": lambda scan, ps, mfr: extract_price(scan),
+    "description": lambda scan, ps, mfr: extract_description(scan),
+    "symptoms": lambda scan, ps, mfr: extract_symptoms(scan),
+    "models": lambda scan, ps, mfr: extract_models(scan),
+    "install_steps": lambda scan, ps, mfr: extract_install_steps(scan),
+}
+
+
+def extract_part_fields(soup, ps, mfr, fields=None):
+    """Extract every part field (or just `fields`) from a parsed part page in a single document walk"""
+    scan = scan_page(soup)
+    return {field: FIELD_EXTRACTORS[field](scan, ps, mfr) for field in (fields or FIELD_EXTRACTORS)}
@@ -0,0 +1,163 @@
+"""
+Streaming Part Sink
+Appends each scraped part to a JSONL file as soon as it is scraped, so a crash
+loses at most the last few records and a restart can skip finished parts.
+compact() turns the stream into the {"parts": [...]} document the backend loads.
+"""
+
+import json
+import os
+import textwrap
+from collections import Counter
+
+SCRAPED_DIR = "backend/data/scraped"
+SEED_FILE = "backend/data/seedParts.json"
+FLUSH_EVERY = 25
+
+
+def read_jsonl(path):
+    """Yield every complete record in a JSONL file"""
+    if not os.path.exists(path):
+        return
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.endswith('\n') and line.strip():
+                yield json.loads(line)
+
+
+def drop_partial_line(path):
+    """Truncate a torn final line left by a crash mid-write"""
+    with open(path, 'rb+') as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        if size == 0:
+            return
+        f.seek(size - 1)
+        if f.read(1) == b'\n':
+            return
+        # Walk back to the last newline
+        position = size - 1
+        while position > 0:
+            step = min(4096, position)
+            f.seek(position - step)
+            chunk = f.read(step)
+            newline = chunk.rfind(b'\n')
+            if newline != -1:
+                f.truncate(position - step + newline + 1)
+                return
+            position -= step
+        f.truncate(0)
+
+
+class JsonlSink:
+    """Append-only JSONL writer that remembers which part numbers it already holds"""
+
+    def __init__(self, path, flush_every=FLUSH_EVERY, fresh=False):
+        self.path = path
+        self.flush_every = flush_every
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        if fresh and os.path.exists(path):
+            os.remove(path)
+
+        self.seen = set()
+        if os.path.exists(path):
+            drop_partial_line(path)
+            for part in read_jsonl(path):
+                self.seen.add(part["part_number"])
+        self.resumed = len(self.seen)
+
+        self.file = open(path, 'a', encoding='utf-8')
+        self.pending = 0
+
+    def __contains__(self, part_number):
+        return part_number in self.seen
+
+    def __len__(self):
+        return len(self.seen)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write(self, part):
+        """Append one part; returns False if its part number is already stored"""
+        if part["part_number"] in self.seen:
+            return False
+        self.file.write(json.dumps(part, ensure_ascii=False) + '\n')
+        self.seen.add(part["part_number"])
+        self.pending += 1
+        if self.pending >= self.flush_every:
+            self.flush()
+        return True
+
+    def flush(self):
+        """Push buffered records to disk"""
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.pending = 0
+
+    def close(self):
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
+
+
+def write_catalog(parts, output_path=SEED_FILE):
+    """
+    Stream parts into a {"parts": [...]} document, formatted like
+    json.dump(indent=2), replacing output_path atomically. Returns the count.
+    """
+    tmp_path = output_path + ".tmp"
+    count = 0
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write('{\n  "parts": [')
+        for part in parts:
+            f.write(',\n' if count else '\n')
+            f.write(textwrap.indent(json.dumps(part, indent=2, ensure_ascii=False), '    '))
+            count += 1
+        f.write('\n  ]\n}' if count else ']\n}')
+    os.replace(tmp_path, output_path)
+    return count
+
+
+def compact(jsonl_path, output_path=SEED_FILE):
+    """Write the backend catalog from a JSONL stream, keeping the first record per part"""
+    def unique_parts():
+        seen = set()
+        for part in read_jsonl(jsonl_path):
+            if part["part_number"] not in seen:
+                seen.add(part["part_number"])
+                yield part
+
+    return write_catalog(unique_parts(), output_path)
+
+
+def summarize(parts):
+    """Counts by type and brand plus price range, in one pass over a part stream"""
+    by_type = Counter()
+    by_brand = Counter()
+    total = 0
+    price_count = 0
+    price_sum = 0.0
+    price_min = price_max = None
+    for part in parts:
+        total += 1
+        by_type[part.get("type")] += 1
+        by_brand[part.get("brand")] += 1
+        price = part.get("price")
+        if price:
+            price_count += 1
+            price_sum += price
+            price_min = price if price_min is None else min(price_min, price)
+            price_max = price if price_max is None else max(price_max, price)
+    return {
+        "total": total,
+        "by_type": by_type,
+        "by_brand": by_brand,
+        "price_min": price_min,
+        "price_max": price_max,
+        "price_avg": price_sum / price_count if price_count else None,
+    }
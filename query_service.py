@@ -0,0 +1,425 @@
+"""
+Catalog Query Service
+Async HTTP/JSON API over the scraped catalog: part lookup, compatibility
+checks, symptom search and keyword search, answered from in-memory indexes
+(build_index.py lookups, the compat_matrix.py bitsets and the
+symptom_search.py BM25 index) instead of a scan of the parts array.
+Substring searches only confirm the parts whose tokens contain every query
+word, and a search that misses the cache runs in a worker thread so it
+never stalls the event loop.
+
+Responses are kept in a bounded LRU cache with a TTL, so a repeated question
+("is PS11752778 compatible with WRS325SDHZ") costs one dictionary lookup.
+The catalog file is polled for changes; a new one is indexed in a worker
+thread and swapped in whole, and the cache is cleared at the same moment.
+
+Endpoints:
+  GET /parts/{part_number}
+  GET /compatibility?part=PS11752778&model=WRS325SDHZ
+  GET /symptoms?q=ice+maker+not+working[&limit=5]
+  GET /search?q=water+filter[&limit=5]
+  GET /health
+
+Usage: python query_service.py [--port 3002] [--catalog backend/data/seedParts.json]
+"""
+
+import argparse
+import asyncio
+import bisect
+import functools
+import heapq
+import json
+import os
+import time
+from collections import OrderedDict
+from itertools import chain, islice
+
+from aiohttp import web
+
+from build_index import WORD, build_index, normalize_number
+from compat_matrix import CompatMatrix
+from part_sink import SEED_FILE
+from symptom_search import SymptomSearch, build_search_index
+
+HOST = "127.0.0.1"
+PORT = 3002
+
+# Result cache bounds: entries kept, and seconds before an entry is recomputed
+CACHE_SIZE = 10_000
+CACHE_TTL = 300.0
+
+# Seconds between checks of the catalog file's mtime
+RELOAD_INTERVAL = 2.0
+
+DEFAULT_LIMIT = 5
+MAX_LIMIT = 50
+
+# Search candidates checked directly before the other query words' postings are used to screen them
+SCREEN_AFTER = 64
+
+# Fields the keyword search matches, same as searchParts in toolExecutor.js
+SEARCH_FIELDS = ("name", "description", "part_number", "symptoms_fixed")
+
+
+class LRUCache:
+    """Bounded least-recently-used cache whose entries expire after `ttl` seconds"""
+
+    def __init__(self, maxsize=CACHE_SIZE, ttl=CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Cached value, or None if absent or expired"""
+        entry = self.entries.get(key)
+        if entry is not None:
+            expires, value = entry
+            if expires > time.monotonic():
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self.entries[key]
+        self.misses += 1
+        return None
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        self.entries[key] = (time.monotonic() + self.ttl, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self.entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {"size": len(self.entries), "maxsize": self.maxsize, "ttl": self.ttl,
+                "hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0}
+
+
+class SubstringIndex:
+    """
+    Token -> ascending positions, plus every token's suffixes in sorted order,
+    so the tokens containing a word are one bisection away instead of a walk
+    over the whole vocabulary
+    """
+
+    def __init__(self, postings):
+        self.postings = postings
+        self.tokens = sorted(postings)
+        pairs = sorted((token[start:], token) for token in postings for start in range(len(token)))
+        self.suffixes = [suffix for suffix, _ in pairs]
+        self.owners = [token for _, token in pairs]
+
+    def tokens_matching(self, word, starts, ends):
+        """Tokens that contain `word`, narrowed to those it starts and/or ends"""
+        if starts and ends:
+            return [word] if word in self.postings else []
+        if starts:
+            keys, values = self.tokens, self.tokens
+        else:
+            keys, values = self.suffixes, self.owners
+        tokens = []
+        position = bisect.bisect_left(keys, word)
+        while position < len(keys) and keys[position].startswith(word):
+            if not ends or keys[position] == word:
+                tokens.append(values[position])
+            position += 1
+        return tokens
+
+    def candidates(self, text):
+        """
+        Ascending positions whose text may contain `text` (a superset). Each
+        word of it lies in some token, and a word with a non-word character on
+        one side must start / end that token, on both sides must be all of it;
+        the postings of the most selective word cover all real matches. None
+        means the text has no words.
+        """
+        groups = []
+        for match in WORD.finditer(text):
+            tokens = set(self.tokens_matching(match.group(), match.start() > 0, match.end() < len(text)))
+            groups.append([self.postings[token] for token in tokens])
+        if not groups:
+            return None
+        groups.sort(key=lambda lists: sum(map(len, lists)))
+        positions = distinct(heapq.merge(*groups[0]))
+        # Most queries are answered from the first few candidates; past those,
+        # screen out positions lacking the next most selective word before checking text
+        return chain(islice(positions, SCREEN_AFTER), screened(positions, groups[1:2]))
+
+
+def screened(positions, groups):
+    """Positions that also appear in each group's postings (sets built on first use)"""
+    for lists in groups:
+        members = set()
+        for postings in lists:
+            members.update(postings)
+        positions = filter(members.__contains__, positions)
+    yield from positions
+
+
+def distinct(positions):
+    """Drop repeats from an ascending stream"""
+    previous = None
+    for position in positions:
+        if position != previous:
+            yield position
+            previous = position
+
+
+class Catalog:
+    """One loaded catalog and the indexes its queries run against"""
+
+    def __init__(self, parts):
+        self.parts = parts
+        self.index = build_index(parts)
+        self.matrix = CompatMatrix.from_parts(parts)
+        self.searcher = SymptomSearch(build_search_index(parts))
+        self.symptom_words = SubstringIndex(self.index["symptom_tokens"])
+        # Lowercased searchable text per part; "\0" keeps a query from matching across fields
+        self.haystacks = ["\0".join(text.lower() for field in SEARCH_FIELDS
+                                    for text in as_list(part.get(field)))
+                          for part in parts]
+        self.symptom_texts = ["\0".join(symptom.lower() for symptom in part.get("symptoms_fixed") or [])
+                              for part in parts]
+        keyword_postings = {}
+        for position, haystack in enumerate(self.haystacks):
+            for token in set(WORD.findall(haystack)):
+                keyword_postings.setdefault(token, []).append(position)
+        self.keywords = SubstringIndex(keyword_postings)
+
+    @classmethod
+    def load(cls, path=SEED_FILE):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f)["parts"])
+
+    def find_part(self, part_number):
+        position = self.index["parts"].get(normalize_number(part_number))
+        return None if position is None else self.parts[position]
+
+    def is_compatible(self, part_number, model):
+        return self.matrix.is_compatible(part_number, model)
+
+    def first_matches(self, words, query, matches, limit):
+        """The first `limit` parts, in catalog order, among `words`' candidates that `matches(position)` confirms"""
+        candidates = words.candidates(query)
+        found = []
+        for position in range(len(self.parts)) if candidates is None else candidates:
+            if matches(position):
+                found.append(self.parts[position])
+                if len(found) >= limit:
+                    break
+        return found
+
+    def troubleshoot(self, query, limit):
+        """Exact symptom phrase matches (same as toolExecutor.js), else parts ranked by BM25"""
+        matches = "\0" not in query and self.first_matches(
+            self.symptom_words, query, lambda position: query in self.symptom_texts[position], limit)
+        if matches:
+            return matches, "exact"
+        return [self.find_part(ps) for ps, _ in self.searcher.search(query, k=limit)], "ranked"
+
+    def keyword_search(self, query, limit):
+        """First `limit` parts whose name, description, number or symptoms contain `query`"""
+        return self.first_matches(self.keywords, query, lambda position: query in self.haystacks[position], limit)
+
+
+def as_list(value):
+    if not value:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def catalog_signature(path):
+    """(mtime, size) of the catalog file, which changes whenever it is rewritten"""
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def json_response(status, payload):
+    return status, json.dumps(payload, ensure_ascii=False).encode('utf-8')
+
+
+def limit_param(request):
+    try:
+        limit = int(request.query.get("limit", DEFAULT_LIMIT))
+    except ValueError:
+        raise web.HTTPBadRequest(text='{"error": "limit must be an integer"}', content_type="application/json")
+    return max(1, min(limit, MAX_LIMIT))
+
+
+class QueryService:
+    """Request handlers, the result cache and catalog hot reload"""
+
+    def __init__(self, catalog_path=SEED_FILE, cache_size=CACHE_SIZE, cache_ttl=CACHE_TTL,
+                 reload_interval=RELOAD_INTERVAL):
+        self.catalog_path = catalog_path
+        self.cache = LRUCache(cache_size, cache_ttl)
+        self.reload_interval = reload_interval
+        self.catalog = None
+        self.signature = None
+        self.loaded_at = None
+        self.reloads = 0
+        # Cache key -> task computing it in a worker thread
+        self.pending = {}
+
+    def load(self):
+        """Load the catalog synchronously (startup)"""
+        self.signature = catalog_signature(self.catalog_path)
+        self.catalog = Catalog.load(self.catalog_path)
+        self.loaded_at = time.strftime("%Y-%m-%dT%H:%M:%S")
+
+    async def watch(self):
+        """Reload the catalog whenever its file changes"""
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            signature = None
+            try:
+                signature = catalog_signature(self.catalog_path)
+                if signature == self.signature:
+                    continue
+                started = time.perf_counter()
+                # Indexing a large catalog takes a while; keep serving the old one meanwhile
+                catalog = await asyncio.to_thread(Catalog.load, self.catalog_path)
+            except (OSError, ValueError, KeyError) as e:
+                if signature != self.signature:
+                    print(f"⚠️  Catalog reload failed, still serving the previous one: {type(e).__name__}: {e}")
+                # Retried once the file changes again
+                self.signature = signature
+                continue
+            self.catalog, self.signature = catalog, signature
+            self.cache.clear()
+            self.loaded_at = time.strftime("%Y-%m-%dT%H:%M:%S")
+            self.reloads += 1
+            print(f"🔄 Reloaded {len(catalog.parts)} parts from {self.catalog_path} "
+                  f"in {time.perf_counter() - started:.2f}s")
+
+    async def respond(self, key, compute, offload=False):
+        """
+        Serve `key` from the cache, computing and caching (status, body) on a
+        miss. Offloaded misses run in a worker thread so searches don't hold
+        up the event loop, and concurrent requests for the same key share one.
+        """
+        result = self.cache.get(key)
+        if result is None and not offload:
+            result = compute(self.catalog)
+            self.cache.put(key, result)
+        elif result is None:
+            task = self.pending.get(key)
+            if task is None:
+                task = self.pending[key] = asyncio.ensure_future(asyncio.to_thread(compute, self.catalog))
+                task.add_done_callback(functools.partial(self.finish, key, self.catalog))
+            # Shielded: one client hanging up must not cancel the others' answer
+            result = await asyncio.shield(task)
+        status, body = result
+        return web.Response(status=status, body=body, content_type="application/json")
+
+    def finish(self, key, catalog, task):
+        if self.pending.get(key) is task:
+            del self.pending[key]
+        # Answers computed against a catalog that has since been reloaded are not kept
+        if not task.cancelled() and task.exception() is None and catalog is self.catalog:
+            self.cache.put(key, task.result())
+
+    async def part(self, request):
+        part_number = request.match_info["part_number"]
+
+        def compute(catalog):
+            part = catalog.find_part(part_number)
+            if part is None:
+                return json_response(404, {"error": "Part not found", "part_number": part_number})
+            return json_response(200, {"part": part})
+
+        return await self.respond(("part", normalize_number(part_number)), compute)
+
+    async def compatibility(self, request):
+        part_number = request.query.get("part", "").strip()
+        model = request.query.get("model", "").strip()
+        if not part_number or not model:
+            status, body = json_response(400, {"error": "Both part number and model number are required"})
+            return web.Response(status=status, body=body, content_type="application/json")
+
+        def compute(catalog):
+            part = catalog.find_part(part_number)
+            if part is None:
+                return json_response(404, {"error": "Part not found", "part_number": part_number})
+            return json_response(200, {"part": part, "model_number": model,
+                                       "is_compatible": catalog.is_compatible(part_number, model),
+                                       "compatible_models": part.get("compatible_models") or []})
+
+        return await self.respond(("compatibility", normalize_number(part_number), normalize_number(model)), compute)
+
+    async def symptoms(self, request):
+        query = " ".join(request.query.get("q", "").lower().split())
+        limit = limit_param(request)
+
+        def compute(catalog):
+            parts, match = catalog.troubleshoot(query, limit) if query else ([], "exact")
+            return json_response(200, {"symptom": query, "match": match, "parts": parts})
+
+        return await self.respond(("symptoms", query, limit), compute, offload=True)
+
+    async def search(self, request):
+        query = " ".join(request.query.get("q", "").lower().split())
+        limit = limit_param(request)
+
+        def compute(catalog):
+            return json_response(200, {"query": query, "parts": catalog.keyword_search(query, limit) if query else []})
+
+        return await self.respond(("search", query, limit), compute, offload=True)
+
+    async def health(self, request):
+        return web.json_response({"status": "ok", "parts": len(self.catalog.parts), "catalog": self.catalog_path,
+                                  "loaded_at": self.loaded_at, "reloads": self.reloads,
+                                  "in_flight": len(self.pending), "cache": self.cache.stats()})
+
+
+def make_app(service):
+    """aiohttp application for a loaded QueryService, with the reload watcher attached"""
+    app = web.Application()
+    app.router.add_get("/parts/{part_number}", service.part)
+    app.router.add_get("/compatibility", service.compatibility)
+    app.router.add_get("/symptoms", service.symptoms)
+    app.router.add_get("/search", service.search)
+    app.router.add_get("/health", service.health)
+
+    async def watcher(app):
+        task = asyncio.create_task(service.watch())
+        yield
+        task.cancel()
+
+    app.cleanup_ctx.append(watcher)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve catalog queries over HTTP with a result cache")
+    parser.add_argument('--catalog', default=SEED_FILE)
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--cache-size', type=int, default=CACHE_SIZE,
+                        help="cached responses kept, 0 to disable (default: %(default)s)")
+    parser.add_argument('--cache-ttl', type=float, default=CACHE_TTL,
+                        help="seconds a cached response stays valid (default: %(default)s)")
+    parser.add_argument('--reload-interval', type=float, default=RELOAD_INTERVAL,
+                        help="seconds between catalog change checks (default: %(default)s)")
+    args = parser.parse_args()
+
+    service = QueryService(args.catalog, args.cache_size, args.cache_ttl, args.reload_interval)
+    started = time.perf_counter()
+    service.load()
+    print(f"📚 Loaded {len(service.catalog.parts)} parts from {args.catalog} "
+          f"in {time.perf_counter() - started:.2f}s")
+    print(f"🚀 Query service on http://{args.host}:{args.port} (GET /health for cache stats)")
+    web.run_app(make_app(service), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,15 +3,29 @@ PartSelect Product Scraper
 Scrapes refrigerator and dishwasher parts from partselect.com
 """
 
-import requests
-from bs4 import BeautifulSoup
-import json
+import argparse
+import os
 import time
 import re
 from urllib.parse import urljoin
 
+from catalog_merge import merge_catalog
+from fetch import fetch
+from html_parsing import LISTING_STRAINER, make_soup
+from crawl_state import CrawlState
+from part_sink import SCRAPED_DIR, SEED_FILE, JsonlSink, read_jsonl, summarize
+
 BASE_URL = "https://www.partselect.com"
 
+# Parts are streamed to JSONL as they are scraped, then compacted into the seed file
+JSONL_FILE = os.path.join(SCRAPED_DIR, "listing.jsonl")
+OUTPUT_FILE = SEED_FILE
+
+# Which listing pages are done / failed / waiting to retry
+STATE_FILE = os.path.join(SCRAPED_DIR, "listing.state.sqlite3")
+
+TOP_PARTS_URL = "/refrigerator-parts.htm"
+
 # Categories to scrape
 CATEGORIES = {
     "refrigerator": [
@@ -26,15 +40,13 @@ CATEGORIES = {
     ]
 }
 
-def get_soup(url):
+def get_soup(url, strainer=None):
     """Fetch and parse a URL"""
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
-    }
     try:
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        return BeautifulSoup(response.content, 'html.parser')
+        page = fetch(url, timeout=10)
+        if page.status >= 400:
+            raise Exception(f"HTTP {page.status}")
+        return make_soup(page.content, strainer)
     except Exception as e:
         print(f"Error fetching {url}: {e}")
         return None
@@ -46,12 +58,12 @@ def extract_part_number(text):
     return match.group(1) if match else None
 
 def scrape_product_listing(category_url, appliance_type):
-    """Scrape products from a category listing page"""
+    """Scrape products from a category listing page (None if the page could not be fetched)"""
     print(f"Scraping {category_url}...")
     
-    soup = get_soup(urljoin(BASE_URL, category_url))
+    soup = get_soup(urljoin(BASE_URL, category_url), LISTING_STRAINER)
     if not soup:
-        return []
+        return None
     
     products = []
     
@@ -115,12 +127,12 @@ def scrape_product_listing(category_url, appliance_type):
     return products
 
 def scrape_top_parts():
-    """Scrape top/popular parts from main page"""
+    """Scrape top/popular parts from main page (None if the page could not be fetched)"""
     print("Scraping popular parts from main page...")
     
-    soup = get_soup(f"{BASE_URL}/refrigerator-parts.htm")
+    soup = get_soup(urljoin(BASE_URL, TOP_PARTS_URL), LISTING_STRAINER)
     if not soup:
-        return []
+        return None
     
     products = []
     
@@ -227,50 +239,66 @@ def generate_installation_steps(appliance_type):
 
 def main():
     """Main scraping function"""
+    parser = argparse.ArgumentParser(description="Scrape PartSelect category listings")
+    parser.add_argument('--fresh', action='store_true',
+                        help="discard the previous run's JSONL and scrape everything again")
+    args = parser.parse_args()
+    
     print("Starting PartSelect scraper...")
     print("=" * 60)
     
-    all_products = []
+    # Every listing page is a task, so an interrupted run picks up where it stopped
+    state = CrawlState(STATE_FILE, fresh=args.fresh)
+    pages = [{"url": TOP_PARTS_URL, "type": "refrigerator", "top_parts": True}]
+    pages += [{"url": url, "type": appliance_type}
+              for appliance_type, urls in CATEGORIES.items() for url in urls]
+    state.add_many(pages, key=lambda page: page["url"])
+    state.release_stale()
     
-    # Try to scrape popular parts first
-    popular = scrape_top_parts()
-    all_products.extend(popular)
-    
-    # Scrape category pages
-    for appliance_type, urls in CATEGORIES.items():
-        for url in urls:
-            products = scrape_product_listing(url, appliance_type)
-            all_products.extend(products)
-            time.sleep(1)  # Be nice to the server
+    with JsonlSink(JSONL_FILE, fresh=args.fresh) as sink:
+        if sink.resumed:
+            print(f"Resuming: {sink.resumed} products already scraped")
+        
+        def save_new(products):
+            # The sink skips part numbers it already holds, keeping the first record
+            new_products = [p for p in products if p["part_number"] not in sink]
+            for product in generate_mock_details(new_products):
+                sink.write(product)
+        
+        while True:
+            batch = state.claim(1)
+            if not batch:
+                break
+            page = batch[0]
+            
+            # Try to scrape popular parts first, then the category pages
+            if page.get("top_parts"):
+                products = scrape_top_parts()
+            else:
+                products = scrape_product_listing(page["url"], page["type"])
+                time.sleep(1)  # Be nice to the server
+            
+            if products is None:
+                state.mark_failed(page["url"], "page could not be fetched")
+                continue
+            save_new(products)
+            sink.flush()
+            state.mark_done(page["url"])
     
-    # Remove duplicates based on part number
-    seen = set()
-    unique_products = []
-    for product in all_products:
-        if product["part_number"] not in seen:
-            seen.add(product["part_number"])
-            unique_products.append(product)
+    state.close()
     
-    # Add mock details
-    unique_products = generate_mock_details(unique_products)
+    # Merge this and the other scrapers' JSONL streams into the catalog the backend loads
+    count = merge_catalog(output_path=OUTPUT_FILE)
+    stats = summarize(read_jsonl(JSONL_FILE))
     
     print("=" * 60)
-    print(f"Total unique products scraped: {len(unique_products)}")
-    
-    # Save to JSON
-    output = {"parts": unique_products}
+    print(f"Total unique products scraped: {count}")
     
-    with open('backend/data/seedParts.json', 'w') as f:
-        json.dump(output, f, indent=2)
-    
-    print(f"✅ Saved {len(unique_products)} products to backend/data/seedParts.json")
+    print(f"✅ Saved {count} products to {OUTPUT_FILE}")
     
     # Print summary
-    refrigerator_count = sum(1 for p in unique_products if p["type"] == "refrigerator")
-    dishwasher_count = sum(1 for p in unique_products if p["type"] == "dishwasher")
-    
-    print(f"   - Refrigerator parts: {refrigerator_count}")
-    print(f"   - Dishwasher parts: {dishwasher_count}")
+    print(f"   - Refrigerator parts: {stats['by_type']['refrigerator']}")
+    print(f"   - Dishwasher parts: {stats['by_type']['dishwasher']}")
 
 if __name__ == "__main__":
     main()
@@ -3,15 +3,56 @@ Comprehensive PartSelect Scraper
 Scrapes actual products from PartSelect.com using known popular part numbers
 """
 
-import requests
-from bs4 import BeautifulSoup
-import json
-import time
+import argparse
+import asyncio
+import functools
+import os
 import re
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from catalog_merge import merge_catalog
+from crawl_engine import CrawlEngine
+from crawl_metrics import CrawlMetrics, merge_profiles, profiled
+from crawl_pipeline import Finished, run_pipeline
+from crawl_state import DONE, FAILED, PENDING, RETRY_AFTER, CrawlState
+from discovery import discover_parts
+from fetch import fetch
+from fingerprints import REPORT_FILE, FingerprintStore, page_fingerprint
+from part_sink import SCRAPED_DIR, SEED_FILE, JsonlSink, read_jsonl, summarize
+from scraper import CATEGORIES
+from structured_data import extract_fields
+from url_resolver import CACHE_FILE as URL_CACHE_FILE, UrlResolver
 
 BASE_URL = "https://www.partselect.com"
 
+# Crawl throttling: requests/sec to partselect.com, and the most requests in
+# flight the engine's adaptive limit may grow to (it starts low, ramps up while
+# the site answers quickly and backs off on 429/503/timeouts)
+RATE_PER_HOST = 2.0
+MAX_CONCURRENCY = 16
+
+# Parse stage: worker processes and how many downloaded pages may wait for them
+PARSE_WORKERS = os.cpu_count() or 2
+PARSE_QUEUE_SIZE = 64
+
+# Parts are streamed to JSONL as they are scraped, then compacted into the seed file
+JSONL_FILE = os.path.join(SCRAPED_DIR, "comprehensive.jsonl")
+OUTPUT_FILE = SEED_FILE
+
+# Stage timings, status/error counters and throughput, written after every run
+METRICS_FILE = os.path.join(SCRAPED_DIR, "comprehensive.metrics.json")
+
+# Per-part progress (pending / done / failed / retry-after) survives restarts
+STATE_FILE = os.path.join(SCRAPED_DIR, "comprehensive.state.sqlite3")
+CLAIM_BATCH = 200
+
+# Part page URL formats, tried in this order until the resolver learns better
+URL_PATTERNS = {
+    "ps": "{base}/{ps}.htm",
+    "ps_brand_mfr": "{base}/{ps}-{brand}-{mfr}.htm",
+}
+
 # Comprehensive list of popular refrigerator and dishwasher parts
 KNOWN_PARTS = [
     # Whirlpool Refrigerator Parts
@@ -82,215 +123,321 @@ KNOWN_PARTS = [
     {"ps": "PS11722262", "mfr": "WD28X26008", "brand": "GE", "type": "dishwasher"},
 ]
 
-def scrape_part_detail(part_info):
-    """Scrape detailed information from a part page"""
+def part_urls(part_info, resolver=None):
+    """Candidate (pattern, url) pairs for a part page, in the order they should be tried"""
+    if resolver:
+        return resolver.candidates(part_info, BASE_URL)
+    return [(name, pattern.format(base=BASE_URL, ps=part_info["ps"], brand=part_info["brand"], mfr=part_info["mfr"]))
+            for name, pattern in URL_PATTERNS.items()]
+
+def parse_part_detail(content, part_info, url, soup=None):
+    """Build a part dict from the HTML of a part page (or an already-parsed soup)"""
+    # JSON-LD / microdata first; one walk of the DOM (built only if needed)
+    # feeds the field extractors for whatever the page didn't declare
+    fields, _ = extract_fields(content, part_info["ps"], part_info["mfr"], soup)
+    return part_from_fields(fields, part_info, url)
+
+def part_from_fields(fields, part_info, url):
+    """Part dict from extracted fields, with defaults for the ones the page lacked"""
     ps = part_info["ps"]
     mfr = part_info["mfr"]
     brand = part_info["brand"]
     part_type = part_info["type"]
     
-    # Try multiple URL formats
-    url_formats = [
-        f"{BASE_URL}/{ps}.htm",
-        f"{BASE_URL}/{ps}-{brand}-{mfr}.htm",
-    ]
+    name = fields["name"]
+    price = fields["price"]
+    description = fields["description"]
+    symptoms = fields["symptoms"]
+    models = fields["models"]
+    install_steps = fields["install_steps"]
     
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-        'Accept-Language': 'en-US,en;q=0.5',
-        'Connection': 'keep-alive',
+    # Create part object
+    part_data = {
+        "part_number": ps,
+        "manufacturer_part_number": mfr,
+        "name": name if name else f"{brand} {part_type.title()} Part",
+        "type": part_type,
+        "brand": brand,
+        "price": round(price, 2) if price > 0 else None,
+        "description": description if description else f"Genuine OEM {brand} replacement part for {part_type}s.",
+        "compatible_models": models if models else [],
+        "symptoms_fixed": symptoms if symptoms else [],
+        "install_instructions": "\n".join([f"{i+1}. {s}" for i, s in enumerate(install_steps)]) if install_steps else "",
+        "image_url": f"{BASE_URL}/images/part/{ps}.jpg",
+        "product_url": url
     }
     
-    for url in url_formats:
+    return part_data
+
+def parse_part_stage(content, part_info, url, profile_path=None):
+    """
+    parse_part_detail with extract_fields' step timings; returns (part_data,
+    timings). Pages the structured data fast path served in full have no
+    parse or extract timing: no DOM was built for them. A "reparse" timing
+    means the strained tree lost a section and the whole page was parsed for it.
+    """
+    timings = {}
+    with profiled(profile_path):
+        fields, _ = extract_fields(content, part_info["ps"], part_info["mfr"], timings=timings)
+        part_data = part_from_fields(fields, part_info, url)
+    return part_data, timings
+
+def record_timings(metrics, timings):
+    for stage, seconds in timings.items():
+        metrics.observe(stage, seconds)
+    if "parse" not in timings:
+        metrics.count("structured_only")
+
+class FetchFailed(RuntimeError):
+    """Every URL for a part failed, at least one of them with a possibly transient error"""
+
+def resolve_url(resolver, part_info, pattern, page):
+    """Teach the URL resolver from a fetched page"""
+    if page.status == 200:
+        resolver.record(part_info, pattern, page.url)
+    elif page.status == 404 and pattern == "cached":
+        resolver.invalidate(part_info["ps"])
+
+def scrape_part_detail(part_info, resolver=None, fingerprints=None, metrics=None):
+    """Scrape detailed information from a part page (reusing the last result if it is unchanged)"""
+    ps = part_info["ps"]
+    
+    # Try multiple URL formats
+    for pattern, url in part_urls(part_info, resolver):
         try:
-            response = requests.get(url, headers=headers, timeout=15)
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
-                # Extract part name from title or h1
-                name = ""
-                title_tag = soup.find('title')
-                if title_tag:
-                    title_text = title_tag.get_text()
-                    # Parse "Ice Maker Assembly WPW10873791" format
-                    name = title_text.split('|')[0].strip()
-                    name = re.sub(r'\s+' + re.escape(mfr) + r'.*', '', name)
-                    name = re.sub(r'\s+' + re.escape(ps) + r'.*', '', name)
-                    name = name.strip()
-                
-                if not name:
-                    h1 = soup.find('h1')
-                    if h1:
-                        name = h1.get_text(strip=True)
-                        name = re.sub(r'\s+' + re.escape(mfr) + r'.*', '', name)
-                
-                # Extract price
-                price = 0.0
-                price_patterns = [
-                    soup.find('span', class_='price'),
-                    soup.find('div', class_='price'),
-                    soup.find('span', itemprop='price'),
-                    soup.find('meta', {'property': 'product:price:amount'})
-                ]
-                
-                for price_elem in price_patterns:
-                    if price_elem:
-                        if price_elem.name == 'meta':
-                            price_text = price_elem.get('content', '')
-                        else:
-                            price_text = price_elem.get_text(strip=True)
-                        
-                        price_match = re.search(r'\$?([\d,]+\.?\d*)', price_text)
-                        if price_match:
-                            price = float(price_match.group(1).replace(',', ''))
-                            if price > 0:
-                                break
-                
-                # Extract description
-                description = ""
-                desc_selectors = [
-                    soup.find('div', class_='product-description'),
-                    soup.find('div', itemprop='description'),
-                    soup.find('div', class_='description'),
-                    soup.find('p', class_='description')
-                ]
-                
-                for desc_elem in desc_selectors:
-                    if desc_elem:
-                        desc_text = desc_elem.get_text(strip=True)
-                        if len(desc_text) > 50:
-                            description = desc_text[:800]
-                            break
-                
-                # Extract symptoms
-                symptoms = []
-                symptoms_text = soup.find(string=re.compile(r'fixes? the following symptoms?', re.I))
-                if symptoms_text:
-                    parent = symptoms_text.find_parent()
-                    if parent:
-                        for li in parent.find_all('li'):
-                            symptom = li.get_text(strip=True).replace('•', '').strip().lower()
-                            if symptom and len(symptom) > 5:
-                                symptoms.append(symptom)
-                
-                # If no symptoms found, try alternative method
-                if not symptoms:
-                    for elem in soup.find_all(string=re.compile(r'symptom|problem|issue', re.I)):
-                        parent = elem.find_parent()
-                        if parent:
-                            for li in parent.find_all('li')[:5]:
-                                symptom = li.get_text(strip=True).replace('•', '').strip().lower()
-                                if symptom and len(symptom) > 5:
-                                    symptoms.append(symptom)
-                            if symptoms:
-                                break
-                
-                # Extract compatible models
-                models = []
-                models_text = soup.find(string=re.compile(r'works? with.*following|compatible.*model', re.I))
-                if models_text:
-                    parent = models_text.find_parent()
-                    if parent:
-                        # Look for model links or list items
-                        for link in parent.find_all('a', href=re.compile(r'/Models/'))[:15]:
-                            model = link.get_text(strip=True)
-                            if model and len(model) > 3:
-                                models.append(model)
-                
-                # Extract installation instructions
-                install_steps = []
-                install_headers = soup.find_all(string=re.compile(r'installation|how to (install|replace)', re.I))
-                for header in install_headers:
-                    parent = header.find_parent()
-                    if parent:
-                        ol = parent.find_next('ol')
-                        if ol:
-                            for idx, li in enumerate(ol.find_all('li')[:15], 1):
-                                step_text = li.get_text(strip=True)
-                                if step_text:
-                                    install_steps.append(step_text)
-                            break
-                
-                # Create part object
-                part_data = {
-                    "part_number": ps,
-                    "manufacturer_part_number": mfr,
-                    "name": name if name else f"{brand} {part_type.title()} Part",
-                    "type": part_type,
-                    "brand": brand,
-                    "price": round(price, 2) if price > 0 else None,
-                    "description": description if description else f"Genuine OEM {brand} replacement part for {part_type}s.",
-                    "compatible_models": models if models else [],
-                    "symptoms_fixed": symptoms if symptoms else [],
-                    "install_instructions": "\n".join([f"{i+1}. {s}" for i, s in enumerate(install_steps)]) if install_steps else "",
-                    "image_url": f"{BASE_URL}/images/part/{ps}.jpg",
-                    "product_url": url
-                }
-                
-                print(f"✅ {ps}: {name[:40]} - ${price}")
+            start = time.perf_counter()
+            page = fetch(url, timeout=15)
+            if metrics:
+                metrics.observe("fetch", time.perf_counter() - start)
+                metrics.count_status(page.status)
+            if resolver:
+                resolve_url(resolver, part_info, pattern, page)
+            if page.status == 200:
+                fingerprint = page_fingerprint(page.content, part_info, url) if fingerprints else None
+                part_data = fingerprints.lookup(ps, fingerprint) if fingerprints else None
+                if part_data is None:
+                    part_data, timings = parse_part_stage(page.content, part_info, url)
+                    if metrics:
+                        record_timings(metrics, timings)
+                if fingerprints:
+                    fingerprints.record(ps, fingerprint, part_data)
+                if metrics:
+                    metrics.count("pages")
+                print(f"✅ {ps}: {part_data['name'][:40]} - ${part_data['price']}")
                 return part_data
                 
         except Exception as e:
+            # Try the next URL format, but keep a count of what went wrong
+            if metrics:
+                metrics.count_error(e)
             continue
     
     print(f"❌ {ps}: Failed to scrape")
     return None
 
+async def fetch_part_page(engine, part_info, resolver=None):
+    """
+    Download a part page through the async crawl engine; returns (content, url),
+    None if every URL is gone (404/410), or raises if a failure may be transient
+    """
+    last_error = None
+    for pattern, url in part_urls(part_info, resolver):
+        try:
+            page = await engine.fetch(url)
+            if resolver:
+                resolve_url(resolver, part_info, pattern, page)
+            if page.status == 200:
+                return page.content, url
+            if page.status not in (404, 410):
+                last_error = f"HTTP {page.status} for {url}"
+                
+        except Exception as e:
+            last_error = f"{type(e).__name__}: {e}"
+            continue
+    
+    if last_error:
+        raise FetchFailed(last_error)
+    return None
+
+async def crawl_parts(state, sink, fingerprints, metrics, profile_path=None, rate=RATE_PER_HOST, resolver=None):
+    """
+    Scrape every due part in the crawl state: rate-limited async downloads feeding
+    a process-pool parse stage. Work is claimed from the state store in batches;
+    one pool of parse workers serves them all.
+    Pages whose fingerprint matches the last run skip the parse stage.
+    Without a resolver the URL patterns are tried in their declared order.
+    """
+    scraped = 0
+    failed = 0
+    
+    page_fingerprints = {}
+    
+    async def fetch_stage(engine, part_info):
+        page = await fetch_part_page(engine, part_info, resolver)
+        if page is None:
+            return None
+        content, url = page
+        fingerprint = page_fingerprint(content, part_info, url)
+        page_fingerprints[part_info["ps"]] = fingerprint
+        previous = fingerprints.lookup(part_info["ps"], fingerprint)
+        return page if previous is None else Finished(previous)
+    
+    parse_stage = functools.partial(parse_part_stage, profile_path=profile_path)
+    engine = CrawlEngine(rate_per_host=rate, concurrency=MAX_CONCURRENCY, metrics=metrics)
+    pool = ProcessPoolExecutor(max_workers=PARSE_WORKERS)
+    try:
+        async with engine:
+            while True:
+                batch = state.claim(CLAIM_BATCH)
+                if not batch:
+                    break
+                
+                pipeline = run_pipeline(engine, pool, batch, fetch_stage, parse_stage,
+                                        parse_workers=PARSE_WORKERS, queue_size=PARSE_QUEUE_SIZE)
+                async for part_info, part_data in pipeline:
+                    ps = part_info["ps"]
+                    fingerprint = page_fingerprints.pop(ps, None)
+                    if isinstance(part_data, tuple):
+                        part_data, timings = part_data
+                        record_timings(metrics, timings)
+                    elif isinstance(part_data, dict):
+                        metrics.count("reused")
+                    elif isinstance(part_data, Exception) and not isinstance(part_data, FetchFailed):
+                        # Parse errors (fetch errors were counted by the engine)
+                        metrics.count_error(part_data)
+                    
+                    if isinstance(part_data, dict):
+                        metrics.count("pages")
+                        fingerprints.record(ps, fingerprint, part_data)
+                        sink.write(part_data)
+                        state.mark_done(ps)
+                        scraped += 1
+                        print(f"✅ {ps}: {part_data['name'][:40]} - ${part_data['price']}")
+                    else:
+                        # None means the page is gone; exceptions may clear up later
+                        permanent = part_data is None
+                        if permanent:
+                            fingerprints.record_gone(ps)
+                        metrics.count("gone" if permanent else "failed")
+                        status = state.mark_failed(ps, part_data or "not found", permanent=permanent)
+                        failed += 1
+                        print(f"❌ {ps}: Failed to scrape ({status})")
+                sink.flush()
+            
+            for host, limit in engine.limits.items():
+                print(f"\n🎚️  {host}: settled at {limit.allowed} requests in flight "
+                      f"({limit.increases} ramp-ups, {limit.decreases} backoffs)")
+    finally:
+        pool.shutdown()
+        if resolver:
+            resolver.save()
+        sink.flush()
+    
+    return scraped, failed
+
 def main():
+    parser = argparse.ArgumentParser(description="Scrape KNOWN_PARTS from PartSelect")
+    parser.add_argument('--fresh', action='store_true',
+                        help="discard the previous run's JSONL and scrape every part again")
+    parser.add_argument('--discover', action='store_true',
+                        help="crawl the category pages for more parts before scraping")
+    parser.add_argument('--max-pages', type=int, default=None,
+                        help="stop discovery after this many listing pages")
+    parser.add_argument('--metrics', default=METRICS_FILE,
+                        help="where to write run metrics: Prometheus text if it ends in .prom, else JSON")
+    parser.add_argument('--rate', type=float, default=RATE_PER_HOST,
+                        help="requests/sec ceiling per host (default: %(default)s); "
+                             "concurrency below it adapts to how the site responds")
+    parser.add_argument('--profile', metavar='PATH', default=None,
+                        help="cProfile the parse stage and write the merged stats here")
+    args = parser.parse_args()
+    
     print("=" * 70)
     print("COMPREHENSIVE PARTSELECT SCRAPER")
     print("=" * 70)
-    print(f"\nScraping {len(KNOWN_PARTS)} parts...\n")
     
-    all_parts = []
-    failed = 0
+    state = CrawlState(STATE_FILE, fresh=args.fresh)
+    state.add_many(KNOWN_PARTS, key=lambda part: part["ps"])
+    state.release_stale()
+    
+    if args.discover:
+        # Every PS number found on the listing pages becomes a pending task
+        print(f"\n🔎 Discovering parts from {sum(len(urls) for urls in CATEGORIES.values())} category pages...\n")
+        pages, found = discover_parts(CATEGORIES,
+                                      lambda parts: state.add_many(parts, key=lambda part: part["ps"]),
+                                      fresh=args.fresh, max_pages=args.max_pages)
+        print(f"\n🔎 Discovery crawled {pages} pages and found {found} parts")
+    
+    fingerprints = FingerprintStore()
+    metrics = CrawlMetrics("comprehensive")
+    if args.profile:
+        merge_profiles(args.profile)  # clear leftovers from an interrupted run
     
-    # Use threading for faster scraping
-    with ThreadPoolExecutor(max_workers=5) as executor:
-        future_to_part = {executor.submit(scrape_part_detail, part): part for part in KNOWN_PARTS}
+    with JsonlSink(JSONL_FILE, fresh=args.fresh) as sink:
+        # Resume: parts done in an earlier run are not fetched again
+        state.mark_done_many(sink.seen)
+        counts = state.counts()
+        if sink.resumed or counts.get(FAILED):
+            print(f"\n↪️  Resuming: {counts.get(DONE, 0)} parts done, "
+                  f"{counts.get(FAILED, 0)} failed permanently")
+        print(f"\nScraping {counts.get(PENDING, 0) + counts.get(RETRY_AFTER, 0)} parts...\n")
         
-        for future in as_completed(future_to_part):
-            part_data = future.result()
-            if part_data:
-                all_parts.append(part_data)
-            else:
-                failed += 1
-            
-            # Small delay to be respectful
-            time.sleep(0.5)
+        # Async crawl; the engine's token bucket keeps the request rate polite
+        resolver = UrlResolver(URL_PATTERNS, path=URL_CACHE_FILE)
+        scraped, failed = asyncio.run(crawl_parts(state, sink, fingerprints, metrics, args.profile, args.rate,
+                                                  resolver=resolver))
+    metrics.finish()
+    
+    waiting = state.counts().get(RETRY_AFTER, 0)
+    state.close()
+    report = fingerprints.write_report()
+    fingerprints.close()
     
     print("\n" + "=" * 70)
     print(f"SCRAPING COMPLETE")
     print("=" * 70)
-    print(f"✅ Successfully scraped: {len(all_parts)} parts")
+    print(f"✅ Successfully scraped: {scraped} parts")
     print(f"❌ Failed to scrape: {failed} parts")
+    if waiting:
+        print(f"⏳ Waiting to retry: {waiting} parts (run again later)")
+    print(f"🧾 Changes: {len(report['added'])} added, {len(report['changed'])} changed, "
+          f"{len(report['removed'])} removed, {report['unchanged']} unchanged "
+          f"({report['reused_without_parsing']} pages reused without parsing) -> {REPORT_FILE}")
+    if report['added'] or report['changed'] or report['removed']:
+        print(f"   Apply with: python enhance_data.py --changes {REPORT_FILE}")
     
-    # Statistics
-    fridge_parts = [p for p in all_parts if p['type'] == 'refrigerator']
-    dish_parts = [p for p in all_parts if p['type'] == 'dishwasher']
-    whirlpool_parts = [p for p in all_parts if p['brand'] == 'Whirlpool']
-    ge_parts = [p for p in all_parts if p['brand'] == 'GE']
+    # Where the time went: stage timings, statuses, errors, throughput
+    metrics.write(args.metrics)
+    print()
+    for line in metrics.report_lines():
+        print(line)
+    parsed = metrics.stages["structured"].count if "structured" in metrics.stages else 0
+    if parsed:
+        print(f"   Structured data fast path: {metrics.events['structured_only']}/{parsed} pages "
+              f"served without building a DOM")
+    print(f"   Metrics: {args.metrics}")
+    if args.profile:
+        stats = merge_profiles(args.profile)
+        if stats:
+            print(f"\n🔬 Parse stage profile: {args.profile} (top functions by cumulative time)")
+            stats.sort_stats('cumulative').print_stats(15)
     
-    prices = [p['price'] for p in all_parts if p['price']]
+    # Statistics (streamed from the JSONL, not held in memory)
+    stats = summarize(read_jsonl(JSONL_FILE))
     
     print(f"\n📊 Statistics:")
-    print(f"   Refrigerator parts: {len(fridge_parts)}")
-    print(f"   Dishwasher parts: {len(dish_parts)}")
-    print(f"   Whirlpool parts: {len(whirlpool_parts)}")
-    print(f"   GE parts: {len(ge_parts)}")
-    if prices:
-        print(f"   Price range: ${min(prices):.2f} - ${max(prices):.2f}")
-        print(f"   Average price: ${sum(prices)/len(prices):.2f}")
-    
-    # Save to JSON
-    output_file = "backend/data/seedParts.json"
-    output_data = {"parts": all_parts}
+    print(f"   Refrigerator parts: {stats['by_type']['refrigerator']}")
+    print(f"   Dishwasher parts: {stats['by_type']['dishwasher']}")
+    print(f"   Whirlpool parts: {stats['by_brand']['Whirlpool']}")
+    print(f"   GE parts: {stats['by_brand']['GE']}")
+    if stats['price_avg'] is not None:
+        print(f"   Price range: ${stats['price_min']:.2f} - ${stats['price_max']:.2f}")
+        print(f"   Average price: ${stats['price_avg']:.2f}")
     
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(output_data, f, indent=2, ensure_ascii=False)
+    # Merge this and the other scrapers' JSONL streams into the catalog the backend loads
+    count = merge_catalog(output_path=OUTPUT_FILE)
     
-    print(f"\n💾 Saved to: {output_file}")
+    print(f"\n💾 Saved {count} parts to: {OUTPUT_FILE}")
     print("=" * 70)
 
 if __name__ == "__main__":
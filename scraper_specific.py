@@ -3,14 +3,32 @@ PartSelect Product Scraper - Specific Parts
 Scrapes specific known refrigerator and dishwasher parts from partselect.com
 """
 
-import requests
-from bs4 import BeautifulSoup
-import json
+import argparse
+import os
 import time
 import re
+from concurrent.futures import ThreadPoolExecutor
+
+from catalog_merge import merge_catalog
+from crawl_metrics import CrawlMetrics
+from fetch import fetch, host_of, limit_for
+from html_parsing import make_soup, part_page_soup
+from part_sink import SCRAPED_DIR, SEED_FILE, JsonlSink, read_jsonl, summarize
 
 BASE_URL = "https://www.partselect.com"
 
+# Parts are streamed to JSONL as they are scraped, then compacted into the seed file
+JSONL_FILE = os.path.join(SCRAPED_DIR, "specific.jsonl")
+OUTPUT_FILE = SEED_FILE
+
+# Stage timings, status/error counters and throughput, written after every run
+METRICS_FILE = os.path.join(SCRAPED_DIR, "specific.metrics.json")
+
+# Worker threads; fetch() holds them all to its per-host token bucket
+# (RATE_PER_HOST requests/sec), and its adaptive per-host limit decides how
+# many actually have a request in flight (starting at 2, backing off on 429/503)
+MAX_WORKERS = 16
+
 # Specific parts to scrape - known working part numbers
 PARTS_TO_SCRAPE = [
     {"ps": "PS11752778", "mfr": "W10873791", "name": "Ice Maker Assembly", "type": "refrigerator", "brand": "Whirlpool"},
@@ -35,141 +53,212 @@ PARTS_TO_SCRAPE = [
     {"ps": "PS11739091", "mfr": "WP2255499", "name": "Door Shelf Bin", "type": "refrigerator", "brand": "Whirlpool"},
 ]
 
-def scrape_part(part_info):
-    """Scrape a specific part page"""
+# Section headings the extractors look for
+SYMPTOMS_HEADING = re.compile('fixes the following symptoms', re.I)
+MODELS_HEADING = re.compile('works with the following', re.I)
+INSTALL_HEADING = re.compile('installation', re.I)
+
+# The elements parse_sections() finds those headings in - a <div> or <h2>/<h3>
+# holding nothing but the heading text - matched in the lowercased page bytes.
+# A bare "installation" is in nearly every page's menus and footer; only these
+# elements mean a section the strainer may have dropped.
+SECTION_CONTAINERS = (
+    re.compile(rb'<div\b[^>]*>[^<]*fixes the following symptoms[^<]*</div'),
+    re.compile(rb'<div\b[^>]*>[^<]*works with the following[^<]*</div'),
+    re.compile(rb'<h([23])\b[^>]*>[^<]*installation[^<]*</h\1'),
+)
+
+def part_url(part_info):
+    """Product page URL for a part"""
+    url_slug = f"{part_info['ps']}-{part_info['brand']}-{part_info['mfr']}-{part_info['name'].replace(' ', '-')}.htm"
+    return f"{BASE_URL}/{url_slug}"
+
+def parse_sections(soup):
+    """(symptoms, models, install_steps) from a part page's symptom, model and installation sections"""
+    # Extract symptoms fixed
+    symptoms = []
+    symptoms_section = soup.find('div', string=SYMPTOMS_HEADING)
+    if symptoms_section:
+        symptoms_list = symptoms_section.find_next('ul') or symptoms_section.find_next('div')
+        if symptoms_list:
+            for item in symptoms_list.find_all('li'):
+                symptom = item.get_text(strip=True).replace('•', '').strip()
+                if symptom:
+                    symptoms.append(symptom.lower())
+    
+    # Extract compatible models
+    models = []
+    models_section = soup.find('div', string=MODELS_HEADING)
+    if models_section:
+        models_table = models_section.find_next('table') or models_section.find_next('div')
+        if models_table:
+            for link in models_table.find_all('a', href=re.compile('/Models/')):
+                model = link.get_text(strip=True)
+                if model and len(models) < 10:  # Limit to 10 models
+                    models.append(model)
+    
+    # Extract installation steps
+    install_steps = ""
+    install_section = soup.find('h3', string=INSTALL_HEADING) or \
+                     soup.find('h2', string=INSTALL_HEADING)
+    if install_section:
+        steps_list = install_section.find_next('ol') or install_section.find_next('ul')
+        if steps_list:
+            steps = []
+            for idx, step in enumerate(steps_list.find_all('li'), 1):
+                step_text = step.get_text(strip=True)
+                if step_text:
+                    steps.append(f"{idx}. {step_text}")
+            install_steps = "\n".join(steps)
+    
+    return symptoms, models, install_steps
+
+def parse_part(content, part_info, url, soup=None):
+    """Build a part dict from the HTML of a part page (or an already-parsed soup)"""
     ps_number = part_info["ps"]
     mfr_number = part_info["mfr"]
     part_name = part_info["name"]
     part_type = part_info["type"]
     brand = part_info["brand"]
     
+    if soup is None:
+        soup = part_page_soup(content)
+    
+    # Extract price
+    price = 0.0
+    price_elem = soup.find('span', class_='price') or soup.find('div', class_='price')
+    if price_elem:
+        price_text = price_elem.get_text(strip=True)
+        price_match = re.search(r'\$?([\d,]+\.?\d*)', price_text)
+        if price_match:
+            price = float(price_match.group(1).replace(',', ''))
+    
+    # Extract description
+    description = ""
+    desc_elem = soup.find('div', class_='product-description') or soup.find('div', itemprop='description')
+    if desc_elem:
+        description = desc_elem.get_text(strip=True)[:500]
+    
+    symptoms, models, install_steps = parse_sections(soup)
+    lowered = content.lower()
+    if any(not found and container.search(lowered)
+           for found, container in zip((symptoms, models, install_steps), SECTION_CONTAINERS)):
+        # A section the strainer dropped (e.g. in an unclassed div): read them from the whole page
+        symptoms, models, install_steps = parse_sections(make_soup(content))
+    
+    # Build part object
+    part_data = {
+        "part_number": ps_number,
+        "manufacturer_part_number": mfr_number,
+        "name": part_name,
+        "type": part_type,
+        "brand": brand,
+        "price": price if price > 0 else 49.99,  # Default price if not found
+        "description": description if description else f"Genuine {brand} {part_name.lower()} for {part_type}s. OEM replacement part.",
+        "compatible_models": models if models else [f"Compatible with various {brand} {part_type}s"],
+        "symptoms_fixed": symptoms if symptoms else [f"{part_name.lower()} not working", "damaged part", "broken component"],
+        "install_instructions": install_steps if install_steps else "1. Disconnect power\n2. Remove old part\n3. Install new part\n4. Reconnect power\n5. Test operation",
+        "image_url": f"{BASE_URL}/images/part/{ps_number}.jpg",
+        "product_url": url
+    }
+    
+    return part_data
+
+def scrape_part(part_info, metrics=None):
+    """Scrape a specific part page"""
+    ps_number = part_info["ps"]
+    part_name = part_info["name"]
+    
     # Construct URL
-    url_slug = f"{ps_number}-{brand}-{mfr_number}-{part_name.replace(' ', '-')}.htm"
-    url = f"{BASE_URL}/{url_slug}"
+    url = part_url(part_info)
     
     print(f"Scraping: {ps_number} - {part_name}...")
     
     try:
-        response = requests.get(url, timeout=10, headers={
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
-        })
+        start = time.perf_counter()
+        page = fetch(url, timeout=10)
+        if metrics:
+            metrics.observe("fetch", time.perf_counter() - start)
+            metrics.count_status(page.status)
         
-        if response.status_code != 200:
-            print(f"  ❌ HTTP {response.status_code} for {url}")
+        if page.status != 200:
+            print(f"  ❌ HTTP {page.status} for {url}")
             return None
         
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # Extract price
-        price = 0.0
-        price_elem = soup.find('span', class_='price') or soup.find('div', class_='price')
-        if price_elem:
-            price_text = price_elem.get_text(strip=True)
-            price_match = re.search(r'\$?([\d,]+\.?\d*)', price_text)
-            if price_match:
-                price = float(price_match.group(1).replace(',', ''))
-        
-        # Extract description
-        description = ""
-        desc_elem = soup.find('div', class_='product-description') or soup.find('div', itemprop='description')
-        if desc_elem:
-            description = desc_elem.get_text(strip=True)[:500]
-        
-        # Extract symptoms fixed
-        symptoms = []
-        symptoms_section = soup.find('div', string=re.compile('fixes the following symptoms', re.I))
-        if symptoms_section:
-            symptoms_list = symptoms_section.find_next('ul') or symptoms_section.find_next('div')
-            if symptoms_list:
-                for item in symptoms_list.find_all('li'):
-                    symptom = item.get_text(strip=True).replace('•', '').strip()
-                    if symptom:
-                        symptoms.append(symptom.lower())
-        
-        # Extract compatible models
-        models = []
-        models_section = soup.find('div', string=re.compile('works with the following', re.I))
-        if models_section:
-            models_table = models_section.find_next('table') or models_section.find_next('div')
-            if models_table:
-                for link in models_table.find_all('a', href=re.compile('/Models/')):
-                    model = link.get_text(strip=True)
-                    if model and len(models) < 10:  # Limit to 10 models
-                        models.append(model)
-        
-        # Extract installation steps
-        install_steps = ""
-        install_section = soup.find('h3', string=re.compile('installation', re.I)) or \
-                         soup.find('h2', string=re.compile('installation', re.I))
-        if install_section:
-            steps_list = install_section.find_next('ol') or install_section.find_next('ul')
-            if steps_list:
-                steps = []
-                for idx, step in enumerate(steps_list.find_all('li'), 1):
-                    step_text = step.get_text(strip=True)
-                    if step_text:
-                        steps.append(f"{idx}. {step_text}")
-                install_steps = "\n".join(steps)
-        
-        # Build part object
-        part_data = {
-            "part_number": ps_number,
-            "manufacturer_part_number": mfr_number,
-            "name": part_name,
-            "type": part_type,
-            "brand": brand,
-            "price": price if price > 0 else 49.99,  # Default price if not found
-            "description": description if description else f"Genuine {brand} {part_name.lower()} for {part_type}s. OEM replacement part.",
-            "compatible_models": models if models else [f"Compatible with various {brand} {part_type}s"],
-            "symptoms_fixed": symptoms if symptoms else [f"{part_name.lower()} not working", "damaged part", "broken component"],
-            "install_instructions": install_steps if install_steps else "1. Disconnect power\n2. Remove old part\n3. Install new part\n4. Reconnect power\n5. Test operation",
-            "image_url": f"{BASE_URL}/images/part/{ps_number}.jpg",
-            "product_url": url
-        }
+        start = time.perf_counter()
+        soup = part_page_soup(page.content)
+        parsed = time.perf_counter()
+        part_data = parse_part(page.content, part_info, url, soup=soup)
+        if metrics:
+            metrics.observe("parse", parsed - start)
+            metrics.observe("extract", time.perf_counter() - parsed)
+            metrics.count("pages")
         
         print(f"  ✅ Scraped: ${part_data['price']} - {len(part_data['compatible_models'])} models")
         return part_data
         
     except Exception as e:
-        print(f"  ❌ Error: {str(e)}")
+        if metrics:
+            metrics.count_error(e)
+        print(f"  ❌ Error: {type(e).__name__}: {e}")
         return None
 
 def main():
     """Main scraper function"""
+    parser = argparse.ArgumentParser(description="Scrape PARTS_TO_SCRAPE from PartSelect")
+    parser.add_argument('--fresh', action='store_true',
+                        help="discard the previous run's JSONL and scrape every part again")
+    parser.add_argument('--metrics', default=METRICS_FILE,
+                        help="where to write run metrics: Prometheus text if it ends in .prom, else JSON")
+    args = parser.parse_args()
+    
     print("=" * 60)
     print("PartSelect Specific Parts Scraper")
     print("=" * 60)
     
-    all_parts = []
+    metrics = CrawlMetrics("specific")
     
-    for part_info in PARTS_TO_SCRAPE:
-        part_data = scrape_part(part_info)
-        if part_data:
-            all_parts.append(part_data)
+    with JsonlSink(JSONL_FILE, fresh=args.fresh) as sink:
+        if sink.resumed:
+            print(f"Resuming: {sink.resumed} parts already scraped")
+        
+        pending = [part_info for part_info in PARTS_TO_SCRAPE if part_info["ps"] not in sink]
         
-        # Be respectful - wait between requests
-        time.sleep(1)
+        # Results come back in PARTS_TO_SCRAPE order, so the catalog order is stable
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+            for part_data in pool.map(lambda part_info: scrape_part(part_info, metrics), pending):
+                if part_data:
+                    sink.write(part_data)
+    metrics.finish()
+    
+    # Merge this and the other scrapers' JSONL streams into the catalog the backend loads
+    output_file = OUTPUT_FILE
+    count = merge_catalog(output_path=output_file)
+    stats = summarize(read_jsonl(JSONL_FILE))
     
     print("\n" + "=" * 60)
-    print(f"Successfully scraped {len(all_parts)} parts")
+    print(f"Successfully scraped {count} parts")
     print("=" * 60)
     
-    # Save to JSON
-    output_file = "backend/data/seedParts.json"
-    output_data = {"parts": all_parts}
-    
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(output_data, f, indent=2, ensure_ascii=False)
-    
-    print(f"\n✅ Saved {len(all_parts)} parts to {output_file}")
+    print(f"\n✅ Saved {count} parts to {output_file}")
     
     # Print summary
     print("\nSummary:")
-    print(f"  Refrigerator parts: {sum(1 for p in all_parts if p['type'] == 'refrigerator')}")
-    print(f"  Dishwasher parts: {sum(1 for p in all_parts if p['type'] == 'dishwasher')}")
-    print(f"  Whirlpool parts: {sum(1 for p in all_parts if p['brand'] == 'Whirlpool')}")
-    print(f"  GE parts: {sum(1 for p in all_parts if p['brand'] == 'GE')}")
-    print(f"  Total price range: ${min(p['price'] for p in all_parts):.2f} - ${max(p['price'] for p in all_parts):.2f}")
+    print(f"  Refrigerator parts: {stats['by_type']['refrigerator']}")
+    print(f"  Dishwasher parts: {stats['by_type']['dishwasher']}")
+    print(f"  Whirlpool parts: {stats['by_brand']['Whirlpool']}")
+    print(f"  GE parts: {stats['by_brand']['GE']}")
+    if stats['price_avg'] is not None:
+        print(f"  Total price range: ${stats['price_min']:.2f} - ${stats['price_max']:.2f}")
+    
+    metrics.write(args.metrics)
+    print()
+    for line in metrics.report_lines():
+        print(line)
+    print(f"   Metrics: {args.metrics}")
+    limit = limit_for(host_of(BASE_URL))
+    print(f"   Concurrency: settled at {limit.allowed} requests in flight "
+          f"({limit.increases} ramp-ups, {limit.decreases} backoffs)")
 
 if __name__ == "__main__":
     main()
@@ -1,15 +1,63 @@
-import React from "react";
+import React, { useEffect, useState } from "react";
 import "./ProductCard.css";
 
+// Written by image_pipeline.py: part number -> locally cached image files
+const IMAGE_MANIFEST_URL = "/images/parts/manifest.json";
+let imageManifest = null;
+
+function loadImageManifest() {
+  if (!imageManifest) {
+    imageManifest = fetch(IMAGE_MANIFEST_URL)
+      .then((response) => (response.ok ? response.json() : { parts: {} }))
+      .then((manifest) => manifest.parts || {})
+      .catch(() => ({}));
+  }
+  return imageManifest;
+}
+
+function usePartImage(partNumber) {
+  const [image, setImage] = useState(null);
+
+  useEffect(() => {
+    let cancelled = false;
+    loadImageManifest().then((parts) => {
+      if (!cancelled) setImage(parts[partNumber] || null);
+    });
+    return () => {
+      cancelled = true;
+    };
+  }, [partNumber]);
+
+  return image;
+}
+
 function ProductCard({ part }) {
+  const image = usePartImage(part && part.part_number);
+  const [imageFailed, setImageFailed] = useState(false);
+
   if (!part) return null;
 
   return (
     <div className="product-card">
       <div className="product-image">
-        <div className="image-placeholder">
-          <span className="part-icon">🔧</span>
-        </div>
+        {image && !imageFailed ? (
+          <picture>
+            {image.thumb_webp && <source srcSet={image.thumb_webp} type="image/webp" />}
+            <img
+              className="product-thumb"
+              src={image.thumb || image.original}
+              alt={part.name}
+              width="140"
+              height="140"
+              loading="lazy"
+              onError={() => setImageFailed(true)}
+            />
+          </picture>
+        ) : (
+          <div className="image-placeholder">
+            <span className="part-icon">🔧</span>
+          </div>
+        )}
       </div>
       <div className="product-details">
         <h3 className="product-name">{part.name}</h3>
@@ -0,0 +1,233 @@
+"""
+Structured Data Fast Path
+Reads the fields a part page declares outright - schema.org Product JSON-LD
+blocks, then microdata / Open Graph price and description tags - with a
+byte-level scan, no DOM. The section-based fields (symptoms, models, install
+steps) never appear in structured data, but a page whose bytes lack the
+headings that introduce them cannot have them either. Only the fields the
+structured data leaves uncovered go to the BeautifulSoup extractors in
+part_extractor.py, over the strained tree; a section that comes back empty
+there although its heading is in the page was dropped by the strainer, and
+is read again from a full parse. extract_fields() is the one entry point for
+all of this.
+"""
+
+import html
+import json
+import re
+import time
+
+from html_parsing import make_soup, part_page_soup
+from part_extractor import (
+    FIELD_EXTRACTORS, FIXES_SYMPTOMS, INSTALL_MARKER, MODEL_LINK, MODELS_MARKER, PRICE_TEXT,
+    clean_name, extract_part_fields,
+)
+
+# Matched against the page lowercased once (bytes.lower() keeps offsets), which
+# is several times faster than re.I over the raw bytes
+JSON_LD = re.compile(rb'<script\b[^>]*\btype\s*=\s*["\']?application/ld\+json["\']?[^>]*>(.*?)</script\s*>', re.S)
+# Microdata itemprop or Open Graph price attributes; values come from their tags
+ITEMPROP = re.compile(rb'itemprop\s*=\s*["\'](price|description)["\']')
+OG_PRICE = re.compile(rb'property\s*=\s*["\']product:price:amount["\']')
+CONTENT_ATTR = re.compile(rb'(?<![\w-])content\s*=\s*(?:"([^"]*)"|\'([^\']*)\')', re.I)
+# Text of a leaf element: up to the next tag, which must close it
+LEAF_TEXT = re.compile(rb'([^<]*)</', re.S)
+
+
+def alternatives(pattern):
+    """A regex's top-level alternatives, lowercased, each compiled on its own for bytes"""
+    parts, depth, start = [], 0, 0
+    for i, char in enumerate(pattern):
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == '|' and depth == 0:
+            parts.append(pattern[start:i])
+            start = i + 1
+    parts.append(pattern[start:])
+    # re only skips ahead to a literal prefix when there is no top-level "|"
+    return [re.compile(part.lower().encode()) for part in parts]
+
+
+# Section fields -> what a page must contain for the DOM extractor to find the
+# section: its part_extractor heading, plus the links / list the items sit in.
+# Looser words (any "problem" or "issue", SYMPTOM_WORDS) turn up on nearly
+# every page, in reviews and footers, so they do not count as a section.
+SECTION_MARKERS = {
+    "symptoms": [alternatives(FIXES_SYMPTOMS.pattern), [re.compile(rb'<li\b')]],
+    "models": [alternatives(MODELS_MARKER.pattern), alternatives(MODEL_LINK.pattern)],
+    "install_steps": [alternatives(INSTALL_MARKER.pattern), [re.compile(rb'<ol\b')]],
+}
+
+
+def has_markers(markers, lowered):
+    return all(any(alternative.search(lowered) for alternative in marker) for marker in markers)
+
+
+def strained_out(dom_fields, lowered):
+    """
+    Section fields the strained tree came back empty for although the page has
+    their heading: the section sits in a container the strainer does not keep
+    (e.g. an unclassed div), so only a full parse can find it
+    """
+    return [field for field, markers in SECTION_MARKERS.items()
+            if field in dom_fields and not dom_fields[field] and has_markers(markers, lowered)]
+
+
+def dom_fields(content, ps, mfr, fields, soup, timings, lowered):
+    """`fields` from the strained tree, with strained-out sections re-read from a full parse"""
+    start = time.perf_counter()
+    if soup is None:
+        soup = part_page_soup(content)
+    parsed = time.perf_counter()
+    extracted = extract_part_fields(soup, ps, mfr, fields)
+    timings["parse"] = parsed - start
+    timings["extract"] = time.perf_counter() - parsed
+    lost = strained_out(extracted, lowered)
+    if lost:
+        start = time.perf_counter()
+        extracted.update(extract_part_fields(make_soup(content), ps, mfr, lost))
+        timings["reparse"] = time.perf_counter() - start
+    return extracted
+
+
+def is_product(node):
+    kind = node.get("@type")
+    kinds = kind if isinstance(kind, list) else [kind]
+    return any(isinstance(k, str) and k.rsplit(':', 1)[-1].rsplit('/', 1)[-1] == "Product" for k in kinds)
+
+
+def json_ld_products(content, lowered=None):
+    """Every schema.org Product object in the page's JSON-LD blocks"""
+    products = []
+    for match in JSON_LD.finditer(content.lower() if lowered is None else lowered):
+        try:
+            data = json.loads(content[match.start(1):match.end(1)].decode('utf-8', 'replace'))
+        except ValueError:
+            continue
+        nodes = [data]
+        while nodes:
+            node = nodes.pop()
+            if isinstance(node, list):
+                nodes.extend(reversed(node))
+            elif isinstance(node, dict):
+                if is_product(node):
+                    products.append(node)
+                elif "@graph" in node:
+                    nodes.append(node["@graph"])
+    return products
+
+
+def to_price(value):
+    """Positive price from a number or "$1,234.56"-style text, else None"""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value) if value > 0 else None
+    match = PRICE_TEXT.search(str(value or ''))
+    if match:
+        try:
+            price = float(match.group(1).replace(',', ''))
+        except ValueError:
+            return None
+        return price if price > 0 else None
+    return None
+
+
+def to_description(value):
+    """Description text held to the DOM extractor's rules (over 50 chars, at most 800)"""
+    if not isinstance(value, str):
+        return None
+    text = html.unescape(value).strip()
+    return text[:800] if len(text) > 50 else None
+
+
+def product_fields(product, ps, mfr):
+    fields = {}
+    if isinstance(product.get("name"), str):
+        name = clean_name(html.unescape(product["name"]).strip(), ps, mfr)
+        if name:
+            fields["name"] = name
+
+    offers = product.get("offers")
+    for offer in offers if isinstance(offers, list) else [offers]:
+        if isinstance(offer, dict):
+            price = to_price(offer.get("price", offer.get("lowPrice")))
+            if price:
+                fields["price"] = price
+                break
+
+    description = to_description(product.get("description"))
+    if description:
+        fields["description"] = description
+    return fields
+
+
+def tag_value(content, position):
+    """The content= attribute of the tag around `position`, or its text if it is a leaf element"""
+    start = content.rfind(b'<', 0, position)
+    end = content.find(b'>', position)
+    if start == -1 or end == -1:
+        return None
+    attr = CONTENT_ATTR.search(content, start, end)
+    if attr:
+        return html.unescape((attr.group(1) or attr.group(2) or b'').decode('utf-8', 'replace'))
+    leaf = LEAF_TEXT.match(content, end + 1)
+    if leaf:
+        return html.unescape(leaf.group(1).decode('utf-8', 'replace'))
+    return None
+
+
+def microdata_fields(content, lowered=None):
+    lowered = content.lower() if lowered is None else lowered
+    fields = {}
+    for match in ITEMPROP.finditer(lowered):
+        prop = match.group(1).decode()
+        if prop in fields:
+            continue
+        value = tag_value(content, match.start())
+        value = to_price(value) if prop == "price" else to_description(value)
+        if value:
+            fields[prop] = value
+    if "price" not in fields:
+        for match in OG_PRICE.finditer(lowered):
+            price = to_price(tag_value(content, match.start()))
+            if price:
+                fields["price"] = price
+                break
+    return fields
+
+
+def structured_fields(content, ps, mfr, lowered=None):
+    """Part fields a page settles without a DOM: declared values, and sections it cannot have"""
+    lowered = content.lower() if lowered is None else lowered
+    fields = {}
+    for product in json_ld_products(content, lowered):
+        for field, value in product_fields(product, ps, mfr).items():
+            fields.setdefault(field, value)
+    for field, value in microdata_fields(content, lowered).items():
+        fields.setdefault(field, value)
+    for field, markers in SECTION_MARKERS.items():
+        if not has_markers(markers, lowered):
+            fields[field] = []
+    return fields
+
+
+def extract_fields(content, ps, mfr, soup=None, timings=None):
+    """
+    Part fields from the structured data fast path, falling back to the DOM
+    extractors for whatever it left uncovered. Returns (fields, dom_fields):
+    the names of the fields the DOM had to supply (empty when the fast path
+    served the whole page and no tree was built). Seconds spent in each
+    step - structured, parse, extract, reparse - are added to `timings`;
+    parse and extract only when a tree was built, reparse only when the
+    strained tree lost a section.
+    """
+    timings = {} if timings is None else timings
+    start = time.perf_counter()
+    lowered = content.lower()
+    fields = structured_fields(content, ps, mfr, lowered)
+    timings["structured"] = time.perf_counter() - start
+    missing = [field for field in FIELD_EXTRACTORS if field not in fields]
+    if missing:
+        fields.update(dom_fields(content, ps, mfr, missing, soup, timings, lowered))
+    return {field: fields[field] for field in FIELD_EXTRACTORS}, missing
@@ -0,0 +1,189 @@
+"""
+Symptom Search Index
+BM25 full-text index over each part's name, description and symptoms_fixed.
+Text is lowercased, split into words, stripped of stopwords and lightly
+stemmed, so "fridge not making ice" finds "Ice maker not working".
+
+Postings store precomputed BM25 impacts sorted highest first, which lets
+search() stop reading posting lists as soon as no unseen part can make the
+top k (Fagin's threshold algorithm). Lists are read in blocks that double
+in size, and each block's new parts are scored together in C-level map()s.
+"""
+
+import functools
+import heapq
+import json
+import math
+import os
+import re
+import sys
+from itertools import chain, repeat
+from operator import neg
+
+SEED_FILE = "backend/data/seedParts.json"
+SEARCH_INDEX_FILE = "backend/data/symptomIndex.json"
+SEARCH_INDEX_VERSION = 1
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# Matches in the name or a symptom count for more than in the description
+FIELD_WEIGHTS = {"name": 2.0, "symptoms_fixed": 1.5, "description": 1.0}
+
+WORD = re.compile(r'[a-z0-9]+')
+STOPWORDS = frozenset("""
+    a an and are as at be but by for from has have i in is it its my of on or
+    the this to was with not no doesn don t s
+""".split())
+SYNONYMS = {"fridge": "refrigerator", "fridges": "refrigerator"}
+SUFFIXES = ("ings", "ing", "ers", "er", "ies", "es", "ed", "ly", "s")
+MIN_STEM = 3
+
+# Postings read per list before the first stopping check; doubles each round up to MAX_BLOCK
+FIRST_BLOCK = 16
+MAX_BLOCK = 256
+
+
+@functools.lru_cache(maxsize=None)
+def stem(word):
+    """Strip the first matching suffix, keeping at least MIN_STEM characters"""
+    for suffix in SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= MIN_STEM:
+            return word[:-len(suffix)]
+    return word
+
+
+def tokenize(text):
+    """Lowercase, split, drop stopwords, map synonyms and stem"""
+    return [stem(SYNONYMS.get(word, word)) for word in WORD.findall(text.lower())
+            if word not in STOPWORDS]
+
+
+def field_text(part, field):
+    value = part.get(field) or ""
+    return " ".join(value) if isinstance(value, list) else value
+
+
+def build_search_index(parts):
+    """Build the BM25 index dict for a list of part records"""
+    doc_terms = []
+    for part in parts:
+        weights = {}
+        for field, weight in FIELD_WEIGHTS.items():
+            for term in tokenize(field_text(part, field)):
+                weights[term] = weights.get(term, 0.0) + weight
+        doc_terms.append(weights)
+
+    lengths = [sum(weights.values()) for weights in doc_terms]
+    avg_length = (sum(lengths) / len(lengths)) if lengths else 0.0
+
+    postings = {}
+    for doc, weights in enumerate(doc_terms):
+        for term, tf in weights.items():
+            postings.setdefault(term, []).append((doc, tf))
+
+    count = len(parts)
+    terms = {}
+    for term, docs in postings.items():
+        idf = math.log(1 + (count - len(docs) + 0.5) / (len(docs) + 0.5))
+        impacts = []
+        for doc, tf in docs:
+            norm = K1 * (1 - B + B * lengths[doc] / avg_length)
+            impacts.append([doc, round(idf * tf * (K1 + 1) / (tf + norm), 4)])
+        impacts.sort(key=lambda posting: (-posting[1], posting[0]))
+        terms[term] = impacts
+
+    return {
+        "version": SEARCH_INDEX_VERSION,
+        "parts": [part["part_number"] for part in parts],
+        "terms": terms,
+    }
+
+
+def write_search_index(index, path=SEARCH_INDEX_FILE):
+    """Write the index compactly and atomically"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, separators=(',', ':'), ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def build_search_index_file(seed_path=SEED_FILE, path=SEARCH_INDEX_FILE):
+    """Rebuild the index file from the seed catalog; returns the index"""
+    with open(seed_path, 'r', encoding='utf-8') as f:
+        parts = json.load(f)["parts"]
+    index = build_search_index(parts)
+    write_search_index(index, path)
+    return index
+
+
+class SymptomSearch:
+    """Top-k BM25 queries over a built index"""
+
+    def __init__(self, index):
+        self.parts = index["parts"]
+        # Impact-ordered postings as parallel doc / impact lists, so a block of
+        # them is a slice and can be scored with C-level map() calls
+        self.docs = {term: [doc for doc, _ in impacts] for term, impacts in index["terms"].items()}
+        self.impacts = {term: [score for _, score in impacts] for term, impacts in index["terms"].items()}
+        self.scores = {term: dict(impacts) for term, impacts in index["terms"].items()}
+
+    @classmethod
+    def load(cls, path=SEARCH_INDEX_FILE):
+        """Load an index written by write_search_index()"""
+        with open(path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        if index.get("version") != SEARCH_INDEX_VERSION:
+            raise ValueError(f"{path} is not a version {SEARCH_INDEX_VERSION} search index")
+        return cls(index)
+
+    def search(self, query, k=5):
+        """Top k (part_number, score) pairs for a free-text query, best first"""
+        terms = [term for term in dict.fromkeys(tokenize(query)) if term in self.scores]
+        if not terms:
+            return []
+
+        docs = [self.docs[term] for term in terms]
+        impacts = [self.impacts[term] for term in terms]
+        lookups = [self.scores[term].get for term in terms]
+        longest = max(map(len, docs))
+        top = []  # best (score, -doc) pairs so far, at most k
+        seen = set()
+        start, size = 0, FIRST_BLOCK
+        while start < longest:
+            end = start + size
+            block = set()
+            for postings in docs:
+                block.update(postings[start:end])
+            block -= seen
+            if block:
+                seen |= block
+                # Each new part's full score: one dict lookup per term, summed
+                new = list(block)
+                columns = [map(lookup, new, repeat(0.0)) for lookup in lookups]
+                top = heapq.nlargest(k, chain(top, zip(map(sum, zip(*columns)), map(neg, new))))
+            # No unseen part can score above the sum of the lists' next impacts
+            bound = sum(scores[end] for scores in impacts if end < len(scores))
+            if len(top) == k and top[-1][0] >= bound:
+                break
+            start, size = end, min(size * 2, MAX_BLOCK)
+
+        return [(self.parts[-doc], round(score, 4)) for score, doc in top]
+
+
+def main():
+    if len(sys.argv) > 1:
+        # python symptom_search.py fridge not making ice -> ranked parts
+        searcher = SymptomSearch.load()
+        for part_number, score in searcher.search(" ".join(sys.argv[1:])):
+            print(f"{score:8.3f}  {part_number}")
+        return
+
+    index = build_search_index_file()
+    print(f"✅ Indexed {len(index['parts'])} parts -> {SEARCH_INDEX_FILE}")
+    print(f"   Terms: {len(index['terms'])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Catalog Merge Tests
+merge_records' field rules - placeholder detection per field, the
+compatible_models union, and the 49.99 price that is always taken for the
+scrapers' placeholder - and merge_catalog's external sort end to end with
+runs small enough to need several merge passes
+
+Usage: python -m unittest discover tests
+"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from catalog_merge import PLACEHOLDER_INSTALL, PLACEHOLDER_PRICE, merge_catalog, merge_records  # noqa: E402
+
+# What scraper_specific writes for a page that lacks every field
+FILLER = {
+    "part_number": "PS11752778",
+    "name": "Whirlpool refrigerator part",
+    "price": PLACEHOLDER_PRICE,
+    "description": "Genuine Whirlpool ice maker assembly for refrigerators. OEM replacement part.",
+    "compatible_models": ["Compatible with various Whirlpool refrigerators"],
+    "symptoms_fixed": ["ice maker assembly not working", "damaged part", "broken component"],
+    "install_instructions": PLACEHOLDER_INSTALL,
+}
+REAL = {
+    "part_number": "PS11752778",
+    "name": "Ice Maker Assembly",
+    "price": 89.95,
+    "description": "Ice maker assembly with the mold, ejector and harness for side-by-side refrigerators.",
+    "compatible_models": ["WRS325SDHZ", "WRF555SDFZ"],
+    "symptoms_fixed": ["ice maker not making ice", "leaking"],
+    "install_instructions": "1. Unplug the refrigerator\n2. Unclip the old ice maker",
+}
+
+
+class MergeRecordsTest(unittest.TestCase):
+
+    def test_real_values_beat_placeholders_whatever_the_precedence(self):
+        for records in ([FILLER, REAL], [REAL, FILLER]):
+            self.assertEqual(merge_records(records), REAL)
+
+    def test_each_placeholder_is_detected_on_its_own(self):
+        for field in REAL:
+            if field == "part_number":
+                continue
+            with self.subTest(field=field):
+                first = dict(REAL, **{field: FILLER[field]})
+                self.assertEqual(merge_records([first, REAL])[field], REAL[field])
+
+    def test_placeholders_are_kept_when_nothing_better_exists(self):
+        self.assertEqual(merge_records([FILLER]), FILLER)
+        self.assertEqual(merge_records([{"part_number": "PS1", "price": None}, FILLER])["price"], PLACEHOLDER_PRICE)
+
+    def test_real_49_99_price_is_taken_for_the_placeholder(self):
+        # The scrapers' filler price cannot be told from a part that really costs $49.99
+        real_49_99 = dict(REAL, price=49.99)
+        self.assertEqual(merge_records([real_49_99, dict(REAL, price=52.10)])["price"], 52.10)
+        self.assertEqual(merge_records([real_49_99, FILLER])["price"], 49.99)
+
+    def test_compatible_models_are_unioned_in_precedence_order(self):
+        listing = dict(REAL, compatible_models=["WRF555SDFZ", "MFI2570FEZ", "Compatible with various Whirlpool"])
+        merged = merge_records([REAL, FILLER, listing])
+        self.assertEqual(merged["compatible_models"], ["WRS325SDHZ", "WRF555SDFZ", "MFI2570FEZ"])
+
+    def test_first_present_value_wins_for_other_fields(self):
+        merged = merge_records([{"part_number": "PS1", "brand": ""},
+                                {"part_number": "PS1", "brand": "GE", "type": "dishwasher"}])
+        self.assertEqual((merged["brand"], merged["type"]), ("GE", "dishwasher"))
+
+
+class MergeCatalogTest(unittest.TestCase):
+
+    def test_external_merge_across_sources_and_passes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            sources = []
+            for rank, price in enumerate((None, 25.0, 30.0)):
+                path = os.path.join(tmp, f"source-{rank}.jsonl")
+                with open(path, 'w', encoding='utf-8') as f:
+                    for number in reversed(range(40)):
+                        record = {"part_number": f"PS{number:04d}", "name": f"Part {number} from {rank}"}
+                        if price is not None:
+                            record["price"] = price
+                        f.write(json.dumps(record) + '\n')
+                sources.append(path)
+            output = os.path.join(tmp, "parts.json")
+
+            count = merge_catalog(sources + [os.path.join(tmp, "missing.jsonl")], output, run_size=7, fan_in=3)
+            with open(output, 'r', encoding='utf-8') as f:
+                parts = json.load(f)["parts"]
+            self.assertEqual(count, 40)
+            self.assertEqual([part["part_number"] for part in parts], [f"PS{number:04d}" for number in range(40)])
+            self.assertTrue(all(part["name"].endswith("from 0") and part["price"] == 25.0 for part in parts))
+            self.assertEqual(sorted(os.listdir(tmp)), sorted(["parts.json"] + [os.path.basename(p) for p in sources]))
+
+
+if __name__ == "__main__":
+    unittest.main()
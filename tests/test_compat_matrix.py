@@ -0,0 +1,137 @@
+"""
+Compatibility Matrix Tests
+CompatMatrix queries checked against a scan of the compatible_models lists,
+the save/load round trip, and update_matrix_file() patching a saved matrix to
+what a fresh build would write
+
+Usage: python -m unittest discover tests
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from compat_matrix import CompatMatrix, bit_positions, bits_from_positions, update_matrix_file  # noqa: E402
+
+PARTS = [
+    {"part_number": "PS11752778", "compatible_models": ["WRS325SDHZ", "WRF555SDFZ", "wrs325sdhz"]},
+    {"part_number": "PS11722237", "compatible_models": ["GDF520PGJ2WW"]},
+    {"part_number": "PS11755766", "compatible_models": ["WRF555SDFZ", "MFI2570FEZ", "WRS325SDHZ"]},
+    {"part_number": "PS11700000"},
+]
+
+
+def random_parts(seed, count=300, model_count=120):
+    generator = random.Random(seed)
+    models = [f"MODEL{number:04d}" for number in range(model_count)]
+    return [{"part_number": f"PS{row:06d}", "compatible_models": generator.sample(models, generator.randint(0, 8))}
+            for row in range(count)]
+
+
+def scan_models(parts, part_number):
+    """models_for_part the slow way, as a set of lowercased models"""
+    for part in parts:
+        if part["part_number"] == part_number:
+            return {model.lower() for model in part.get("compatible_models") or []}
+    return set()
+
+
+class BitsTest(unittest.TestCase):
+
+    def test_positions_round_trip(self):
+        for positions in ([], [0], [7, 8], [3, 64, 65, 1000, 4095]):
+            self.assertEqual(bit_positions(bits_from_positions(positions)), positions)
+        self.assertEqual(bits_from_positions([2, 2, 0]), 0b101)
+
+
+class QueryTest(unittest.TestCase):
+
+    def test_queries_on_a_small_catalog(self):
+        matrix = CompatMatrix.from_parts(PARTS)
+        self.assertEqual(matrix.models, ["WRS325SDHZ", "WRF555SDFZ", "GDF520PGJ2WW", "MFI2570FEZ"])
+        self.assertEqual(matrix.parts_for_model("wrs325sdhz"), ["PS11752778", "PS11755766"])
+        self.assertEqual(matrix.models_for_part("ps11755766"), ["WRS325SDHZ", "WRF555SDFZ", "MFI2570FEZ"])
+        self.assertEqual(matrix.models_for_part("PS11700000"), [])
+        self.assertEqual(matrix.models_for_part("PS404"), [])
+        self.assertEqual(matrix.check_many([("PS11722237", "GDF520PGJ2WW"), ("PS11722237", "WRS325SDHZ"),
+                                            ("PS404", "WRS325SDHZ")]), [True, False, False])
+        self.assertEqual(matrix.parts_for_all_models(["WRF555SDFZ", "MFI2570FEZ"]), ["PS11755766"])
+        self.assertEqual(matrix.parts_for_all_models([]), [])
+        self.assertEqual(matrix.shared_models("PS11752778", "PS11755766"), ["WRS325SDHZ", "WRF555SDFZ"])
+
+    def test_both_directions_agree_with_a_scan(self):
+        parts = random_parts(seed=7)
+        matrix = CompatMatrix.from_parts(parts)
+        for part in parts:
+            models = matrix.models_for_part(part["part_number"])
+            self.assertEqual({model.lower() for model in models}, scan_models(parts, part["part_number"]))
+            for model in models:
+                self.assertIn(part["part_number"], matrix.parts_for_model(model))
+
+
+class FileTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "compatMatrix.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read(self):
+        with open(self.path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def test_save_and_load_round_trip(self):
+        matrix = CompatMatrix.from_parts(random_parts(seed=3))
+        matrix.save(self.path)
+        loaded = CompatMatrix.load(self.path)
+        self.assertEqual((loaded.part_numbers, loaded.models), (matrix.part_numbers, matrix.models))
+        self.assertEqual(loaded.part_bits, matrix.part_bits)
+
+    def test_load_rejects_other_versions(self):
+        CompatMatrix.from_parts(PARTS).save(self.path)
+        data = self.read()
+        data["version"] = 0
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        with self.assertRaises(ValueError):
+            CompatMatrix.load(self.path)
+
+    def test_update_matches_a_fresh_build(self):
+        parts = [dict(part) for part in PARTS]
+        CompatMatrix.from_parts(parts).save(self.path)
+        # PS11722237 drops its only model, PS11700000 gains one, and a part is appended
+        changes = [
+            (1, parts[1], dict(parts[1], compatible_models=["WRF555SDFZ"])),
+            (3, parts[3], dict(parts[3], compatible_models=["KRFF507HPS"])),
+            (4, None, {"part_number": "PS11799999", "compatible_models": ["GDF520PGJ2WW", "KRFF507HPS"]}),
+        ]
+        self.assertTrue(update_matrix_file(changes, len(parts), self.path))
+        updated = [new for _, _, new in changes]
+        parts = parts[:1] + updated[:1] + parts[2:3] + updated[1:]
+
+        patched = CompatMatrix.load(self.path)
+        fresh = CompatMatrix.from_parts(parts)
+        self.assertEqual(patched.part_numbers, fresh.part_numbers)
+        for part in parts:
+            self.assertEqual(sorted(patched.models_for_part(part["part_number"])),
+                             sorted(fresh.models_for_part(part["part_number"])))
+        self.assertEqual(sorted(patched.models), sorted(fresh.models))
+
+    def test_update_refuses_a_mismatched_matrix(self):
+        self.assertFalse(update_matrix_file([], 4, self.path))
+        CompatMatrix.from_parts(PARTS).save(self.path)
+        before = self.read()
+        self.assertFalse(update_matrix_file([(0, PARTS[0], PARTS[0])], 5, self.path))
+        self.assertEqual(self.read(), before)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,237 @@
+"""
+Crawl Engine Tests
+Runs CrawlEngine against a local aiohttp stub server: the per-host token
+bucket's pacing, host_slot's in-flight limit and Retry-After pause, and the
+retry path for 429 / 5xx responses. The sync fetch layer's thread-safe
+bucket gets the same pacing checks.
+
+Usage: python -m unittest discover tests
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from aiohttp import web
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import fetch  # noqa: E402
+from crawl_engine import CrawlEngine, TokenBucket  # noqa: E402
+from fetch import MAX_RETRIES  # noqa: E402
+from http_cache import HttpCache  # noqa: E402
+
+# Slack for timer and scheduling jitter in the timing assertions
+JITTER = 0.03
+
+
+class StubServer:
+    """
+    Local HTTP server answering each path from a script of (status, headers)
+    responses, the last one repeating; unscripted paths get 200. Records when
+    every request arrived.
+    """
+
+    def __init__(self, script=None):
+        self.script = script or {}
+        self.arrivals = {}
+        self.runner = None
+
+    async def handle(self, request):
+        arrivals = self.arrivals.setdefault(request.path, [])
+        arrivals.append(time.monotonic())
+        responses = self.script.get(request.path) or [(200, {})]
+        status, headers = responses[min(len(arrivals), len(responses)) - 1]
+        return web.Response(status=status, headers=headers, text=f"{request.path} #{len(arrivals)}")
+
+    def url(self, path):
+        host, port = self.runner.addresses[0][:2]
+        return f"http://{host}:{port}{path}"
+
+    def hits(self, path):
+        return len(self.arrivals.get(path, []))
+
+    def gaps(self, path):
+        times = self.arrivals.get(path, [])
+        return [later - earlier for earlier, later in zip(times, times[1:])]
+
+    def span(self, path):
+        """Seconds from the first request's arrival to the last's"""
+        times = self.arrivals.get(path, [])
+        return times[-1] - times[0] if times else 0.0
+
+    async def __aenter__(self):
+        app = web.Application()
+        app.router.add_get('/{tail:.*}', self.handle)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, '127.0.0.1', 0).start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.runner.cleanup()
+
+
+class CrawlEngineTestCase(unittest.IsolatedAsyncioTestCase):
+    """Keeps the shared HTTP cache out of the way: every test sees the stub's live answers"""
+
+    def setUp(self):
+        self.cache_enabled = fetch.CACHE_ENABLED
+        fetch.CACHE_ENABLED = False
+
+    def tearDown(self):
+        fetch.CACHE_ENABLED = self.cache_enabled
+
+
+class TokenBucketTest(CrawlEngineTestCase):
+
+    async def test_burst_then_rate(self):
+        bucket = TokenBucket(rate=20, burst=2)
+        started = time.monotonic()
+        await bucket.acquire()
+        await bucket.acquire()
+        self.assertLess(time.monotonic() - started, JITTER)
+        for _ in range(4):
+            await bucket.acquire()
+        elapsed = time.monotonic() - started
+        self.assertGreaterEqual(elapsed, 4 / 20 - JITTER)
+        self.assertLess(elapsed, 4 / 20 + 0.15)
+
+    async def test_engine_paces_requests_per_host(self):
+        async with StubServer() as server, CrawlEngine(rate_per_host=10, burst=1) as engine:
+            pages = await asyncio.gather(*(engine.fetch(server.url("/paced")) for _ in range(5)))
+        self.assertEqual([page.status for page in pages], [200] * 5)
+        self.assertEqual(server.hits("/paced"), 5)
+        # Tokens go out 0.1s apart, but opening a connection can delay one
+        # request's arrival into the next one's gap: allow one interval of slack
+        self.assertGreaterEqual(server.span("/paced"), 3 / 10 - JITTER)
+
+
+class SyncTokenBucketTest(CrawlEngineTestCase):
+
+    def test_burst_then_rate_across_threads(self):
+        bucket = fetch.TokenBucket(rate=20, burst=2)
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=6) as pool:
+            finished = sorted(pool.map(lambda _: bucket.acquire() or time.monotonic() - started, range(6)))
+        self.assertLess(finished[1], JITTER)
+        self.assertGreaterEqual(finished[-1], 4 / 20 - JITTER)
+        self.assertLess(finished[-1], 4 / 20 + 0.15)
+
+    async def test_threaded_fetches_are_paced_per_host(self):
+        saved = fetch.RATE_PER_HOST, fetch.RATE_BURST
+        fetch.RATE_PER_HOST, fetch.RATE_BURST = 10, 1
+        try:
+            async with StubServer() as server:
+                url = server.url("/threaded")
+                with ThreadPoolExecutor(max_workers=5) as pool:
+                    pages = await asyncio.gather(*(asyncio.get_running_loop().run_in_executor(pool, fetch.fetch, url)
+                                                   for _ in range(5)))
+        finally:
+            fetch.RATE_PER_HOST, fetch.RATE_BURST = saved
+        self.assertEqual([page.status for page in pages], [200] * 5)
+        # One interval of slack for connection setup, as in the engine's pacing test
+        self.assertGreaterEqual(server.span("/threaded"), 3 / 10 - JITTER)
+
+
+class HostSlotTest(CrawlEngineTestCase):
+
+    async def hold_slots(self, engine, urls, hold=0.05):
+        """Hold a host_slot for each URL concurrently; returns the most held at once per host"""
+        held = {}
+        most = {}
+
+        async def hold_one(url):
+            async with engine.host_slot(url):
+                held[url] = held.get(url, 0) + 1
+                most[url] = max(most.get(url, 0), held[url])
+                await asyncio.sleep(hold)
+                held[url] -= 1
+
+        await asyncio.gather(*(hold_one(url) for url in urls))
+        return most
+
+    async def test_limits_requests_in_flight_per_host(self):
+        async with StubServer() as server, CrawlEngine(initial_concurrency=2) as engine:
+            first, second = server.url("/a"), server.url("/a").replace("127.0.0.1", "localhost")
+            most = await self.hold_slots(engine, [first] * 6 + [second] * 3)
+            self.assertEqual(most, {first: 2, second: 2})
+            self.assertEqual(engine.limit_for(first).in_flight, 0)
+
+    async def test_waits_out_retry_after(self):
+        async with StubServer() as server, CrawlEngine() as engine:
+            url = server.url("/paused")
+            engine.limit_for(url).on_response(503, retry_after="0.3")
+            started = time.monotonic()
+            async with engine.host_slot(url):
+                waited = time.monotonic() - started
+        self.assertGreaterEqual(waited, 0.3 - JITTER)
+
+
+class RetryTest(CrawlEngineTestCase):
+
+    async def test_retries_until_success_honouring_retry_after(self):
+        # A 500 does not pause the host, so only the retry's own wait keeps that gap
+        script = {"/flaky": [(500, {"Retry-After": "0.2"}), (429, {"Retry-After": "0.2"}), (200, {})]}
+        async with StubServer(script) as server, CrawlEngine(rate_per_host=100, burst=10) as engine:
+            page = await engine.fetch(server.url("/flaky"))
+        self.assertEqual(page.status, 200)
+        self.assertEqual(page.content, b"/flaky #3")
+        self.assertEqual(server.hits("/flaky"), 3)
+        for gap in server.gaps("/flaky"):
+            self.assertGreaterEqual(gap, 0.2 - JITTER)
+
+    async def test_gives_up_after_max_retries(self):
+        script = {"/down": [(429, {"Retry-After": "0"})]}
+        async with StubServer(script) as server, CrawlEngine(rate_per_host=100, burst=10) as engine:
+            page = await engine.fetch(server.url("/down"))
+        self.assertEqual(page.status, 429)
+        self.assertEqual(server.hits("/down"), MAX_RETRIES + 1)
+
+    async def test_does_not_retry_other_statuses(self):
+        script = {"/gone": [(404, {}), (200, {})]}
+        async with StubServer(script) as server, CrawlEngine(rate_per_host=100, burst=10) as engine:
+            page = await engine.fetch(server.url("/gone"))
+        self.assertEqual(page.status, 404)
+        self.assertEqual(server.hits("/gone"), 1)
+
+
+class ThreadRecordingCache(HttpCache):
+    """HttpCache that notes which thread each lookup and update ran on"""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.threads = []
+
+    def conditional_headers(self, url):
+        self.threads.append(threading.get_ident())
+        return super().conditional_headers(url)
+
+    def revalidated(self, url, page):
+        self.threads.append(threading.get_ident())
+        return super().revalidated(url, page)
+
+
+class CacheTest(CrawlEngineTestCase):
+
+    async def test_cache_runs_off_the_event_loop(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = ThreadRecordingCache(os.path.join(tmp, "responses.sqlite3"))
+            script = {"/cached": [(200, {"ETag": '"v1"'}), (304, {"ETag": '"v1"'})]}
+            async with StubServer(script) as server, CrawlEngine(cache=cache) as engine:
+                first = await engine.fetch(server.url("/cached"))
+                second = await engine.fetch(server.url("/cached"))
+            cache.close()
+        self.assertEqual((second.status, second.content, second.from_cache), (200, first.content, True))
+        self.assertEqual(len(cache.threads), 4)
+        self.assertNotIn(threading.get_ident(), cache.threads)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+"""
+Crawl State Tests
+CrawlState's task table in a temporary database: new tasks are registered
+once, claims are atomic and resume after a restart, failures back off until
+they run out of attempts
+
+Usage: python -m unittest discover tests
+"""
+
+import os
+import sys
+import tempfile
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import crawl_state  # noqa: E402
+from crawl_state import DONE, FAILED, IN_PROGRESS, MAX_ATTEMPTS, PENDING, RETRY_AFTER, CrawlState  # noqa: E402
+
+PARTS = [{"ps": f"PS{number}", "name": f"Part {number}"} for number in range(10)]
+
+
+def ps_key(part):
+    return part["ps"]
+
+
+class CrawlStateTestCase(unittest.TestCase):
+    """A fresh state database in a temporary directory"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "state", "crawl.sqlite3")
+        self.state = CrawlState(self.path)
+
+    def tearDown(self):
+        self.state.close()
+        self.tmp.cleanup()
+
+
+class AddTest(CrawlStateTestCase):
+
+    def test_known_tasks_are_not_added_twice(self):
+        self.state.add_many(PARTS[:5], ps_key)
+        self.state.mark_done("PS0")
+        self.state.add_many(PARTS, ps_key)
+        self.assertEqual(self.state.counts(), {DONE: 1, PENDING: 9})
+
+    def test_known_handles_more_keys_than_sqlite_parameters(self):
+        self.state.add_many(PARTS, ps_key)
+        keys = [f"PS{number}" for number in range(0, 2000, 3)]
+        self.assertEqual(self.state.known(keys), {"PS0", "PS3", "PS6", "PS9"})
+        self.assertEqual(self.state.known([]), set())
+
+
+class ClaimTest(CrawlStateTestCase):
+
+    def test_concurrent_claims_do_not_overlap(self):
+        self.state.add_many(PARTS, ps_key)
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            batches = list(pool.map(self.state.claim, [3] * 4))
+        claimed = [part["ps"] for batch in batches for part in batch]
+        self.assertEqual(sorted(claimed), sorted(part["ps"] for part in PARTS))
+        self.assertEqual(self.state.claim(3), [])
+        self.assertEqual(self.state.counts(), {IN_PROGRESS: 10})
+
+    def test_interrupted_claims_are_released_on_restart(self):
+        self.state.add_many(PARTS, ps_key)
+        self.assertEqual(self.state.claim(4), PARTS[:4])
+        self.state.mark_done_many(["PS0", "PS1"])
+        self.state.close()
+
+        self.state = CrawlState(self.path)
+        self.assertEqual(self.state.release_stale(), 2)
+        self.assertEqual(self.state.claim(3), PARTS[2:5])
+
+    def test_fresh_discards_the_previous_run(self):
+        self.state.add_many(PARTS, ps_key)
+        self.state.close()
+        self.state = CrawlState(self.path, fresh=True)
+        self.assertEqual(self.state.counts(), {})
+
+
+class FailureTest(CrawlStateTestCase):
+
+    def test_transient_failures_back_off_then_give_up(self):
+        self.state.add_many(PARTS[:1], ps_key)
+        for attempt in range(1, MAX_ATTEMPTS):
+            self.state.claim(1)
+            started = time.time()
+            self.assertEqual(self.state.mark_failed("PS0", "503"), RETRY_AFTER)
+            retry_at, = self.state.db.execute("SELECT retry_at FROM tasks WHERE key = 'PS0'").fetchone()
+            self.assertGreaterEqual(retry_at - started, crawl_state.RETRY_BASE_DELAY * 2 ** (attempt - 1))
+            # Not due yet, then due once its retry time has passed
+            self.assertEqual(self.state.claim(1), [])
+            self.state.db.execute("UPDATE tasks SET retry_at = 0 WHERE key = 'PS0'")
+        self.state.claim(1)
+        self.assertEqual(self.state.mark_failed("PS0", "503"), FAILED)
+        self.assertEqual(self.state.claim(1), [])
+
+    def test_permanent_failures_are_not_retried(self):
+        self.state.add_many(PARTS[:1], ps_key)
+        self.state.claim(1)
+        self.assertEqual(self.state.mark_failed("PS0", "404", permanent=True), FAILED)
+        self.assertEqual(self.state.counts(), {FAILED: 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+"""
+Discovery Tests
+Crawls a two-page stub site: each part is handed on once however many pages
+link to it, listing pages are not revisited, and a resumed crawl hands on
+nothing it already reported
+
+Usage: python -m unittest discover tests
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+from aiohttp import web
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import discovery  # noqa: E402
+from test_crawl_engine import CrawlEngineTestCase, StubServer  # noqa: E402
+
+SITE = {
+    "/Refrigerator-Parts.htm": b'<a href="/PS111111-Whirlpool-W1.htm">valve</a>'
+                               b'<a href="/PS111111-Whirlpool-W1.htm">valve</a>'
+                               b'<a href="/Refrigerator-Parts.htm?start=2">next</a>',
+    "/Refrigerator-Parts.htm?start=2": b'<a href="/PS222222-GE-W2.htm">shelf</a>'
+                                       b'<a href="/PS111111-Whirlpool-W1.htm">valve</a>'
+                                       b'<a href="/Refrigerator-Parts.htm">first</a>',
+}
+SEEDS = {"refrigerator": ["/Refrigerator-Parts.htm"]}
+
+
+class StubSite(StubServer):
+    """Serves SITE by path and query, counting requests like StubServer"""
+
+    async def handle(self, request):
+        self.arrivals.setdefault(request.path_qs, []).append(0)
+        return web.Response(body=SITE.get(request.path_qs, b""), content_type="text/html")
+
+
+class DiscoverTest(CrawlEngineTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.saved = discovery.BASE_URL, discovery.STATE_FILE, discovery.PARTS_FILE
+        discovery.STATE_FILE = os.path.join(self.tmp.name, "discovery.state.sqlite3")
+        discovery.PARTS_FILE = os.path.join(self.tmp.name, "discovery.parts.sqlite3")
+
+    def tearDown(self):
+        discovery.BASE_URL, discovery.STATE_FILE, discovery.PARTS_FILE = self.saved
+        self.tmp.cleanup()
+        super().tearDown()
+
+    async def test_hands_on_each_part_once(self):
+        async with StubSite() as site:
+            discovery.BASE_URL = site.url("")
+            batches = []
+            pages, found = await discovery.discover(SEEDS, batches.append, fresh=True)
+            self.assertEqual((pages, found), (2, 2))
+            self.assertEqual([[part["ps"] for part in batch] for batch in batches], [["PS111111"], ["PS222222"]])
+            self.assertEqual({path: site.hits(path) for path in SITE}, dict.fromkeys(SITE, 1))
+
+            batches = []
+            self.assertEqual(await discovery.discover(SEEDS, batches.append), (0, 0))
+            self.assertEqual(batches, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
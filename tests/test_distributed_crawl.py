@@ -0,0 +1,126 @@
+"""
+Sharded Crawl Tests
+HashRing's placement and how little of it moves when a shard is added,
+enqueue() keeping already-queued parts on their shard across re-sharding,
+and FileQueue's claim / retry bookkeeping
+
+Usage: python -m unittest discover tests
+"""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+import unittest
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from crawl_state import IN_PROGRESS, PENDING, RETRY_AFTER  # noqa: E402
+from distributed_crawl import QUEUE_BACKENDS, FileQueue, HashRing, coordinate, open_queue  # noqa: E402
+
+KEYS = [f"PS{number:08d}" for number in range(2000)]
+
+
+def parts(keys):
+    return [{"ps": key} for key in keys]
+
+
+class HashRingTest(unittest.TestCase):
+
+    def test_placement_is_stable_and_covers_every_shard(self):
+        ring = HashRing(4)
+        owners = [ring.shard_for(key) for key in KEYS]
+        self.assertEqual(owners, [HashRing(4).shard_for(key) for key in KEYS])
+        counts = Counter(owners)
+        self.assertEqual(sorted(counts), [0, 1, 2, 3])
+        # 64 virtual nodes per shard keep every share within 2x of even
+        for count in counts.values():
+            self.assertGreater(count, len(KEYS) / 4 / 2)
+            self.assertLess(count, len(KEYS) / 4 * 2)
+
+    def test_adding_a_shard_only_moves_keys_onto_it(self):
+        before, after = HashRing(4), HashRing(5)
+        moved = [key for key in KEYS if before.shard_for(key) != after.shard_for(key)]
+        self.assertTrue(all(after.shard_for(key) == 4 for key in moved))
+        self.assertLess(len(moved), len(KEYS) / 5 * 2)
+
+
+class EnqueueTest(unittest.TestCase):
+
+    def coordinate(self, queue_dir, shards, backend, keys):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return coordinate(queue_dir, shards, backend, parts=parts(keys))
+
+    def queued_on(self, config, queue_dir, keys):
+        """{key: [shards whose queue has it]} over the ring's shards"""
+        found = {}
+        for shard in range(config["shards"]):
+            queue = open_queue(config, queue_dir, shard)
+            for key in queue.known(keys):
+                found.setdefault(key, []).append(shard)
+            queue.close()
+        return found
+
+    def test_resharding_leaves_queued_parts_in_place(self):
+        for backend in sorted(QUEUE_BACKENDS):
+            with self.subTest(backend=backend), tempfile.TemporaryDirectory() as queue_dir:
+                config, _ = self.coordinate(queue_dir, 3, backend, KEYS[:300])
+                before = self.queued_on(config, queue_dir, KEYS[:300])
+                config, counts = self.coordinate(queue_dir, 4, backend, KEYS[:400])
+                after = self.queued_on(config, queue_dir, KEYS[:400])
+                self.assertEqual(sum(counts.values()), 400)
+                self.assertTrue(all(len(shards) == 1 for shards in after.values()))
+                self.assertEqual({key: after[key] for key in before}, before)
+                ring = HashRing(4)
+                self.assertTrue(all(after[key] == [ring.shard_for(key)] for key in KEYS[300:400]))
+
+    def test_shrinking_moves_parts_off_removed_shards(self):
+        with tempfile.TemporaryDirectory() as queue_dir:
+            self.coordinate(queue_dir, 4, "sqlite", KEYS[:300])
+            config, counts = self.coordinate(queue_dir, 3, "sqlite", KEYS[:300])
+            self.assertEqual(sorted(counts), [0, 1, 2])
+            self.assertEqual(sum(counts.values()), 300)
+            self.assertEqual(len(self.queued_on(config, queue_dir, KEYS[:300])), 300)
+
+
+class FileQueueTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.queue = FileQueue(os.path.join(self.tmp.name, "shard-000"))
+        self.queue.add_many(parts(KEYS[:20]), key=lambda part: part["ps"])
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_claims_each_task_once(self):
+        claimed = self.queue.claim(8) + self.queue.claim(100)
+        self.assertEqual(sorted(part["ps"] for part in claimed), KEYS[:20])
+        self.assertEqual(self.queue.claim(100), [])
+        self.assertEqual(self.queue.counts(), {IN_PROGRESS: 20})
+
+    def test_skips_tasks_waiting_to_retry(self):
+        first = self.queue.claim(3)
+        for part in first:
+            self.assertEqual(self.queue.mark_failed(part["ps"], "timeout"), RETRY_AFTER)
+        rest = self.queue.claim(100)
+        self.assertEqual(len(rest), 17)
+        self.assertEqual(len(self.queue.waiting), 3)
+        self.assertEqual(self.queue.claim(100), [])
+        # Once due they are claimed again
+        self.queue.waiting = {name: time.time() - 1 for name in self.queue.waiting}
+        for part in first:
+            path = self.queue.task_path(PENDING, part["ps"])
+            task = self.queue.read_task(path)
+            task["retry_at"] = 0
+            self.queue.write_task(path, task)
+        self.assertEqual(sorted(part["ps"] for part in self.queue.claim(100)), sorted(part["ps"] for part in first))
+        self.assertEqual(self.queue.waiting, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
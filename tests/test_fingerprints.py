@@ -0,0 +1,72 @@
+"""
+Page Fingerprint Tests
+page_fingerprint over a fixture page: edits to navigation, footer, reviews and
+other chrome keep the fingerprint, edits to anything the part dict is built
+from change it
+
+Usage: python -m unittest discover tests
+"""
+
+import os
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fingerprints import page_fingerprint  # noqa: E402
+
+PAGE_FILE = os.path.join(ROOT, "fixtures", "pages", "PS11755766.html")
+PART_INFO = {"ps": "PS11755766", "mfr": "WP2304134", "brand": "Whirlpool", "type": "refrigerator"}
+URL = "https://www.partselect.com/PS11755766.htm"
+
+JSON_LD = (b'<script type="application/ld+json">{"@type": "Product", "name": "Water Inlet Valve",'
+           b' "offers": {"price": "62.18"}}</script>\n</head>')
+
+
+class PageFingerprintTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        with open(PAGE_FILE, 'rb') as f:
+            cls.page = f.read()
+
+    def fingerprint(self, old=b'', new=b''):
+        if old:
+            self.assertIn(old, self.page)
+        return page_fingerprint(self.page.replace(old, new) if old else self.page, PART_INFO, URL)
+
+    def test_chrome_edits_keep_the_fingerprint(self):
+        edits = {
+            "nav": (b'Dishwasher Parts</a></li>', b'Dishwasher Parts</a></li><li><a href="/Sale.htm">Sale</a></li>'),
+            "breadcrumbs": (b'Whirlpool Parts</a></div>', b'Whirlpool Parts</a> &gt; Valves</div>'),
+            "review": (b'took 20 minutes', b'took half an hour'),
+            "new review": (b'<div class="review"><div class="review-title">Works',
+                           b'<div class="review"><div class="review-title">Great</div><div><p>Easy</p></div></div>'
+                           b'<div class="review"><div class="review-title">Works'),
+            "footer": (b'1-866-319-8402', b'1-888-000-0000'),
+            "hidden input": (b'</main>', b'<input type="hidden" name="csrf" value="abc123"></main>'),
+        }
+        for name, (old, new) in edits.items():
+            self.assertEqual(self.fingerprint(old, new), self.fingerprint(), name)
+
+    def test_part_edits_change_the_fingerprint(self):
+        edits = {
+            "title": (b'<title>Water Inlet Valve', b'<title>Inlet Valve'),
+            "price": (b'$62.18', b'$64.99'),
+            "description": (b'genuine OEM', b'aftermarket'),
+            "symptom": (b'<li>Water dispenser not working</li>', b''),
+            "model": (b'MFI2570FEZ</a>', b'MFI2570FEY</a>'),
+            "install step": (b'Remove the lower rear access panel.', b'Remove the back panel.'),
+            "json-ld": (b'</head>', JSON_LD),
+        }
+        for name, (old, new) in edits.items():
+            self.assertNotEqual(self.fingerprint(old, new), self.fingerprint(), name)
+
+    def test_part_info_and_url_are_part_of_the_fingerprint(self):
+        self.assertNotEqual(page_fingerprint(self.page, dict(PART_INFO, mfr="W10000000"), URL), self.fingerprint())
+        self.assertNotEqual(page_fingerprint(self.page, PART_INFO, URL + "?x=1"), self.fingerprint())
+
+
+if __name__ == "__main__":
+    unittest.main()
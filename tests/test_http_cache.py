@@ -0,0 +1,71 @@
+"""
+HTTP Cache Tests
+Conditional GETs through both fetch paths against a stub server: a 304 is
+served from the cache, and a 304 whose entry was evicted in the meantime is
+fetched again in full instead of surfacing as an empty failure
+
+Usage: python -m unittest discover tests
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fetch  # noqa: E402
+from crawl_engine import CrawlEngine  # noqa: E402
+from http_cache import HttpCache  # noqa: E402
+from test_crawl_engine import StubServer  # noqa: E402
+
+ETAG = {"ETag": '"v1"'}
+
+
+class HttpCacheTestCase(unittest.IsolatedAsyncioTestCase):
+    """Points both fetch paths at a fresh cache in a temporary directory"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = HttpCache(os.path.join(self.tmp.name, "responses.sqlite3"))
+        self.saved = fetch.CACHE_ENABLED, fetch._cache
+        fetch.CACHE_ENABLED, fetch._cache = True, self.cache
+
+    def tearDown(self):
+        fetch.CACHE_ENABLED, fetch._cache = self.saved
+        self.cache.close()
+        self.tmp.cleanup()
+
+    def fetchers(self, engine):
+        return {"engine": engine.fetch, "sync": lambda url: asyncio.to_thread(fetch.fetch, url)}
+
+
+class RevalidateTest(HttpCacheTestCase):
+
+    async def test_not_modified_is_served_from_cache(self):
+        script = {f"/{name}": [(200, ETAG), (304, ETAG)] for name in ("engine", "sync")}
+        async with StubServer(script) as server, CrawlEngine(rate_per_host=100, burst=10) as engine:
+            for name, get in self.fetchers(engine).items():
+                url = server.url(f"/{name}")
+                first = await get(url)
+                second = await get(url)
+                self.assertEqual((second.status, second.content, second.from_cache),
+                                 (200, first.content, True), name)
+                self.assertEqual(server.hits(f"/{name}"), 2, name)
+
+    async def test_evicted_entry_is_fetched_again_in_full(self):
+        # The server answers 304 but the cache no longer has the body
+        script = {f"/{name}": [(304, ETAG), (200, ETAG)] for name in ("engine", "sync")}
+        async with StubServer(script) as server, CrawlEngine(rate_per_host=100, burst=10) as engine:
+            for name, get in self.fetchers(engine).items():
+                page = await get(server.url(f"/{name}"))
+                self.assertEqual((page.status, page.content), (200, f"/{name} #2".encode()), name)
+                self.assertEqual(server.hits(f"/{name}"), 2, name)
+                self.assertIsNotNone(self.cache.get(server.url(f"/{name}")), name)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+"""
+Model Crawler Tests
+invert() over model page records, where a page crawled more than once counts
+only by its latest record
+
+Usage: python -m unittest discover tests
+"""
+
+import os
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from model_crawler import invert, model_url  # noqa: E402
+
+
+def record(model, part_numbers, page=""):
+    return {"url": model_url(model) + page, "model": model,
+            "parts": [{"ps": ps, "mfr": "X", "brand": "GE", "type": "dishwasher"} for ps in part_numbers]}
+
+
+class InvertTest(unittest.TestCase):
+
+    def test_parts_map_to_every_model_listing_them(self):
+        records = [record("GDF520PGJ2WW", ["PS1", "PS2"]), record("GDF520PGJ2WW", ["PS3"], page="?start=2"),
+                   record("GDT695SSJ2SS", ["PS2"])]
+        self.assertEqual(invert(records), {"PS1": ["GDF520PGJ2WW"], "PS2": ["GDF520PGJ2WW", "GDT695SSJ2SS"],
+                                           "PS3": ["GDF520PGJ2WW"]})
+
+    def test_recrawled_page_replaces_its_earlier_record(self):
+        records = [record("GDF520PGJ2WW", ["PS1", "PS2"]), record("GDT695SSJ2SS", ["PS2"]),
+                   record("GDF520PGJ2WW", ["PS2"])]
+        self.assertEqual(invert(records), {"PS2": ["GDF520PGJ2WW", "GDT695SSJ2SS"]})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+"""
+Part Sink Tests
+JsonlSink resuming after a crash mid-write, compact() writing the document
+json.dump(indent=2) would, and summarize() over a part stream
+
+Usage: python -m unittest discover tests
+"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from part_sink import JsonlSink, compact, drop_partial_line, read_jsonl, summarize, write_catalog  # noqa: E402
+
+PARTS = [
+    {"part_number": "PS11752778", "name": "Ice Maker Assembly", "type": "refrigerator",
+     "brand": "Whirlpool", "price": 89.95},
+    {"part_number": "PS11722237", "name": "Détergent Dispenser", "type": "dishwasher",
+     "brand": "GE", "price": 58.40},
+    {"part_number": "PS11755766", "name": "Water Inlet Valve", "type": "refrigerator",
+     "brand": "Whirlpool", "price": None},
+]
+
+
+class PartSinkTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "scraped", "parts.jsonl")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+
+class JsonlSinkTest(PartSinkTestCase):
+
+    def test_duplicates_are_skipped(self):
+        with JsonlSink(self.path) as sink:
+            self.assertEqual([sink.write(part) for part in PARTS + PARTS[:1]], [True] * 3 + [False])
+            self.assertIn("PS11722237", sink)
+            self.assertEqual(len(sink), 3)
+        self.assertEqual(list(read_jsonl(self.path)), PARTS)
+
+    def test_resume_after_a_torn_final_line(self):
+        with JsonlSink(self.path, flush_every=1) as sink:
+            sink.write(PARTS[0])
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(PARTS[1])[:20])
+
+        with JsonlSink(self.path) as sink:
+            self.assertEqual(sink.resumed, 1)
+            self.assertFalse(sink.write(PARTS[0]))
+            self.assertTrue(sink.write(PARTS[1]))
+        self.assertEqual(list(read_jsonl(self.path)), PARTS[:2])
+
+    def test_fresh_starts_over(self):
+        with JsonlSink(self.path) as sink:
+            sink.write(PARTS[0])
+        with JsonlSink(self.path, fresh=True) as sink:
+            self.assertEqual((sink.resumed, len(sink)), (0, 0))
+
+    def test_records_are_on_disk_every_flush_every_writes(self):
+        with JsonlSink(self.path, flush_every=2) as sink:
+            sink.write(PARTS[0])
+            sink.write(PARTS[1])
+            self.assertEqual(sink.pending, 0)
+            self.assertEqual(list(read_jsonl(self.path)), PARTS[:2])
+
+
+class DropPartialLineTest(PartSinkTestCase):
+
+    def write(self, content):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, 'wb') as f:
+            f.write(content)
+        drop_partial_line(self.path)
+        with open(self.path, 'rb') as f:
+            return f.read()
+
+    def test_truncates_to_the_last_newline(self):
+        complete = b'{"a": 1}\n' * 1000
+        self.assertEqual(self.write(complete + b'{"a": 2'), complete)
+        self.assertEqual(self.write(complete), complete)
+        self.assertEqual(self.write(b'{"a": ' + b'1' * 10000), b'')
+        self.assertEqual(self.write(b''), b'')
+
+
+class CompactTest(PartSinkTestCase):
+
+    def test_matches_json_dump_and_keeps_the_first_record(self):
+        with JsonlSink(self.path) as sink:
+            for part in PARTS:
+                sink.write(part)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(dict(PARTS[0], price=1.0)) + '\n')
+        output = os.path.join(self.tmp.name, "parts.json")
+
+        self.assertEqual(compact(self.path, output), 3)
+        with open(output, 'r', encoding='utf-8') as f:
+            self.assertEqual(f.read(), json.dumps({"parts": PARTS}, indent=2, ensure_ascii=False))
+
+    def test_empty_catalog(self):
+        output = os.path.join(self.tmp.name, "parts.json")
+        self.assertEqual(write_catalog([], output), 0)
+        with open(output, 'r', encoding='utf-8') as f:
+            self.assertEqual(f.read(), json.dumps({"parts": []}, indent=2))
+
+
+class SummarizeTest(unittest.TestCase):
+
+    def test_counts_and_price_range(self):
+        summary = summarize(iter(PARTS))
+        self.assertEqual(summary["total"], 3)
+        self.assertEqual(summary["by_type"], {"refrigerator": 2, "dishwasher": 1})
+        self.assertEqual(summary["by_brand"]["Whirlpool"], 2)
+        self.assertEqual((summary["price_min"], summary["price_max"]), (58.40, 89.95))
+        self.assertAlmostEqual(summary["price_avg"], (58.40 + 89.95) / 2)
+        self.assertIsNone(summarize([])["price_avg"])
+
+
+if __name__ == "__main__":
+    unittest.main()
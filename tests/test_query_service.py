@@ -0,0 +1,144 @@
+"""
+Query Service Tests
+SubstringIndex lookups and the Catalog's keyword / exact symptom searches
+checked against a linear scan of the parts, on whole words, word fragments
+and phrases, plus the LRU result cache's eviction and expiry
+
+Usage: python -m unittest discover tests
+"""
+
+import os
+import random
+import sys
+import unittest
+from unittest import mock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import query_service  # noqa: E402
+from query_service import SEARCH_FIELDS, Catalog, LRUCache, SubstringIndex  # noqa: E402
+
+WORDS = ("ice maker leaking door seal water valve pump motor noisy drain filter light "
+         "dispenser spray arm rack latch heater thermostat fan compressor belt not working").split()
+
+
+def random_parts(seed, count=400):
+    generator = random.Random(seed)
+    return [{"part_number": f"PS{row:06d}",
+             "name": " ".join(generator.choices(WORDS, k=3)).title(),
+             "description": " ".join(generator.choices(WORDS, k=generator.randint(3, 12))) + ".",
+             "symptoms_fixed": [" ".join(generator.choices(WORDS, k=generator.randint(2, 4))).capitalize()
+                                for _ in range(generator.randint(0, 3))]}
+            for row in range(count)]
+
+
+def scan(parts, texts, query, limit):
+    return [part for part, text in zip(parts, texts) if query in text][:limit]
+
+
+def queries(seed, count=150):
+    """Whole words, fragments cut from inside words, and phrases spanning words"""
+    generator = random.Random(seed)
+    for _ in range(count):
+        phrase = " ".join(generator.choices(WORDS, k=generator.randint(1, 3)))
+        start = generator.randint(0, len(phrase) - 1)
+        yield phrase[start:generator.randint(start + 1, len(phrase))].strip() or phrase
+        yield phrase
+    yield "ps0001"
+    yield "zzz"
+    yield "- ."
+
+
+class SubstringIndexTest(unittest.TestCase):
+
+    def test_tokens_matching(self):
+        words = SubstringIndex({token: [0] for token in ("leak", "leaking", "leaky", "cleaning", "lea")})
+        self.assertEqual(sorted(words.tokens_matching("lea", False, False)),
+                         ["cleaning", "lea", "leak", "leaking", "leaky"])
+        self.assertEqual(words.tokens_matching("lea", True, False), ["lea", "leak", "leaking", "leaky"])
+        self.assertEqual(sorted(words.tokens_matching("ing", False, True)), ["cleaning", "leaking"])
+        self.assertEqual(words.tokens_matching("leak", True, True), ["leak"])
+        self.assertEqual(words.tokens_matching("eak", True, True), [])
+
+    def test_candidates_are_a_superset_of_the_matches(self):
+        parts = random_parts(seed=2)
+        catalog = Catalog(parts)
+        for query in queries(seed=4):
+            with self.subTest(query=query):
+                candidates = catalog.keywords.candidates(query)
+                if candidates is None:
+                    continue
+                candidates = list(candidates)
+                self.assertEqual(candidates, sorted(set(candidates)))
+                matches = [position for position, text in enumerate(catalog.haystacks) if query in text]
+                self.assertLessEqual(set(matches), set(candidates))
+
+
+class CatalogSearchTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.parts = random_parts(seed=1)
+        cls.catalog = Catalog(cls.parts)
+
+    def test_keyword_search_matches_a_scan(self):
+        texts = ["\0".join(text.lower() for field in SEARCH_FIELDS for text in query_service.as_list(part.get(field)))
+                 for part in self.parts]
+        for query in queries(seed=3):
+            for limit in (1, 5, 50):
+                with self.subTest(query=query, limit=limit):
+                    self.assertEqual(self.catalog.keyword_search(query, limit), scan(self.parts, texts, query, limit))
+
+    def test_screening_past_the_first_candidates_matches_a_scan(self):
+        texts = self.catalog.haystacks
+        with mock.patch.object(query_service, "SCREEN_AFTER", 0):
+            for query in queries(seed=6):
+                with self.subTest(query=query):
+                    self.assertEqual(self.catalog.keyword_search(query, 50), scan(self.parts, texts, query, 50))
+
+    def test_exact_symptom_matches_a_scan(self):
+        texts = ["\0".join(symptom.lower() for symptom in part["symptoms_fixed"]) for part in self.parts]
+        for query in queries(seed=5):
+            with self.subTest(query=query):
+                expected = scan(self.parts, texts, query, 5)
+                parts, match = self.catalog.troubleshoot(query, 5)
+                self.assertEqual(match, "exact" if expected else "ranked")
+                if expected:
+                    self.assertEqual(parts, expected)
+
+    def test_lookups(self):
+        self.assertIs(self.catalog.find_part("ps000007"), self.parts[7])
+        self.assertIsNone(self.catalog.find_part("PS404"))
+        self.assertFalse(self.catalog.is_compatible("PS000007", "WRS325SDHZ"))
+
+
+class LRUCacheTest(unittest.TestCase):
+
+    def test_evicts_the_least_recently_used(self):
+        cache = LRUCache(maxsize=2, ttl=60)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        self.assertEqual(cache.get("a"), 1)
+        cache.put("c", 3)
+        self.assertEqual((cache.get("a"), cache.get("b"), cache.get("c")), (1, None, 3))
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_entries_expire(self):
+        cache = LRUCache(maxsize=2, ttl=10)
+        with mock.patch.object(query_service.time, "monotonic", return_value=100.0):
+            cache.put("a", 1)
+        with mock.patch.object(query_service.time, "monotonic", return_value=109.0):
+            self.assertEqual(cache.get("a"), 1)
+        with mock.patch.object(query_service.time, "monotonic", return_value=111.0):
+            self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.stats()["size"], 0)
+
+    def test_zero_size_disables_caching(self):
+        cache = LRUCache(maxsize=0)
+        cache.put("a", 1)
+        self.assertIsNone(cache.get("a"))
+
+
+if __name__ == "__main__":
+    unittest.main()
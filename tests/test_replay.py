@@ -0,0 +1,104 @@
+"""
+Record / Replay Tests
+benchmarks/replay.py's capture path: record() fetches a page from a local
+stand-in for the live site into an empty fixture corpus, blanking tokens
+without changing what the scrapers extract, and labels it "recorded"
+
+Usage: python -m unittest discover tests
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+import fetch  # noqa: E402
+import replay  # noqa: E402
+import scraper_specific  # noqa: E402
+
+FIXTURE = os.path.join(ROOT, "fixtures", "pages", "PS11752778.html")
+PS = "PS11752778"
+TOKENS = (b'<meta name="csrf-token" content="c5rf-s3cret">\n'
+          b'<meta name="viewport" content="width=device-width">\n</head>')
+HIDDEN = b'<input type="hidden" name="__RequestVerificationToken" value="v3rify-s3cret"></body>'
+
+
+class SanitizeTest(unittest.TestCase):
+
+    def test_blanks_token_values_only(self):
+        page = (b'<head><meta name="csrf-token" content="abc"><meta name=description content="Ice maker">'
+                b'</head><form><input type=hidden name=state value=xyz><input type="text" value="keep"></form>')
+        self.assertEqual(replay.sanitize(page),
+                         b'<head><meta name="csrf-token" content=""><meta name=description content="Ice maker">'
+                         b'</head><form><input type=hidden name=state value=""><input type="text" value="keep"></form>')
+
+    def test_fixture_names(self):
+        self.assertEqual(replay.fixture_name("specific", PS), f"{PS}.html")
+        self.assertEqual(replay.fixture_name("listing", "/Refrigerator-Parts.htm"), "listing-refrigerator-parts.html")
+
+
+class RecordTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.live_dir = os.path.join(self.tmp.name, "live")
+        self.corpus_dir = os.path.join(self.tmp.name, "corpus")
+        os.makedirs(self.live_dir)
+        os.makedirs(self.corpus_dir)
+        self.saved = scraper_specific.BASE_URL, fetch.CACHE_ENABLED, fetch.RATE_PER_HOST
+        fetch.RATE_PER_HOST = None
+
+    def tearDown(self):
+        scraper_specific.BASE_URL, fetch.CACHE_ENABLED, fetch.RATE_PER_HOST = self.saved
+        self.tmp.cleanup()
+
+    def test_records_a_sanitized_page(self):
+        with open(FIXTURE, 'rb') as f:
+            original = f.read()
+        live_page = original.replace(b'</head>', TOKENS, 1).replace(b'</body>', HIDDEN, 1)
+        with open(os.path.join(self.live_dir, "page.html"), 'wb') as f:
+            f.write(live_page)
+        part_info = next(part for part in scraper_specific.PARTS_TO_SCRAPE if part["ps"] == PS)
+        replay.save_manifest([{"file": "page.html", "url": scraper_specific.part_url(part_info)}], self.live_dir)
+        replay.save_manifest([], self.corpus_dir)
+
+        with replay.ReplayServer(self.live_dir) as live:
+            scraper_specific.BASE_URL = live.base_url
+            self.assertEqual(replay.record("specific", [PS, "PS404"], self.corpus_dir), 1)
+            self.assertEqual(live.hits, 1)
+
+        manifest = replay.load_manifest(self.corpus_dir)
+        self.assertEqual([(entry["file"], entry["scraper"], entry["source"]) for entry in manifest],
+                         [(f"{PS}.html", "specific", "recorded")])
+        with open(os.path.join(self.corpus_dir, manifest[0]["file"]), 'rb') as f:
+            recorded = f.read()
+        self.assertNotIn(b"s3cret", recorded)
+        self.assertIn(b'content="width=device-width"', recorded)
+        url = manifest[0]["url"]
+        self.assertEqual(scraper_specific.parse_part(recorded, part_info, url),
+                         scraper_specific.parse_part(live_page, part_info, url))
+
+    def test_rerecording_replaces_the_entry(self):
+        shutil.copy(FIXTURE, os.path.join(self.live_dir, "page.html"))
+        part_info = next(part for part in scraper_specific.PARTS_TO_SCRAPE if part["ps"] == PS)
+        replay.save_manifest([{"file": "page.html", "url": scraper_specific.part_url(part_info)}], self.live_dir)
+        replay.save_manifest([{"file": f"{PS}.html", "scraper": "specific", "source": "synthetic",
+                               "url": "https://www.partselect.com/x.htm", "part_info": part_info}],
+                             self.corpus_dir)
+
+        with replay.ReplayServer(self.live_dir) as live:
+            scraper_specific.BASE_URL = live.base_url
+            replay.record("specific", [PS], self.corpus_dir)
+        with open(os.path.join(self.corpus_dir, replay.MANIFEST_FILE), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        self.assertEqual([entry["source"] for entry in manifest], ["recorded"])
+
+
+if __name__ == "__main__":
+    unittest.main()
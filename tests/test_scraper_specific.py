@@ -0,0 +1,60 @@
+"""
+Specific Scraper Parsing Tests
+parse_part() re-reads the whole page only when it holds a section container
+the strainer dropped - not whenever "installation" turns up in a menu
+
+Usage: python -m unittest discover tests
+"""
+
+import os
+import sys
+import unittest
+from unittest import mock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import scraper_specific  # noqa: E402
+from html_parsing import make_soup  # noqa: E402
+
+FIXTURE = os.path.join(ROOT, "fixtures", "pages", "PS11722237.html")
+PART_INFO = {"ps": "PS11722237", "mfr": "WD12X10422", "name": "Dishwasher Detergent Dispenser",
+             "type": "dishwasher", "brand": "GE"}
+URL = "https://www.partselect.com/PS11722237.htm"
+
+MENU_ONLY_PAGE = b"""<html><head><title>Detergent Dispenser</title></head><body>
+<ul class="nav-menu"><li><a href="/Installation-Videos.htm">Installation Videos</a></li></ul>
+<h1>Dishwasher Detergent Dispenser</h1>
+<div class="price">$58.40</div>
+<footer><a href="/help">Installation help and repair issues</a></footer>
+</body></html>
+"""
+
+
+class ParsePartTest(unittest.TestCase):
+
+    def parse(self, content):
+        """parse_part's result and how many full-page parses it made"""
+        with mock.patch.object(scraper_specific, "make_soup", wraps=make_soup) as full_parse:
+            part = scraper_specific.parse_part(content, PART_INFO, URL)
+        return part, full_parse.call_count
+
+    def test_menu_mentions_do_not_trigger_a_reparse(self):
+        part, reparses = self.parse(MENU_ONLY_PAGE)
+        self.assertEqual(reparses, 0)
+        self.assertEqual(part["price"], 58.40)
+
+    def test_dropped_sections_are_read_from_a_full_parse(self):
+        with open(FIXTURE, 'rb') as f:
+            content = f.read()
+        part, reparses = self.parse(content)
+        self.assertEqual(reparses, 1)
+        symptoms, models, install_steps = scraper_specific.parse_sections(make_soup(content))
+        self.assertEqual(part["symptoms_fixed"], symptoms)
+        self.assertEqual(part["compatible_models"], models)
+        self.assertEqual(part["install_instructions"], install_steps)
+        self.assertEqual(models, ["GDF520PGJ2WW", "GDT695SSJ2SS"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+"""
+Structured Data Fast Path Tests
+extract_fields() on hand-made pages and a fixture page: a page whose
+structured data covers every field it has builds no DOM even when reviews and
+footers mention problems, a section in a container the strainer drops is
+re-read from a full parse, and the step timings say which path ran
+
+Usage: python -m unittest discover tests
+"""
+
+import os
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from html_parsing import make_soup  # noqa: E402
+from part_extractor import extract_part_fields  # noqa: E402
+from structured_data import extract_fields  # noqa: E402
+
+FIXTURE = os.path.join(ROOT, "fixtures", "pages", "PS11755766.html")
+PS, MFR = "PS11755766", "WP2304134"
+
+STRUCTURED_PAGE = b"""<!DOCTYPE html>
+<html><head>
+<title>Water Inlet Valve WP2304134 | PartSelect.com</title>
+<script type="application/ld+json">
+{"@context": "https://schema.org", "@type": "Product", "name": "Water Inlet Valve",
+ "description": "Controls the flow of water to the ice maker and dispenser. Genuine OEM replacement part.",
+ "offers": {"@type": "Offer", "price": "62.18"}}
+</script>
+</head><body>
+<h1>Water Inlet Valve WP2304134</h1>
+<div class="reviews"><p>No problem with fit. Solved the leaking issue.</p></div>
+<footer>Have an issue with your order? Call us.</footer>
+</body></html>
+"""
+
+
+class ExtractFieldsTest(unittest.TestCase):
+
+    def test_structured_page_builds_no_dom(self):
+        timings = {}
+        fields, dom_fields = extract_fields(STRUCTURED_PAGE, PS, MFR, timings=timings)
+        self.assertEqual(dom_fields, [])
+        self.assertEqual(sorted(timings), ["structured"])
+        self.assertEqual((fields["name"], fields["price"]), ("Water Inlet Valve", 62.18))
+        self.assertEqual((fields["symptoms"], fields["models"], fields["install_steps"]), ([], [], []))
+
+    def test_strained_out_sections_are_reparsed(self):
+        with open(FIXTURE, 'rb') as f:
+            content = f.read()
+        timings = {}
+        fields, dom_fields = extract_fields(content, PS, MFR, timings=timings)
+        self.assertIn("symptoms", dom_fields)
+        self.assertIn("reparse", timings)
+        full = extract_part_fields(make_soup(content), PS, MFR)
+        for field in ("symptoms", "models", "install_steps"):
+            self.assertTrue(fields[field], field)
+            self.assertEqual(fields[field], full[field], field)
+
+    def test_timings_are_optional(self):
+        with open(FIXTURE, 'rb') as f:
+            content = f.read()
+        timings = {}
+        self.assertEqual(extract_fields(content, PS, MFR), extract_fields(content, PS, MFR, timings=timings))
+        self.assertTrue({"structured", "parse", "extract"} <= set(timings))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+"""
+Symptom Search Tests
+Tokenizing and stemming, and SymptomSearch's early-stopping top-k checked
+against scoring every part on a catalog large enough to read several blocks
+
+Usage: python -m unittest discover tests
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from symptom_search import (FIRST_BLOCK, SymptomSearch, build_search_index, tokenize,  # noqa: E402
+                            write_search_index)
+
+PARTS = [
+    {"part_number": "PS11752778", "name": "Ice Maker Assembly",
+     "description": "Ice maker for side-by-side refrigerators.",
+     "symptoms_fixed": ["Ice maker not making ice", "Leaking"]},
+    {"part_number": "PS11722237", "name": "Dishwasher Detergent Dispenser",
+     "description": "Holds the detergent until the wash cycle.",
+     "symptoms_fixed": ["Not cleaning dishes properly", "Door won't close"]},
+    {"part_number": "PS11755766", "name": "Water Inlet Valve",
+     "description": "Feeds water to the ice maker and dispenser.",
+     "symptoms_fixed": ["Leaking", "Water dispenser not working"]},
+]
+
+WORDS = ("ice maker leaking door seal water valve pump motor noisy drain filter light "
+         "dispenser spray arm rack latch heater thermostat fan compressor belt").split()
+
+
+def random_parts(seed, count=600):
+    generator = random.Random(seed)
+    return [{"part_number": f"PS{row:06d}",
+             "name": " ".join(generator.choices(WORDS, k=3)),
+             "description": " ".join(generator.choices(WORDS, k=generator.randint(5, 30))),
+             "symptoms_fixed": [" ".join(generator.choices(WORDS, k=3)) for _ in range(generator.randint(0, 3))]}
+            for row in range(count)]
+
+
+def exhaustive_search(index, query, k):
+    """search() without early stopping: score every part, best first, ties by catalog order"""
+    terms = [term for term in dict.fromkeys(tokenize(query)) if term in index["terms"]]
+    scores = {}
+    for term in terms:
+        for doc, impact in index["terms"][term]:
+            scores[doc] = scores.get(doc, 0.0) + impact
+    ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:k]
+    return [(index["parts"][doc], round(score, 4)) for doc, score in ranked]
+
+
+class TokenizeTest(unittest.TestCase):
+
+    def test_stopwords_synonyms_and_stems(self):
+        self.assertEqual(tokenize("Fridge NOT making ice"), ["refrigerator", "mak", "ice"])
+        self.assertEqual(tokenize("leaking leaks"), ["leak", "leak"])
+        self.assertEqual(tokenize("tubes"), ["tub"])
+        # A stem shorter than MIN_STEM keeps its suffix
+        self.assertEqual(tokenize("bed"), ["bed"])
+
+
+class SearchTest(unittest.TestCase):
+
+    def test_ranks_field_matches(self):
+        searcher = SymptomSearch(build_search_index(PARTS))
+        results = searcher.search("fridge ice maker not making ice")
+        self.assertEqual(results[0][0], "PS11752778")
+        self.assertCountEqual([part for part, _ in searcher.search("leaking", k=5)], ["PS11752778", "PS11755766"])
+        self.assertEqual(searcher.search("the and"), [])
+        self.assertEqual(searcher.search("microwave"), [])
+
+    def test_early_stopping_matches_an_exhaustive_ranking(self):
+        parts = random_parts(seed=11)
+        index = build_search_index(parts)
+        searcher = SymptomSearch(index)
+        # Common terms have posting lists many blocks long
+        self.assertGreater(max(map(len, index["terms"].values())), FIRST_BLOCK * 8)
+        generator = random.Random(5)
+        for _ in range(50):
+            query = " ".join(generator.choices(WORDS, k=generator.randint(1, 4)))
+            for k in (1, 5, 20):
+                with self.subTest(query=query, k=k):
+                    self.assertEqual(searcher.search(query, k), exhaustive_search(index, query, k))
+
+    def test_load_round_trip_and_version_check(self):
+        index = build_search_index(PARTS)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "symptomIndex.json")
+            write_search_index(index, path)
+            self.assertEqual(SymptomSearch.load(path).search("leaking"), SymptomSearch(index).search("leaking"))
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(dict(index, version=0), f)
+            with self.assertRaises(ValueError):
+                SymptomSearch.load(path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+"""
+Part URL Resolution Cache
+Remembers which URL each PS number resolved to, and which URL pattern
+wins most often per brand, so later crawls need one request per part
+"""
+
+import json
+import os
+import threading
+
+# The scraper's cache; runs against other hosts (stub servers, shards) pass their own path
+CACHE_FILE = "backend/data/urlResolution.json"
+
+
+class UrlResolver:
+    """
+    Orders candidate URLs for a part: the cached canonical URL first, then the
+    URL patterns sorted by how often they have resolved for the part's brand.
+    """
+
+    def __init__(self, patterns, path):
+        # patterns: {name: format string using {base}, {ps}, {brand}, {mfr}}
+        self.patterns = patterns
+        self.path = path
+        self.canonical = {}
+        self.wins = {}
+        self.lock = threading.Lock()
+        self.dirty = False
+        self.load()
+
+    def load(self):
+        """Load the cache file if it exists"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        self.canonical = data.get("canonical", {})
+        self.wins = data.get("pattern_wins", {})
+
+    def save(self):
+        """Write the cache file (atomically)"""
+        with self.lock:
+            if not self.dirty:
+                return
+            data = {"canonical": self.canonical, "pattern_wins": self.wins}
+            self.dirty = False
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def candidates(self, part_info, base_url):
+        """List of (pattern_name, url) to try, best guess first"""
+        ps = part_info["ps"]
+        brand_wins = self.wins.get(part_info.get("brand", ""), {})
+        order = list(self.patterns)
+        # Stable sort keeps the declared order as the tie-breaker
+        order.sort(key=lambda name: -brand_wins.get(name, 0))
+
+        urls = []
+        cached = self.canonical.get(ps)
+        if cached:
+            urls.append(("cached", cached))
+        for name in order:
+            url = self.patterns[name].format(base=base_url, ps=ps,
+                                             brand=part_info.get("brand", ""),
+                                             mfr=part_info.get("mfr", ""))
+            if url != cached:
+                urls.append((name, url))
+        return urls
+
+    def record(self, part_info, pattern, final_url):
+        """Remember the URL a part resolved to and credit the winning pattern"""
+        with self.lock:
+            self.canonical[part_info["ps"]] = final_url
+            if pattern != "cached":
+                brand_wins = self.wins.setdefault(part_info.get("brand", ""), {})
+                brand_wins[pattern] = brand_wins.get(pattern, 0) + 1
+            self.dirty = True
+
+    def invalidate(self, ps):
+        """Forget a part's canonical URL (it returned 404)"""
+        with self.lock:
+            if self.canonical.pop(ps, None) is not None:
+                self.dirty = True